@@ -0,0 +1,248 @@
+"""
+Local columnar price store for market data
+
+Daily closes are kept on disk per ticker as two flat binary columns
+(``dates.i8`` as days since the epoch and ``close.f8``) that are read through
+``np.memmap``, so a year of bars for every recommended ETF loads in
+milliseconds. New bars are appended incrementally from a pluggable refill
+source: ``YFinanceSource`` over the network, ``HTTPCSVSource`` for any
+server exposing per-ticker CSV files, or ``CSVFixtureSource`` for fully
+offline use.
+"""
+import csv
+import json
+import os
+import time
+import urllib.error
+import urllib.request
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+DEFAULT_DATA_DIR = os.environ.get("ALL_WEATHER_DATA_DIR", "data/prices")
+
+# Tickers named in ImplementationAgent.create_plan, plus the market benchmark
+RECOMMENDED_TICKERS = ["VTI", "VXUS", "BND", "BNDX", "VMFXX"]
+MARKET_TICKER = "SPY"
+ALL_TICKERS = RECOMMENDED_TICKERS + [MARKET_TICKER]
+
+Bars = Tuple[np.ndarray, np.ndarray]
+
+
+def _empty_bars() -> Bars:
+    return np.empty(0, dtype="datetime64[D]"), np.empty(0, dtype=float)
+
+
+class YFinanceSource:
+    """Refill source that downloads daily bars from Yahoo Finance"""
+
+    def __init__(self, period: str = "2y"):
+        self.period = period
+
+    def fetch(self, ticker: str, start: Optional[np.datetime64] = None) -> Bars:
+        import yfinance as yf
+
+        if start is None:
+            data = yf.Ticker(ticker).history(period=self.period)
+        else:
+            data = yf.Ticker(ticker).history(start=str(start))
+        if data.empty:
+            return _empty_bars()
+        index = data.index.tz_localize(None) if data.index.tz is not None else data.index
+        return index.values.astype("datetime64[D]"), data["Close"].to_numpy(dtype=float)
+
+
+def parse_csv_bars(lines: Iterable[str], start: Optional[np.datetime64] = None) -> Bars:
+    """Bars from CSV text with Date and Close columns, keeping dates on or after ``start``"""
+    rows = list(csv.DictReader(lines))
+    dates = np.array([row["Date"][:10] for row in rows], dtype="datetime64[D]")
+    closes = np.array([row["Close"] for row in rows], dtype=float)
+    if start is not None:
+        keep = dates >= np.datetime64(start, "D")
+        dates, closes = dates[keep], closes[keep]
+    return dates, closes
+
+
+class CSVFixtureSource:
+    """Offline refill source reading ``<TICKER>.csv`` files with Date and Close columns"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def fetch(self, ticker: str, start: Optional[np.datetime64] = None) -> Bars:
+        path = os.path.join(self.directory, f"{ticker}.csv")
+        if not os.path.exists(path):
+            return _empty_bars()
+        with open(path, newline="") as handle:
+            return parse_csv_bars(handle, start)
+
+
+class HTTPCSVSource:
+    """Refill source downloading ``<base_url>/<TICKER>.csv`` in the fixture format"""
+
+    def __init__(self, base_url: str, timeout: float = 10.0):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def fetch(self, ticker: str, start: Optional[np.datetime64] = None) -> Bars:
+        try:
+            with urllib.request.urlopen(f"{self.base_url}/{ticker}.csv", timeout=self.timeout) as response:
+                text = response.read().decode()
+        except urllib.error.HTTPError as e:
+            if e.code == 404:
+                return _empty_bars()
+            raise
+        return parse_csv_bars(text.splitlines(), start)
+
+
+def write_fixture(directory: str, ticker: str, dates: np.ndarray, closes: np.ndarray) -> str:
+    """Write bars in the format ``CSVFixtureSource`` reads"""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{ticker}.csv")
+    with open(path, "w", newline="") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(["Date", "Close"])
+        for date, close in zip(np.asarray(dates, dtype="datetime64[D]"), closes):
+            writer.writerow([str(date), repr(float(close))])
+    return path
+
+
+class PriceStore:
+    """
+    On-disk daily close store keyed by ticker
+
+    Reads never touch the network. ``history`` refills a ticker from the
+    configured source when it has not been checked for ``refresh_interval``
+    seconds, appending only bars newer than the last stored date.
+    """
+
+    def __init__(self, root: str = DEFAULT_DATA_DIR, source=None, refresh_interval: float = 3600):
+        self.root = root
+        self.source = source
+        self.refresh_interval = refresh_interval
+        self._columns: Dict[str, Tuple[int, Bars]] = {}
+
+    def _path(self, ticker: str, name: str) -> str:
+        return os.path.join(self.root, ticker.upper(), name)
+
+    def _load_meta(self, ticker: str) -> Dict:
+        try:
+            with open(self._path(ticker, "meta.json")) as handle:
+                return json.load(handle)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_meta(self, ticker: str, meta: Dict):
+        path = self._path(ticker, "meta.json")
+        with open(path + ".tmp", "w") as handle:
+            json.dump(meta, handle)
+        os.replace(path + ".tmp", path)
+
+    def tickers(self) -> List[str]:
+        """Tickers with at least one stored bar"""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(t for t in os.listdir(self.root) if self.bar_count(t))
+
+    def bar_count(self, ticker: str) -> int:
+        try:
+            dates = os.path.getsize(self._path(ticker, "dates.i8")) // 8
+            closes = os.path.getsize(self._path(ticker, "close.f8")) // 8
+        except OSError:
+            return 0
+        # Closes are written before dates, so a torn append is never visible
+        return min(dates, closes)
+
+    def read(self, ticker: str, lookback_days: Optional[int] = None) -> Bars:
+        """
+        Memory-mapped (dates, closes) for a ticker
+
+        ``lookback_days`` keeps only bars within that many calendar days of
+        the latest stored bar.
+        """
+        count = self.bar_count(ticker)
+        if count == 0:
+            return _empty_bars()
+        ticker = ticker.upper()
+        cached = self._columns.get(ticker)
+        if cached is None or cached[0] != count:
+            dates = np.memmap(self._path(ticker, "dates.i8"), dtype="<i8", mode="r", shape=(count,))
+            closes = np.memmap(self._path(ticker, "close.f8"), dtype="<f8", mode="r", shape=(count,))
+            cached = (count, (dates.view("datetime64[D]"), closes))
+            self._columns[ticker] = cached
+        dates, closes = cached[1]
+        if lookback_days is not None:
+            first = np.searchsorted(dates, dates[-1] - np.timedelta64(lookback_days, "D"))
+            dates, closes = dates[first:], closes[first:]
+        return dates, closes
+
+    def last_date(self, ticker: str) -> Optional[np.datetime64]:
+        dates, _ = self.read(ticker)
+        return dates[-1] if len(dates) else None
+
+    def append(self, ticker: str, dates, closes) -> int:
+        """Append bars newer than the last stored date and return how many were added"""
+        dates = np.asarray(dates, dtype="datetime64[D]")
+        closes = np.asarray(closes, dtype=float)
+        order = np.argsort(dates, kind="stable")
+        dates, closes = dates[order], closes[order]
+
+        last = self.last_date(ticker)
+        if last is not None:
+            newer = dates > last
+            dates, closes = dates[newer], closes[newer]
+        # Keep the last bar for any duplicated date
+        if len(dates):
+            unique = np.append(dates[1:] != dates[:-1], True)
+            dates, closes = dates[unique], closes[unique]
+        if not len(dates):
+            return 0
+
+        os.makedirs(os.path.join(self.root, ticker.upper()), exist_ok=True)
+        # Drop the tail of an interrupted append before writing new bars
+        count = self.bar_count(ticker)
+        for name in ("close.f8", "dates.i8"):
+            path = self._path(ticker, name)
+            if os.path.exists(path) and os.path.getsize(path) != count * 8:
+                os.truncate(path, count * 8)
+        with open(self._path(ticker, "close.f8"), "ab") as handle:
+            handle.write(closes.astype("<f8").tobytes())
+        with open(self._path(ticker, "dates.i8"), "ab") as handle:
+            handle.write(dates.astype("<i8").tobytes())
+        return len(dates)
+
+    def refresh(self, ticker: str) -> int:
+        """Pull bars after the last stored date from the source"""
+        if self.source is None:
+            return 0
+        last = self.last_date(ticker)
+        start = None if last is None else last + np.timedelta64(1, "D")
+        added = self.append(ticker, *self.source.fetch(ticker, start))
+        os.makedirs(os.path.join(self.root, ticker.upper()), exist_ok=True)
+        self._save_meta(ticker, {"checked_at": time.time()})
+        return added
+
+    def is_stale(self, ticker: str) -> bool:
+        checked_at = self._load_meta(ticker).get("checked_at", 0)
+        return time.time() - checked_at > self.refresh_interval
+
+    def history(self, ticker: str, lookback_days: Optional[int] = None) -> Bars:
+        """Read a ticker, refilling it from the source first if it is stale"""
+        if self.source is not None and self.is_stale(ticker):
+            self.refresh(ticker)
+        return self.read(ticker, lookback_days)
+
+    def history_many(self, tickers: List[str], lookback_days: Optional[int] = None) -> Dict[str, Bars]:
+        return {ticker: self.history(ticker, lookback_days) for ticker in tickers}
+
+    def price_matrix(self, tickers: List[str], lookback_days: Optional[int] = None) -> Bars:
+        """Closes aligned on the dates every ticker traded, as (dates, dates x tickers)"""
+        bars = self.history_many(tickers, lookback_days)
+        common = None
+        for dates, _ in bars.values():
+            common = dates if common is None else np.intersect1d(common, dates, assume_unique=True)
+        matrix = np.empty((len(common), len(tickers)))
+        for column, ticker in enumerate(tickers):
+            dates, closes = bars[ticker]
+            matrix[:, column] = closes[np.searchsorted(dates, common)]
+        return np.asarray(common), matrix
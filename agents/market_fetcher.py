@@ -0,0 +1,169 @@
+"""
+Concurrent market-data fetching on top of the local price store
+
+``MarketDataFetcher`` refreshes every ticker at once instead of one after
+another. Refills run on a dedicated thread pool, because yfinance and urllib
+block, and are awaited through asyncio. It applies three policies:
+
+- coalescing: concurrent requests for a ticker share one in-flight refill
+- stale-while-revalidate: a ticker with stored bars is answered from disk
+  immediately while its refill runs in the background
+- timeouts: a ticker with nothing stored waits at most ``timeout`` seconds
+  for its first refill, then comes back empty instead of blocking the report
+
+In-flight refills are plain ``concurrent.futures`` futures, not tied to an
+event loop, so they coalesce across ``asyncio.run`` calls and threads. All
+fetchers in a process share one refill thread pool unless given their own
+``max_workers``. ``fetch_all`` runs its own event loop, so code already on
+a loop awaits ``fetch_many`` instead (or calls ``fetch_all`` from a thread).
+"""
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, Optional
+
+from agents.market_data import ALL_TICKERS, Bars, PriceStore
+
+SHARED_WORKERS = 8
+
+_shared: Optional[ThreadPoolExecutor] = None
+_shared_lock = threading.Lock()
+
+
+def shared_executor() -> ThreadPoolExecutor:
+    """The process-wide refill pool, started on first use"""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = ThreadPoolExecutor(max_workers=SHARED_WORKERS, thread_name_prefix="market-data")
+        return _shared
+
+
+def _forget_shared():
+    # A forked child has none of the parent's pool threads, so it starts its own
+    global _shared, _shared_lock
+    _shared, _shared_lock = None, threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_shared)
+
+
+class MarketDataFetcher:
+    """
+    Concurrent, coalescing reads of a ``PriceStore`` with a refill timeout
+
+    Refills run on ``shared_executor()``. Passing ``max_workers`` gives this
+    fetcher a pool of its own instead, which ``close`` shuts down.
+    """
+
+    def __init__(self, store: PriceStore, timeout: float = 5.0, max_workers: Optional[int] = None):
+        self.store = store
+        self.timeout = timeout
+        self._owned = max_workers is not None
+        self._executor = (ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="market-data")
+                          if self._owned else shared_executor())
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.errors: Dict[str, str] = {}
+        self.metrics = {"fresh": 0, "stale_served": 0, "refills": 0, "coalesced": 0,
+                        "timeouts": 0, "failures": 0}
+
+    def _count(self, name: str):
+        with self._lock:
+            self.metrics[name] += 1
+
+    def revalidate(self, ticker: str) -> Future:
+        """Start a refill for ``ticker``, or join the one already running"""
+        ticker = ticker.upper()
+        with self._lock:
+            future = self._inflight.get(ticker)
+            if future is not None:
+                self.metrics["coalesced"] += 1
+                return future
+            future = self._executor.submit(self.store.refresh, ticker)
+            self._inflight[ticker] = future
+            self.metrics["refills"] += 1
+        future.add_done_callback(lambda done: self._finished(ticker, done))
+        return future
+
+    def _finished(self, ticker: str, future: Future):
+        with self._lock:
+            if self._inflight.get(ticker) is future:
+                del self._inflight[ticker]
+            error = None if future.cancelled() else future.exception()
+            if error is None:
+                self.errors.pop(ticker, None)
+            else:
+                self.errors[ticker] = f"{type(error).__name__}: {error}"
+                self.metrics["failures"] += 1
+
+    async def fetch(self, ticker: str, lookback_days: Optional[int] = None) -> Bars:
+        """Bars for one ticker; only waits on the network when nothing is stored"""
+        store = self.store
+        if store.source is None or not store.is_stale(ticker):
+            self._count("fresh")
+            return store.read(ticker, lookback_days)
+        refill = self.revalidate(ticker)
+        if store.bar_count(ticker):
+            self._count("stale_served")
+            return store.read(ticker, lookback_days)
+        try:
+            # Shielded: a timed-out waiter must not cancel a refill others share
+            await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(refill)), self.timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self.metrics["timeouts"] += 1
+                self.errors.setdefault(ticker.upper(), f"timed out after {self.timeout:g}s")
+        except Exception:
+            pass  # recorded by _finished
+        return store.read(ticker, lookback_days)
+
+    async def fetch_many(self, tickers: Iterable[str] = ALL_TICKERS,
+                         lookback_days: Optional[int] = None) -> Dict[str, Bars]:
+        tickers = list(tickers)
+        bars = await asyncio.gather(*(self.fetch(ticker, lookback_days) for ticker in tickers))
+        return dict(zip(tickers, bars))
+
+    def fetch_all(self, tickers: Iterable[str] = ALL_TICKERS,
+                  lookback_days: Optional[int] = None) -> Dict[str, Bars]:
+        """
+        Blocking ``fetch_many`` for callers without an event loop
+
+        Raises ``RuntimeError`` when called on a thread that is running one;
+        await ``fetch_many`` there, or run this on a worker thread.
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            raise RuntimeError("fetch_all() cannot run inside an event loop; await fetch_many() instead")
+        return asyncio.run(self.fetch_many(tickers, lookback_days))
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until background refills finish; False if ``timeout`` ran out first"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                pending = list(self._inflight.values())
+            if not pending:
+                return True
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            try:
+                pending[0].result(timeout=remaining)
+            except Exception:
+                pass
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {**self.metrics, "in_flight": len(self._inflight), "errors": dict(self.errors)}
+
+    def close(self):
+        """Shut down this fetcher's own pool; the shared one lives as long as the process"""
+        if self._owned:
+            self._executor.shutdown(wait=False)
@@ -0,0 +1,231 @@
+"""
+Process-wide registry for the agents' model and client backends
+
+Backends are registered as loader callables and built on first use, so
+every agent asking for the same name shares one instance. Loaded backends
+are evicted least-recently-used first when a memory budget is exceeded,
+and after sitting idle longer than ``idle_timeout`` seconds. Load times,
+hit counts and memory estimates are exposed through ``stats()``.
+
+Set ``ALL_WEATHER_LLM_BACKEND=stub`` (or call ``use_stub_backends``) to swap
+every backend for a deterministic local stub that needs no download or
+network access.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+MARKET_LLM = "market-llm"
+PORTFOLIO_LLM = "portfolio-llm"
+IMPLEMENTATION_LLM = "implementation-llm"
+
+
+def _rss_bytes() -> int:
+    """Resident set size of this process, or 0 where /proc is unavailable"""
+    try:
+        with open("/proc/self/statm") as handle:
+            return int(handle.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def estimate_memory(instance: Any) -> int:
+    """Parameter bytes of a transformers pipeline/torch model, else 0"""
+    model = getattr(instance, "model", instance)
+    parameters = getattr(model, "parameters", None)
+    if callable(parameters):
+        try:
+            return sum(p.numel() * p.element_size() for p in parameters())
+        except Exception:
+            return 0
+    return 0
+
+
+class _Entry:
+    __slots__ = ("loader", "estimator", "instance", "memory", "loads", "hits",
+                 "load_seconds", "last_used", "lock")
+
+    def __init__(self, loader, estimator):
+        self.loader = loader
+        self.estimator = estimator
+        self.instance = None
+        self.memory = 0
+        self.loads = 0
+        self.hits = 0
+        self.load_seconds = 0.0
+        self.last_used = 0.0
+        self.lock = threading.Lock()
+
+
+class ModelRegistry:
+    """
+    Lazily loaded, shared backends with LRU and idle-timeout eviction
+
+    ``memory_budget`` is in bytes and ``idle_timeout`` in seconds; ``None``
+    disables that limit. ``clock`` is injectable for deterministic tests.
+    """
+
+    def __init__(
+        self,
+        memory_budget: Optional[int] = None,
+        idle_timeout: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.memory_budget = memory_budget
+        self.idle_timeout = idle_timeout
+        self.clock = clock
+        self._entries: Dict[str, _Entry] = {}
+        self._loaded: "OrderedDict[str, None]" = OrderedDict()  # LRU order, oldest first
+        self._lock = threading.RLock()
+        self.evictions = 0
+
+    def register(self, name: str, loader: Callable[[], Any],
+                 estimator: Optional[Callable[[Any], int]] = None):
+        """Register (or replace) a backend; a replaced backend is unloaded"""
+        with self._lock:
+            if name in self._entries:
+                self.evict(name)
+            self._entries[name] = _Entry(loader, estimator)
+
+    def get(self, name: str) -> Any:
+        """Return the shared instance for ``name``, loading it on first use"""
+        self.sweep()
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                raise KeyError(f"No backend registered as {name!r}")
+        # Per-entry lock: concurrent first requests load once, others wait
+        with entry.lock:
+            if entry.instance is None:
+                rss_before = _rss_bytes()
+                start = time.perf_counter()
+                instance = entry.loader()
+                entry.load_seconds += time.perf_counter() - start
+                entry.loads += 1
+                if entry.estimator is not None:
+                    entry.memory = entry.estimator(instance)
+                else:
+                    entry.memory = estimate_memory(instance) or max(0, _rss_bytes() - rss_before)
+                entry.instance = instance
+            else:
+                entry.hits += 1
+            instance = entry.instance
+        with self._lock:
+            entry.last_used = self.clock()
+            self._loaded[name] = None
+            self._loaded.move_to_end(name)
+            self._enforce_budget(keep=name)
+        return instance
+
+    def evict(self, name: str) -> bool:
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None or entry.instance is None:
+                return False
+            entry.instance = None
+            entry.memory = 0
+            self._loaded.pop(name, None)
+            self.evictions += 1
+            return True
+
+    def clear(self):
+        with self._lock:
+            for name in list(self._loaded):
+                self.evict(name)
+
+    def sweep(self):
+        """Evict backends idle for longer than ``idle_timeout``"""
+        if self.idle_timeout is None:
+            return
+        now = self.clock()
+        with self._lock:
+            for name in list(self._loaded):
+                if now - self._entries[name].last_used > self.idle_timeout:
+                    self.evict(name)
+
+    def _enforce_budget(self, keep: str):
+        if self.memory_budget is None:
+            return
+        for name in list(self._loaded):
+            if self.memory_usage() <= self.memory_budget:
+                break
+            if name != keep:
+                self.evict(name)
+
+    def memory_usage(self) -> int:
+        with self._lock:
+            return sum(self._entries[name].memory for name in self._loaded)
+
+    def stats(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {
+                name: {
+                    "loaded": entry.instance is not None,
+                    "loads": entry.loads,
+                    "hits": entry.hits,
+                    "load_seconds": entry.load_seconds,
+                    "memory_bytes": entry.memory,
+                    "idle_seconds": self.clock() - entry.last_used if entry.loads else None,
+                }
+                for name, entry in self._entries.items()
+            }
+
+
+class StubLLM:
+    """Deterministic local stand-in for the text-generation and OpenAI backends"""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def invoke(self, prompt: str, **kwargs) -> str:
+        return f"[{self.name}] {prompt}"
+
+    def __call__(self, prompt: str, **kwargs):
+        # Shaped like both a transformers pipeline result and a plain completion
+        return [{"generated_text": self.invoke(prompt)}]
+
+
+def _text_generation_pipeline():
+    from transformers import pipeline
+    # Use a smaller, faster model if possible
+    return pipeline("text-generation",
+                    model="distilgpt2",  # Lighter model
+                    device_map="auto")   # Automatic device placement
+
+
+def _openai_client(temperature: float) -> Callable[[], Any]:
+    def load():
+        from langchain_community.llms import OpenAI
+        return OpenAI(temperature=temperature)
+    return load
+
+
+def register_default_backends(target: "ModelRegistry"):
+    target.register(MARKET_LLM, _text_generation_pipeline)
+    target.register(PORTFOLIO_LLM, _openai_client(0.2))
+    target.register(IMPLEMENTATION_LLM, _openai_client(0.3))
+
+
+def use_stub_backends(target: Optional["ModelRegistry"] = None):
+    """Replace every default backend with a ``StubLLM``"""
+    target = target or registry
+    for name in (MARKET_LLM, PORTFOLIO_LLM, IMPLEMENTATION_LLM):
+        target.register(name, lambda name=name: StubLLM(name), estimator=lambda _: 0)
+
+
+def _budget_from_env() -> Optional[int]:
+    value = os.environ.get("ALL_WEATHER_MODEL_BUDGET_MB")
+    return int(float(value) * 2**20) if value else None
+
+
+def _timeout_from_env() -> Optional[float]:
+    value = os.environ.get("ALL_WEATHER_MODEL_IDLE_SECONDS")
+    return float(value) if value else None
+
+
+registry = ModelRegistry(memory_budget=_budget_from_env(), idle_timeout=_timeout_from_env())
+register_default_backends(registry)
+if os.environ.get("ALL_WEATHER_LLM_BACKEND") == "stub":
+    use_stub_backends(registry)
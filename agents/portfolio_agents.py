@@ -1,31 +1,109 @@
-from langchain_community.llms import OpenAI
-import yfinance as yf
-from typing import Dict
-from transformers import pipeline
+import os
+import time
+from typing import Dict, Optional
+
+from agents import model_registry
+from utils.lazy import lazy_import
+from utils.tracing import tracer
+
+# Streamlit, market data, projections and reports load on first use, not at import time
+st = lazy_import("streamlit")
+market_data = lazy_import("agents.market_data")
+market_fetcher = lazy_import("agents.market_fetcher")
+projections = lazy_import("utils.projections")
+reports = lazy_import("utils.reports")
+indicators = lazy_import("utils.indicators")
+
+MARKET_ANALYSIS_TTL = 3600  # Cache market analysis for 1 hour
+INDICATOR_SNAPSHOT = "indicators.npz"  # Saved next to the price store's tickers
 
 class MarketAnalysisAgent:
-    @st.cache_resource
-    def __init__(self):
-        # Use a smaller, faster model if possible
-        self.llm = pipeline("text-generation", 
-                            model="distilgpt2",  # Lighter model
-                            device_map="auto")   # Automatic device placement
-
-    @st.cache_data(ttl=3600)  # Cache market analysis for 1 hour
+    def __init__(self, price_store: Optional["market_data.PriceStore"] = None,
+                 models: Optional[model_registry.ModelRegistry] = None,
+                 fetcher: Optional["market_fetcher.MarketDataFetcher"] = None):
+        # Models come from the shared registry so every agent reuses one instance
+        self.models = models or model_registry.registry
+        # Market reads go through the local store; the network only refills it
+        self.price_store = price_store or market_data.PriceStore(source=market_data.YFinanceSource())
+        # Refills for every ticker run concurrently, falling back to the last stored bars
+        self.fetcher = fetcher or market_fetcher.MarketDataFetcher(self.price_store)
+        self._analysis = None
+        self._analyzed_at = 0.0
+        self._indicators = None
+
+    @property
+    def llm(self):
+        return self.models.get(model_registry.MARKET_LLM)
+
+    @property
+    def indicator_engine(self) -> "indicators.IndicatorEngine":
+        """Rolling indicators for every ticker, resumed from the last snapshot"""
+        if self._indicators is None:
+            path = os.path.join(self.price_store.root, INDICATOR_SNAPSHOT)
+            self._indicators = indicators.IndicatorEngine.load(path, market_data.ALL_TICKERS)
+        return self._indicators
+
+    def _update_indicators(self) -> "indicators.IndicatorEngine":
+        """Feed bars stored since the last update; only new bars are processed"""
+        engine = self.indicator_engine
+        if engine.feed(self.price_store):
+            try:
+                engine.save(os.path.join(self.price_store.root, INDICATOR_SNAPSHOT))
+            except OSError:
+                pass  # a read-only store still gets in-memory indicators
+        return engine
+
     def analyze_market(self):
+        if self._analysis is not None and time.monotonic() - self._analyzed_at < MARKET_ANALYSIS_TTL:
+            tracer.cache("market_analysis", hit=True)
+            return self._analysis
+        tracer.cache("market_analysis", hit=False)
+        self._analysis = self._fetch_analysis()
+        self._analyzed_at = time.monotonic()
+        return self._analysis
+
+    def _fetch_analysis(self):
         try:
-            spy = yf.Ticker("SPY")
-            data = spy.history(period="1mo")
+            bars = self.fetcher.fetch_all(market_data.ALL_TICKERS, lookback_days=31)
+            engine = self._update_indicators()
+            windows = {ticker: engine.indicators(ticker) for ticker in market_data.ALL_TICKERS}
+            month = windows[market_data.MARKET_TICKER].get("1m")
+            if month is None or month["bars"] < 3:
+                errors = self.fetcher.stats()["errors"]
+                reason = errors.get(market_data.MARKET_TICKER, "no stored bars")
+                raise ValueError(f"{market_data.MARKET_TICKER}: {reason}")
             return {
-                "volatility": data['Close'].std(),
-                "trend": "bullish" if data['Close'][-1] > data['Close'][0] else "bearish"
+                # Annualized percent volatility of daily returns and close vs. moving average
+                "volatility": month["volatility"],
+                "trend": month["trend"],
+                "drawdown": month["drawdown"],
+                "as_of": str(engine.last_date(market_data.MARKET_TICKER)),
+                "indicators": {ticker: values for ticker, values in windows.items() if values},
+                "prices": {
+                    ticker: {"close": float(closes[-1]), "as_of": str(ticker_dates[-1])}
+                    for ticker, (ticker_dates, closes) in bars.items() if len(closes)
+                },
             }
         except Exception as e:
             return {"error": f"Market data unavailable: {str(e)}"}
+
+
+class SharedMarketAgent:
+    """Stands in for MarketAnalysisAgent with an analysis computed once by the parent"""
+
+    def __init__(self, analysis: Dict):
+        self.analysis = analysis
+
+    def analyze_market(self) -> Dict:
+        return self.analysis
             
 class PortfolioAgent:
-    def __init__(self):
-        self.llm = OpenAI(temperature=0.2)
+    def __init__(self, models: Optional[model_registry.ModelRegistry] = None):
+        self.models = models or model_registry.registry
+
+    @property
+    def llm(self):
+        return self.models.get(model_registry.PORTFOLIO_LLM)
         
     def get_allocation(self, age: int, risk: str) -> Dict:
         """Get portfolio allocation based on age and risk tolerance"""
@@ -48,8 +126,12 @@ class PortfolioAgent:
         }
 
 class ImplementationAgent:
-    def __init__(self):
-        self.llm = OpenAI(temperature=0.3)
+    def __init__(self, models: Optional[model_registry.ModelRegistry] = None):
+        self.models = models or model_registry.registry
+
+    @property
+    def llm(self):
+        return self.models.get(model_registry.IMPLEMENTATION_LLM)
     
     def create_plan(self, allocation: Dict, monthly_invest: float) -> Dict:
         """Generate an implementation plan for investing"""
@@ -68,129 +150,53 @@ class ImplementationAgent:
         }
 
 class AllWeatherPortfolioManager:
-    @st.cache_resource
-    def __init__(self):
+    def __init__(self, models: Optional[model_registry.ModelRegistry] = None):
         try:
-            # Add timeouts and error handling for model loading
-            self.market_agent = MarketAnalysisAgent()
-            self.portfolio_agent = PortfolioAgent()
-            self.implementation_agent = ImplementationAgent()
+            # Agents are cheap to build; their models load lazily from the shared registry
+            self.market_agent = MarketAnalysisAgent(models=models)
+            self.portfolio_agent = PortfolioAgent(models=models)
+            self.implementation_agent = ImplementationAgent(models=models)
         except Exception as e:
             st.error(f"Failed to initialize agents: {e}")
     
     def generate_portfolio(self, age: int, risk_tolerance: str, monthly_investment: float) -> Dict:
         """Generate a personalized portfolio strategy"""
-        # Fetch all required data
-        result = {
-            "market_analysis": self.market_agent.analyze_market(),
-            "allocation": self.portfolio_agent.get_allocation(age, risk_tolerance),
-            "summary": {
-                "age": age,
-                "risk_profile": risk_tolerance,
-                "monthly_investment": monthly_investment
+        with tracer.span("generate_portfolio", risk_profile=risk_tolerance):
+            # Fetch all required data
+            with tracer.span("market_analysis"):
+                market_analysis = self.market_agent.analyze_market()
+            with tracer.span("allocation"):
+                allocation = self.portfolio_agent.get_allocation(age, risk_tolerance)
+            result = {
+                "market_analysis": market_analysis,
+                "allocation": allocation,
+                "summary": {
+                    "age": age,
+                    "risk_profile": risk_tolerance,
+                    "monthly_investment": monthly_investment
+                }
             }
-        }
-        
-        # Generate investment plan
-        result["implementation"] = self.implementation_agent.create_plan(
-            result["allocation"], 
-            monthly_investment
-        )
-        
-        # Format the final output
-        result["formatted_output"] = self.format_allocation(result)
-        
-        return result
 
-    def format_allocation(self, result: Dict) -> str:
-        """Format the portfolio report for better readability"""
-        allocation = result["allocation"]
-        monthly_invest = result["summary"]["monthly_investment"]
-        market_analysis = result["market_analysis"]
-        plan = result["implementation"]
-
-        return f"""
-        # 🎯 All-Weather Portfolio Report
-
-        ## 📊 Market Analysis
-        - **Volatility Level**: {"Low" if market_analysis['volatility'] < 15 else "Moderate" if market_analysis['volatility'] < 25 else "High"} ({market_analysis['volatility']:.2f}%)
-        - **Market Trend**: 🚀 {market_analysis['trend'].title()}
-        - **Market Outlook**: {"📈 Favorable for gradual entry" if market_analysis['trend'] == 'bullish' else "📉 Good time for dollar-cost averaging"}
-
-        ---
-
-        ## 💼 Portfolio Allocation
-        - **Risk Profile**: {result["summary"]["risk_profile"]}
-        - **Age**: {result["summary"]["age"]}
-        - **Monthly Investment**: ${monthly_invest:.2f}
-
-        ```mermaid
-        pie title Asset Allocation
-            "Stocks" : {allocation['stocks']:.1f}
-            "Bonds" : {allocation['bonds']:.1f}
-            "Cash" : {allocation['cash']:.1f}
-        ```
-
-        ### 🔍 Detailed Breakdown:
-        | Asset Class  | Allocation (%) | Recommended ETFs | Monthly Investment |
-        |-------------|--------------|------------------|--------------------|
-        | **Stocks** 📈 | {allocation['stocks']:.1f}% | VTI (70%), VXUS (30%) | ${monthly_invest * allocation['stocks'] / 100:.2f} |
-        | **Bonds** 🏛️ | {allocation['bonds']:.1f}% | BND (80%), BNDX (20%) | ${monthly_invest * allocation['bonds'] / 100:.2f} |
-        | **Cash** 💵 | {allocation['cash']:.1f}% | VMFXX | ${monthly_invest * allocation['cash'] / 100:.2f} |
-
-        ---
-
-        ## 📈 Investment Growth Projection
-        - Starting Monthly Investment: **${monthly_invest:.2f}**
-        
-        ```mermaid
-        graph LR
-            A[Start] --> B[10 Years]
-            B --> C[20 Years]
-            C --> D[30 Years]
-        ```
-
-        **Growth Estimates**:
-        - 📊 **Conservative (6% Return)**:  
-          - 10 Years: **${monthly_invest * 12 * 10 * 1.06**10:.2f}**
-          - 20 Years: **${monthly_invest * 12 * 20 * 1.06**20:.2f}**
-          - 30 Years: **${monthly_invest * 12 * 30 * 1.06**30:.2f}**
-        
-        - 🚀 **Expected (8% Return)**:  
-          - 10 Years: **${monthly_invest * 12 * 10 * 1.08**10:.2f}**
-          - 20 Years: **${monthly_invest * 12 * 20 * 1.08**20:.2f}**
-          - 30 Years: **${monthly_invest * 12 * 30 * 1.08**30:.2f}**
+            # Generate investment plan
+            with tracer.span("plan"):
+                result["implementation"] = self.implementation_agent.create_plan(
+                    result["allocation"],
+                    monthly_investment
+                )
 
-        ---
+            # Simulated growth bands for the allocation
+            with tracer.span("projection"):
+                result["projections"] = projections.monte_carlo_projection(result["allocation"], monthly_investment)
 
-        ## 📝 Implementation Plan
-        ### ✅ Step 1: Account Setup
-        - 🏦 Open brokerage account (**Vanguard, Fidelity, Schwab**)
-        - 🔄 Set up **${monthly_invest:.2f}** automatic monthly investments  
-        - 🔁 Enable **Dividend Reinvestment (DRIP)**  
+            # Format the final output
+            with tracer.span("format"):
+                result["formatted_output"] = self.format_allocation(result)
 
-        ### 🔄 Step 2: Rebalancing Strategy
-        - ✅ Monitor for **5% asset drift**
-        - 🔁 Adjust portfolio every **quarter**
-        - 📊 Review market & personal financial changes
-
-        ---
-
-        ## 🛡 Risk Management
-        - ✅ **Diversification** across multiple asset classes  
-        - 🔄 **Regular Rebalancing** to maintain risk  
-        - 📉 **Dollar-Cost Averaging** for market fluctuations  
-        - 🏦 **Emergency Fund** maintained at **{allocation['cash']:.1f}%**  
-
-        ---
-
-        ## 📚 Recommended Reading
-        - 📖 [Bridgewater All-Weather Portfolio](https://www.bridgewater.com/research-and-insights/the-all-weather-story)  
-        - 📖 [Bogleheads Investment Philosophy](https://www.bogleheads.org/wiki/Bogleheads®_investment_philosophy)  
-        - 📖 [Risk Parity Explained](https://www.investopedia.com/terms/r/risk-parity.asp)  
+        return result
 
-        🚀 **Take Action Now!** 🏦 Open your brokerage, set up investments, and grow your wealth!
-        """
+    def format_allocation(self, result: Dict, fmt: str = "markdown") -> str:
+        """Format the portfolio report for better readability (markdown, html or json)"""
+        return reports.render_report(result, fmt)
 
 # ✅ Now, just instantiate and call:
 # manager = AllWeatherPortfolioManager()
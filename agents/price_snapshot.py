@@ -0,0 +1,182 @@
+"""
+Versioned, memory-mapped price matrix shared by worker processes
+
+``publish_snapshot`` aligns a ``PriceStore``'s tickers on their common dates
+once. It writes the (dates x tickers) closes and daily returns as ``.npy``
+files into a new numbered version directory, then points ``CURRENT`` at it
+with an atomic rename. ``PriceSnapshot.open`` maps the current version
+read-only. Every process that opens it shares the same page-cache pages, so
+resident memory does not grow with the worker count. Opening a snapshot
+parses nothing, so worker startup costs the same for any history length.
+
+Readers keep their version until they call ``refresh``. Old versions are
+pruned after publishing, and on POSIX a reader still mapping one keeps it
+alive until it lets go.
+"""
+import json
+import os
+import shutil
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence
+
+try:
+    import fcntl
+except ImportError:  # Windows: the re-check below still keeps the pointer from moving back
+    fcntl = None
+
+import numpy as np
+
+from agents.market_data import ALL_TICKERS, PriceStore
+
+SNAPSHOT_DIR = "snapshots"
+CURRENT = "CURRENT"
+KEEP_VERSIONS = 3
+
+
+def snapshot_root(store: PriceStore) -> str:
+    return os.path.join(store.root, SNAPSHOT_DIR)
+
+
+def current_version(root: str) -> Optional[int]:
+    try:
+        with open(os.path.join(root, CURRENT)) as handle:
+            return int(handle.read().strip())
+    except (OSError, ValueError):
+        return None
+
+
+def _version_dir(root: str, version: int) -> str:
+    return os.path.join(root, f"v{version:08d}")
+
+
+def _fingerprint(store: PriceStore, tickers: Sequence[str]) -> List:
+    """Bar count and last date per ticker; equal fingerprints mean equal matrices"""
+    return [[ticker, store.bar_count(ticker), str(store.last_date(ticker))] for ticker in tickers]
+
+
+def publish_snapshot(
+    store: PriceStore,
+    tickers: Sequence[str] = ALL_TICKERS,
+    root: Optional[str] = None,
+    keep: int = KEEP_VERSIONS,
+) -> int:
+    """
+    Write the aligned matrix as a new version and return its number
+
+    Reads the store only, so refill it first. When the store has not changed
+    since the current version, that version is returned and nothing is written.
+    """
+    root = root or snapshot_root(store)
+    os.makedirs(root, exist_ok=True)
+    tickers = [ticker.upper() for ticker in tickers]
+    fingerprint = _fingerprint(store, tickers)
+    latest = current_version(root)
+    if latest is not None:
+        try:
+            with open(os.path.join(_version_dir(root, latest), "meta.json")) as handle:
+                if json.load(handle)["fingerprint"] == fingerprint:
+                    return latest
+        except (OSError, ValueError, KeyError):
+            pass
+
+    dates, closes = store.price_matrix(tickers)
+    returns = closes[1:] / closes[:-1] - 1
+
+    # Claiming the directory with mkdir makes concurrent publishers pick distinct
+    # versions; ``_advance`` then only ever moves the pointer forward
+    version = (latest or 0) + 1
+    while True:
+        try:
+            os.mkdir(_version_dir(root, version))
+            break
+        except FileExistsError:
+            version += 1
+    directory = _version_dir(root, version)
+    np.save(os.path.join(directory, "dates.npy"), dates.astype("datetime64[D]"))
+    np.save(os.path.join(directory, "closes.npy"), np.ascontiguousarray(closes, dtype="<f8"))
+    np.save(os.path.join(directory, "returns.npy"), np.ascontiguousarray(returns, dtype="<f8"))
+    with open(os.path.join(directory, "meta.json"), "w") as handle:
+        json.dump({"version": version, "tickers": tickers, "published_at": time.time(),
+                   "fingerprint": fingerprint}, handle)
+
+    _advance(root, version)
+    _prune(root, keep)
+    return version
+
+
+@contextmanager
+def _pointer_lock(root: str):
+    with open(os.path.join(root, CURRENT + ".lock"), "a") as handle:
+        if fcntl is not None:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+        yield
+
+
+def _advance(root: str, version: int):
+    """Point ``CURRENT`` at ``version`` unless a concurrent publisher already moved it further"""
+    pointer = os.path.join(root, CURRENT)
+    temporary = f"{pointer}.{version}.tmp"
+    with open(temporary, "w") as handle:
+        handle.write(str(version))
+    with _pointer_lock(root):
+        if (current_version(root) or 0) < version:
+            os.replace(temporary, pointer)
+            return
+    os.remove(temporary)
+
+
+def _prune(root: str, keep: int):
+    versions = sorted(int(name[1:]) for name in os.listdir(root) if name.startswith("v") and name[1:].isdigit())
+    current = current_version(root)
+    for version in versions[:-keep] if keep > 0 else []:
+        if version != current:
+            shutil.rmtree(_version_dir(root, version), ignore_errors=True)
+
+
+class PriceSnapshot:
+    """
+    Read-only, zero-copy view of one published version
+
+    ``closes`` is (dates x tickers) and ``returns`` is the simple daily
+    return between consecutive rows, (dates - 1 x tickers). All three arrays
+    are memory maps; writing to them raises.
+    """
+
+    def __init__(self, root: str, version: int):
+        directory = _version_dir(root, version)
+        with open(os.path.join(directory, "meta.json")) as handle:
+            meta = json.load(handle)
+        self.root = root
+        self.version = version
+        self.tickers: List[str] = meta["tickers"]
+        self.published_at: float = meta["published_at"]
+        self.dates = np.load(os.path.join(directory, "dates.npy"), mmap_mode="r")
+        self.closes = np.load(os.path.join(directory, "closes.npy"), mmap_mode="r")
+        self.returns = np.load(os.path.join(directory, "returns.npy"), mmap_mode="r")
+        self._columns: Dict[str, int] = {ticker: i for i, ticker in enumerate(self.tickers)}
+
+    @classmethod
+    def open(cls, root: str) -> "PriceSnapshot":
+        """Map the current version under ``root``"""
+        version = current_version(root)
+        if version is None:
+            raise FileNotFoundError(f"No published price snapshot in {root}")
+        return cls(root, version)
+
+    def column(self, ticker: str) -> int:
+        return self._columns[ticker.upper()]
+
+    def closes_for(self, tickers: Sequence[str]) -> np.ndarray:
+        """Closes for a subset of tickers; a copy unless they are one contiguous run"""
+        columns = [self.column(ticker) for ticker in tickers]
+        if columns == list(range(columns[0], columns[0] + len(columns))):
+            return self.closes[:, columns[0]:columns[0] + len(columns)]
+        return self.closes[:, columns]
+
+    def is_current(self) -> bool:
+        return current_version(self.root) == self.version
+
+    def refresh(self) -> "PriceSnapshot":
+        """This snapshot if it is still current, otherwise the newer version"""
+        return self if self.is_current() else PriceSnapshot.open(self.root)
@@ -0,0 +1,431 @@
+"""
+JSON API for programmatic clients, served next to the Streamlit app
+
+``app`` is a plain ASGI application with no framework. Every endpoint takes
+a JSON body with ``age``, ``risk_tolerance`` and ``monthly_investment``:
+
+    GET  /health
+    GET  /metrics      tracer metrics plus request, coalescing and worker-pool counters
+    POST /allocation   seven-asset All-Weather allocation and fixed-rate projections
+    POST /projection   Monte Carlo growth bands for that allocation (optional ``years``, ``n_paths``)
+    POST /plan         stocks/bonds/cash allocation and monthly ETF plan
+    POST /report       full ``generate_portfolio`` report (optional ``format``: markdown, html, json)
+    POST /batch        ``{"requests": [{"endpoint": "plan", ...}, ...]}``, answered in order
+
+Allocation and plan requests are cheap enough to answer on the event loop.
+Projections and reports are CPU-bound, so they run on a process pool. Identical
+requests that arrive while one is already in flight share its result, and
+that includes items inside batches. Market analysis is computed by the parent,
+cached by the agent and passed to the workers, as in ``cli.py``.
+
+``/metrics`` answers with ``utils.tracing.tracer``'s registry as JSON, or in the
+Prometheus text format for ``?format=prometheus`` or an ``Accept`` header that
+asks for ``text/plain`` rather than JSON. The API's own counters are exported
+there as ``all_weather_api`` gauges.
+
+Usage:
+    python api.py --port 8000 --workers 4
+    python api.py --fixtures data/fixtures --offline   # no network
+    uvicorn api:app
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import time
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+from utils.allocation import PROJECTION_YEARS, RISK_MULTIPLIERS
+from utils.result_cache import portfolio_key
+from utils.tracing import PREFIX, tracer
+
+MAX_BODY = 1 << 20  # bytes
+MAX_BATCH = 1_000
+MAX_PATHS = 100_000
+REPORT_FORMATS = ("markdown", "html", "json")
+PROMETHEUS_TYPE = b"text/plain; version=0.0.4; charset=utf-8"
+
+# Set in each worker by _init_worker
+_worker_state: Dict = {}
+
+
+class ApiError(Exception):
+    """A request the API rejects, with its HTTP status"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_profile(body: Dict) -> Dict:
+    """Validated ``age``, ``risk_tolerance`` and ``monthly_investment`` from a request body"""
+    try:
+        profile = {
+            "age": float(body["age"]),
+            "risk_tolerance": str(body["risk_tolerance"]),
+            "monthly_investment": float(body["monthly_investment"]),
+        }
+    except KeyError as e:
+        raise ApiError(400, f"missing field: {e.args[0]}")
+    except (TypeError, ValueError) as e:
+        raise ApiError(400, f"invalid field: {e}")
+    if profile["risk_tolerance"] not in RISK_MULTIPLIERS:
+        raise ApiError(400, f"risk_tolerance must be one of {', '.join(RISK_MULTIPLIERS)}")
+    if not 0 <= profile["age"] <= 120 or profile["monthly_investment"] < 0:
+        raise ApiError(400, "age must be 0-120 and monthly_investment non-negative")
+    if profile["age"].is_integer():
+        profile["age"] = int(profile["age"])
+    return profile
+
+
+def _init_worker():
+    # Import the heavy modules once per worker instead of on its first task
+    from agents.portfolio_agents import AllWeatherPortfolioManager
+    import utils.projections  # noqa: F401
+    import utils.reports  # noqa: F401
+
+    _worker_state["manager"] = AllWeatherPortfolioManager()
+
+
+def _warm():
+    return os.getpid()
+
+
+def _projection_task(profile: Dict, years: List[int], n_paths: int) -> Dict:
+    from utils.allocation import all_weather_portfolio_strategy
+    from utils.projections import monte_carlo_projection
+
+    allocation = all_weather_portfolio_strategy(
+        profile["age"], profile["risk_tolerance"], profile["monthly_investment"]
+    )["allocation"]
+    return {
+        "allocation": allocation,
+        "projection": monte_carlo_projection(allocation, profile["monthly_investment"], years, n_paths),
+    }
+
+
+def _report_task(profile: Dict, analysis: Dict, fmt: str, trace: bool) -> Tuple[Dict, List[List[Dict]]]:
+    """The report and, when ``trace`` is set, the traces it produced for the parent's tracer"""
+    from agents.portfolio_agents import SharedMarketAgent
+
+    # Follow the parent, which may have enabled tracing after the workers started
+    if trace:
+        tracer.enable()
+    else:
+        tracer.disable()
+    tracer.traces.clear()
+    manager = _worker_state["manager"]
+    manager.market_agent = SharedMarketAgent(analysis)
+    result = manager.generate_portfolio(profile["age"], profile["risk_tolerance"], profile["monthly_investment"])
+    if fmt != "markdown":
+        result["formatted_output"] = manager.format_allocation(result, fmt)
+    return result, tracer.recent_traces()
+
+
+class PortfolioAPI:
+    """
+    ASGI application for the portfolio endpoints
+
+    ``workers`` sizes the process pool (default: CPU count). Workers start with
+    ``spawn``, so they never inherit the server's threads. ``market_agent``
+    defaults to a ``MarketAnalysisAgent`` on the default price store.
+    """
+
+    def __init__(self, workers: Optional[int] = None, market_agent=None):
+        self.workers = workers or os.cpu_count() or 1
+        self._market_agent = market_agent
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.metrics = {"requests": 0, "errors": 0, "coalesced": 0, "pool_tasks": 0, "batch_items": 0,
+                        "pool_restarts": 0}
+        self.routes: Dict[Tuple[str, str], Callable[[Dict], Awaitable]] = {
+            ("GET", "/health"): self.health,
+            ("GET", "/metrics"): self.stats,
+            ("POST", "/allocation"): self.allocation,
+            ("POST", "/projection"): self.projection,
+            ("POST", "/plan"): self.plan,
+            ("POST", "/report"): self.report,
+            ("POST", "/batch"): self.batch,
+        }
+        self._exported = False
+
+    @property
+    def market_agent(self):
+        if self._market_agent is None:
+            from agents.portfolio_agents import MarketAnalysisAgent
+
+            self._market_agent = MarketAnalysisAgent()
+        return self._market_agent
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+            )
+        return self._pool
+
+    async def startup(self):
+        """Start every worker now, so the first requests do not pay for it"""
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.pool, _warm) for _ in range(self.workers)))
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    async def _coalesced(self, key: str, compute: Callable[[], Awaitable]):
+        """Await ``compute()``, or the identical request already in flight"""
+        future = self._inflight.get(key)
+        if future is not None:
+            self.metrics["coalesced"] += 1
+        else:
+            future = asyncio.ensure_future(compute())
+            self._inflight[key] = future
+            future.add_done_callback(lambda done: self._inflight.pop(key, None))
+        # Shielded: one caller disconnecting must not cancel the others' result
+        return await asyncio.shield(future)
+
+    async def _in_pool(self, func, *args):
+        self.metrics["pool_tasks"] += 1
+        loop = asyncio.get_running_loop()
+        pool = self.pool
+        try:
+            return await loop.run_in_executor(pool, func, *args)
+        except BrokenProcessPool:
+            # A worker died and the pool refuses all further work; replace it once
+            # (concurrent callers share the first replacement) and retry
+            self.metrics["pool_restarts"] += 1
+            if self._pool is pool:
+                self._pool = None
+                pool.shutdown(wait=False, cancel_futures=True)
+            return await loop.run_in_executor(self.pool, func, *args)
+
+    async def health(self, body: Dict) -> Dict:
+        return {"status": "ok"}
+
+    def counters(self) -> Dict:
+        return {**self.metrics, "in_flight": len(self._inflight), "workers": self.workers}
+
+    async def stats(self, body: Dict) -> Dict:
+        return tracer.metrics.to_dict()
+
+    async def allocation(self, body: Dict) -> Dict:
+        from utils.allocation import all_weather_portfolio_strategy
+
+        profile = parse_profile(body)
+        return all_weather_portfolio_strategy(profile["age"], profile["risk_tolerance"], profile["monthly_investment"])
+
+    async def projection(self, body: Dict) -> Dict:
+        profile = parse_profile(body)
+        try:
+            years = [int(y) for y in body.get("years", PROJECTION_YEARS)]
+            n_paths = int(body.get("n_paths", 10_000))
+        except (TypeError, ValueError) as e:
+            raise ApiError(400, f"invalid field: {e}")
+        if not years or min(years) <= 0 or not 0 < n_paths <= MAX_PATHS:
+            raise ApiError(400, f"years must be positive and n_paths 1-{MAX_PATHS}")
+        key = portfolio_key(profile["age"], profile["risk_tolerance"], profile["monthly_investment"],
+                            "projection", years, n_paths)
+        return await self._coalesced(key, lambda: self._in_pool(_projection_task, profile, years, n_paths))
+
+    async def plan(self, body: Dict) -> Dict:
+        from agents.portfolio_agents import ImplementationAgent, PortfolioAgent
+
+        profile = parse_profile(body)
+        allocation = PortfolioAgent().get_allocation(profile["age"], profile["risk_tolerance"])
+        return {
+            "allocation": allocation,
+            "implementation": ImplementationAgent().create_plan(allocation, profile["monthly_investment"]),
+        }
+
+    async def market_analysis(self) -> Dict:
+        # Blocking store reads run on a thread, where the agent's fetch_all may start its
+        # own event loop (it refuses to on this one); the agent caches the analysis
+        return await self._coalesced("market", lambda: asyncio.to_thread(self.market_agent.analyze_market))
+
+    async def report(self, body: Dict) -> Dict:
+        profile = parse_profile(body)
+        fmt = body.get("format", "markdown")
+        if fmt not in REPORT_FORMATS:
+            raise ApiError(400, f"format must be one of {', '.join(REPORT_FORMATS)}")
+        key = portfolio_key(profile["age"], profile["risk_tolerance"], profile["monthly_investment"], "report", fmt)
+
+        async def compute():
+            analysis = await self.market_analysis()
+            result, traces = await self._in_pool(_report_task, profile, analysis, fmt, tracer.enabled)
+            # Stages ran in a worker; record them here so /metrics shows them
+            for trace in traces:
+                tracer.record(trace)
+            return result
+
+        return await self._coalesced(key, compute)
+
+    async def batch(self, body: Dict) -> Dict:
+        items = body.get("requests")
+        if not isinstance(items, list) or not 0 < len(items) <= MAX_BATCH:
+            raise ApiError(400, f"requests must be a list of 1-{MAX_BATCH} items")
+        self.metrics["batch_items"] += len(items)
+
+        async def answer(item) -> Dict:
+            handler = self.routes.get(("POST", f"/{item.get('endpoint')}")) if isinstance(item, dict) else None
+            if handler is None or handler == self.batch:
+                return {"status": 400, "error": "each item needs an endpoint: allocation, projection, plan or report"}
+            status, payload = await self._dispatch(handler, item)
+            return {"status": status, **({"result": payload} if status == 200 else payload)}
+
+        return {"responses": await asyncio.gather(*(answer(item) for item in items))}
+
+    async def _dispatch(self, handler, body: Dict) -> Tuple[int, Dict]:
+        try:
+            return 200, await handler(body)
+        except ApiError as e:
+            return e.status, {"error": str(e)}
+        except Exception as e:
+            return 500, {"error": f"{type(e).__name__}: {e}"}
+
+    async def __call__(self, scope, receive, send):
+        if not self._exported:
+            # On first use rather than in __init__: the module-level ``app`` is built
+            # on import even when another instance is the one being served
+            self._exported = True
+            tracer.metrics.register_collector(_api_gauges(self))
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+        self.metrics["requests"] += 1
+        start = time.perf_counter()
+        path = scope["path"]
+        handler = self.routes.get((scope["method"], path))
+        if handler is None:
+            status, payload = 404, {"error": f"no route for {scope['method']} {path}"}
+        else:
+            try:
+                body = await _read_json(receive)
+            except ApiError as e:
+                status, payload = e.status, {"error": str(e)}
+            else:
+                status, payload = await self._dispatch(handler, body)
+        if status != 200:
+            self.metrics["errors"] += 1
+        if status == 200 and handler == self.stats and _wants_prometheus(scope):
+            await _send(send, status, tracer.metrics.to_prometheus().encode(), PROMETHEUS_TYPE)
+        else:
+            await _send_json(send, status, payload)
+        # Spans nest per thread, so interleaved requests are timed directly instead
+        if tracer.enabled and handler is not None:
+            tracer.metrics.observe(f"{PREFIX}_api_request_seconds", time.perf_counter() - start, path=path)
+            tracer.count("api_responses_total", path=path, status=status)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    await self.startup()
+                except Exception as e:
+                    await send({"type": "lifespan.startup.failed", "message": str(e)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.shutdown()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+async def _read_json(receive) -> Dict:
+    chunks = []
+    size = 0
+    while True:
+        message = await receive()
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if size > MAX_BODY:
+            raise ApiError(413, f"request body over {MAX_BODY} bytes")
+        chunks.append(chunk)
+        if not message.get("more_body"):
+            break
+    if not size:
+        return {}
+    try:
+        body = json.loads(b"".join(chunks))
+    except ValueError as e:
+        raise ApiError(400, f"invalid JSON: {e}")
+    if not isinstance(body, dict):
+        raise ApiError(400, "request body must be a JSON object")
+    return body
+
+
+def _api_gauges(api: PortfolioAPI):
+    # A weak reference, so the registry does not keep a discarded app alive
+    ref = weakref.ref(api)
+
+    def gauges():
+        live = ref()
+        for name, value in (live.counters() if live is not None else {}).items():
+            yield "all_weather_api", {"stat": name}, value
+
+    return gauges
+
+
+def _wants_prometheus(scope) -> bool:
+    """``?format=prometheus``, or an Accept header naming text/plain but not JSON (as Prometheus sends)"""
+    query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    if "format" in query:
+        return query["format"][-1] == "prometheus"
+    accept = dict(scope.get("headers", [])).get(b"accept", b"").decode("latin-1")
+    return "text/plain" in accept and "application/json" not in accept
+
+
+async def _send_json(send, status: int, payload: Dict):
+    await _send(send, status, json.dumps(payload, default=float).encode(), b"application/json")
+
+
+async def _send(send, status: int, body: bytes, content_type: bytes):
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", content_type), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+app = PortfolioAPI()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Serve the All-Weather portfolio JSON API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=None, help="process-pool size for projections and reports")
+    parser.add_argument("--data-dir", default=None, help="local price store directory")
+    parser.add_argument("--fixtures", default=None, help="offline CSV price fixtures to refill the store from")
+    parser.add_argument("--offline", action="store_true", help="never refill the price store from the network")
+    args = parser.parse_args(argv)
+
+    import uvicorn
+    from agents.market_data import CSVFixtureSource, PriceStore, YFinanceSource
+    from agents.portfolio_agents import MarketAnalysisAgent
+
+    if args.fixtures:
+        source = CSVFixtureSource(args.fixtures)
+    else:
+        source = None if args.offline else YFinanceSource()
+    store = PriceStore(args.data_dir, source=source) if args.data_dir else PriceStore(source=source)
+    api = PortfolioAPI(workers=args.workers, market_agent=MarketAnalysisAgent(price_store=store))
+    uvicorn.run(api, host=args.host, port=args.port, log_level="warning")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,84 +1,60 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import altair as alt
 
-def all_weather_portfolio_strategy(age, risk_tolerance, monthly_investment):
-    """
-    Comprehensive All-Weather Portfolio Strategy
-    """
-    # Detailed asset allocation based on Ray Dalio's principles
-    base_allocation = {
-        "US Stocks": 15,            # Domestic large-cap equities
-        "International Stocks": 10, # Global market exposure
-        "Long-Term US Treasuries": 40,  # Protection during economic downturns
-        "Intermediate-Term Treasuries": 15,  # Balanced fixed income
-        "Treasury Inflation-Protected Securities (TIPS)": 7.5,  # Inflation protection
-        "Gold": 7.5,                # Ultimate hedge against uncertainty
-        "Commodities": 5            # Inflation and economic cycle hedge
-    }
-    
-    # Risk and age adjustment factors
-    risk_multipliers = {
-        "Low": 0.8,
-        "Moderate": 1.0,
-        "High": 1.2
-    }
-    
-    # Age-based risk reduction
-    age_risk_factor = max(0.5, (100 - age) / 100)
-    
-    # Adjust allocation based on risk tolerance and age
-    adjusted_allocation = {
-        asset: round(weight * risk_multipliers.get(risk_tolerance, 1.0) * age_risk_factor, 1)
-        for asset, weight in base_allocation.items()
-    }
-    
-    # Normalize to ensure 100%
-    total = sum(adjusted_allocation.values())
-    normalized_allocation = {
-        asset: round((weight / total) * 100, 1)
-        for asset, weight in adjusted_allocation.items()
-    }
-    
-    # Projected growth calculations
-    def calculate_growth(rate):
-        return [
-            round(monthly_investment * 12 * years * (1 + rate)**years, 2)
-            for years in [10, 20, 30]
-        ]
-    
+from utils.allocation import all_weather_portfolio_strategy
+from utils.lazy import lazy_import
+from utils.result_cache import get_shared_cache, portfolio_key
+
+# Heavy dependencies load on first use, not at worker startup
+pd = lazy_import("pandas")
+charts = lazy_import("utils.charts")
+goals = lazy_import("utils.goals")
+projections = lazy_import("utils.projections")
+regimes = lazy_import("utils.regimes")
+risk_parity = lazy_import("utils.risk_parity")
+
+# Shared by every session in this worker and persisted across restarts
+RESULT_CACHE = get_shared_cache()
+# Part of the cache key; bump when build_portfolio_view's output changes shape
+VIEW_VERSION = 3
+
+ASSET_DETAILS = {
+    "US Stocks": "Domestic large-cap equities providing growth potential",
+    "International Stocks": "Global market exposure for broader economic participation",
+    "Long-Term US Treasuries": "Safe-haven assets that perform well during economic downturns",
+    "Intermediate-Term Treasuries": "Balanced fixed income with moderate interest rate sensitivity",
+    "Treasury Inflation-Protected Securities (TIPS)": "Protects against inflation by adjusting principal with CPI",
+    "Gold": "Ultimate hedge against economic uncertainty and currency devaluation",
+    "Commodities": "Natural hedge against inflation and economic cycle variations"
+}
+
+def build_portfolio_view(age, risk_tolerance, monthly_investment, weighting):
+    """Allocation, table rows, projection, regime statistics and goal table for one request"""
+    base_allocation = risk_parity.assumption_allocation() if weighting == "Risk Parity" else None
+    result = all_weather_portfolio_strategy(age, risk_tolerance, monthly_investment, base_allocation)
     return {
-        "allocation": normalized_allocation,
-        "investment_projections": {
-            "conservative_6%": calculate_growth(0.06),
-            "expected_8%": calculate_growth(0.08)
-        },
-        "economic_scenarios": [
-            {
-                "name": "Rising Growth & Rising Inflation",
-                "description": "Economy expanding, prices increasing",
-                "best_performers": ["Commodities", "Stocks", "TIPS"]
-            },
-            {
-                "name": "Rising Growth & Falling Inflation",
-                "description": "Economic expansion with stable prices",
-                "best_performers": ["Stocks", "Intermediate Bonds"]
-            },
+        "result": result,
+        "allocation_rows": [
             {
-                "name": "Falling Growth & Rising Inflation",
-                "description": "Economic slowdown with increasing prices",
-                "best_performers": ["Gold", "TIPS", "Commodities"]
-            },
-            {
-                "name": "Falling Growth & Falling Inflation",
-                "description": "Economic contraction with decreasing prices",
-                "best_performers": ["Long-Term Treasuries"]
+                "Asset": asset,
+                "Allocation": weight,
+                # Calculate monthly investment for each asset class
+                "Monthly Investment": f"${monthly_investment * (weight/100):.2f}",
+                "Description": ASSET_DETAILS.get(asset)
             }
-        ]
+            for asset, weight in result['allocation'].items()
+        ],
+        "projection": projections.monte_carlo_projection(result['allocation'], monthly_investment),
+        "regimes": regimes.simulate_regimes(result['allocation'])['regimes'],
+        "goals": goals.goal_table(result['allocation'])
     }
 
+def cached_portfolio_view(age, risk_tolerance, monthly_investment, weighting):
+    """``build_portfolio_view`` served from the shared result cache; treat the result as read-only"""
+    key = portfolio_key(age, risk_tolerance, monthly_investment, weighting, VIEW_VERSION)
+    return RESULT_CACHE.get_or_compute(
+        key, lambda: build_portfolio_view(age, risk_tolerance, monthly_investment, weighting)
+    )
+
 def add_resources_section():
     st.header("📚 All-Weather Portfolio Resources")
     
@@ -235,11 +211,22 @@ def main():
             ["Low", "Moderate", "High"], 
             index=1
         )
+        weighting = st.selectbox(
+            "Base Weights",
+            ["Classic All-Weather", "Risk Parity"],
+            index=0
+        )
     
     # Generate Portfolio Button
     if st.button("Generate All-Weather Portfolio"):
         with st.spinner("Crafting your resilient portfolio..."):
-            result = all_weather_portfolio_strategy(age, risk_tolerance, monthly_investment)
+            view = cached_portfolio_view(age, risk_tolerance, monthly_investment, weighting)
+            result = view['result']
+            cache_stats = RESULT_CACHE.stats()
+            st.sidebar.caption(
+                f"Result cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, "
+                f"{cache_stats['entries']} entries"
+            )
             
             # Create tabs
             tab1, tab2 = st.tabs(["Portfolio Details", "Learning Resources"])
@@ -247,78 +234,58 @@ def main():
             with tab1:
                 # Portfolio Allocation Section
                 st.header("🏦 Detailed Portfolio Allocation")
-                allocation_df = pd.DataFrame.from_dict(
-                    result['allocation'], 
-                    orient='index', 
-                    columns=['Allocation']
-                ).reset_index()
-                allocation_df.columns = ['Asset', 'Allocation']
-                
-                # Pie Chart
-                fig, ax = plt.subplots(figsize=(10, 6))
-                ax.pie(
-                    allocation_df['Allocation'], 
-                    labels=allocation_df['Asset'], 
-                    autopct='%1.1f%%'
+                # Reorder columns for better readability
+                allocation_df = pd.DataFrame(
+                    view['allocation_rows'],
+                    columns=['Asset', 'Allocation', 'Monthly Investment', 'Description']
                 )
-                ax.set_title("Asset Class Distribution", fontsize=16)
-                st.pyplot(fig)
                 
-                # Detailed Allocation Table with Explanations
-                # Replace the existing detailed allocation section with this code:
-
+                # Pie Chart (Vega-Lite spec, cached by allocation and drawn in the browser)
+                st.vega_lite_chart(charts.allocation_pie_spec(result['allocation']), use_container_width=True)
+                
                 # Detailed Allocation Table with Explanations
                 st.subheader("🔍 Asset Class Breakdown")
-                asset_details = {
-                    "US Stocks": "Domestic large-cap equities providing growth potential",
-                    "International Stocks": "Global market exposure for broader economic participation",
-                    "Long-Term US Treasuries": "Safe-haven assets that perform well during economic downturns",
-                    "Intermediate-Term Treasuries": "Balanced fixed income with moderate interest rate sensitivity",
-                    "Treasury Inflation-Protected Securities (TIPS)": "Protects against inflation by adjusting principal with CPI",
-                    "Gold": "Ultimate hedge against economic uncertainty and currency devaluation",
-                    "Commodities": "Natural hedge against inflation and economic cycle variations"
-                }
-                
-                detailed_allocation = allocation_df.copy()
-                detailed_allocation['Description'] = detailed_allocation['Asset'].map(asset_details)
-                
-                # Calculate monthly investment for each asset class
-                detailed_allocation['Monthly Investment'] = detailed_allocation['Allocation'].apply(
-                    lambda x: f"${monthly_investment * (x/100):.2f}"
-                )
-                
-                # Reorder columns for better readability
-                detailed_allocation = detailed_allocation[['Asset', 'Allocation', 'Monthly Investment', 'Description']]
                 
                 # Display the dataframe
-                st.dataframe(detailed_allocation)
+                st.dataframe(allocation_df)
                 
                 # Economic Scenarios Section
                 st.header("🌍 Economic Scenario Analysis")
-                for scenario in result['economic_scenarios']:
-                    st.markdown(f"""
-                    ### {scenario['name']}
-                    **Description**: {scenario['description']}
-                    **Best Performing Assets**: {', '.join(scenario['best_performers'])}
-                    """)
+                st.caption(
+                    "Simulated monthly regime switches over 10 years. Returns and volatility are annualized "
+                    "over the months spent in each regime; worst drawdown is the 5th percentile of the "
+                    "deepest loss within a single spell of that regime."
+                )
+                scenario_df = pd.DataFrame([
+                    {
+                        "Regime": scenario['name'],
+                        "Time in Regime": f"{scenario['time_share']:.0%}",
+                        "Expected Return": f"{scenario['expected_return']:.2%}",
+                        "Volatility": f"{scenario['volatility']:.2%}",
+                        "Worst Drawdown": f"{scenario['worst_drawdown']:.2%}",
+                        "Best Performing Assets": ", ".join(scenario['best_performers'])
+                    }
+                    for scenario in view['regimes']
+                ])
+                st.dataframe(scenario_df, hide_index=True)
                 
                 # Investment Projections
                 st.header("📈 Long-Term Investment Projection")
-                projection_df = pd.DataFrame({
-                    'Duration': ['10 Years', '20 Years', '30 Years'],
-                    'Conservative (6%)': result['investment_projections']['conservative_6%'],
-                    'Expected (8%)': result['investment_projections']['expected_8%']
-                })
+                projection = view['projection']
                 
                 # Line Chart for Projections
-                projection_chart = alt.Chart(projection_df.melt('Duration')).mark_line(point=True).encode(
-                    x='Duration:N',
-                    y='value:Q',
-                    color='variable:N',
-                    tooltip=['Duration', 'value']
-                ).properties(title='Investment Growth Projection')
+                st.vega_lite_chart(charts.projection_chart_spec(projection), use_container_width=True)
                 
-                st.altair_chart(projection_chart, use_container_width=True)
+                # Contribution Goals
+                st.subheader("🎯 Monthly Investment Needed to Reach a Goal")
+                goal_table = view['goals']
+                st.caption(f"Assumes the allocation's {goal_table['annual_rate']:.2%} expected annual return.")
+                goal_df = pd.DataFrame(
+                    [[f"${amount:,.0f}" for amount in row] for row in goal_table['monthly']],
+                    index=[f"${target:,.0f}" for target in goal_table['targets']],
+                    columns=[f"{years} Years" for years in goal_table['years']]
+                )
+                st.dataframe(goal_df)
                 
                 # Key Takeaways
                 st.header("💡 Key Investment Insights")
@@ -0,0 +1,53 @@
+"""
+Throughput benchmark for the vectorized batch allocation
+
+Run from the repository root:
+    python -m benchmarks.bench_batch
+"""
+import time
+
+import numpy as np
+
+from utils.allocation import RISK_MULTIPLIERS, all_weather_portfolio_strategy
+from utils.batch import all_weather_portfolio_batch, batch_to_results
+
+SIZES = [1_000, 100_000, 1_000_000]
+
+
+def make_profiles(n: int, seed: int = 0):
+    """Random client book: ages 18-100, every risk level, $100-$10k per month"""
+    rng = np.random.default_rng(seed)
+    ages = rng.integers(18, 101, size=n)
+    risks = rng.choice(np.array(list(RISK_MULTIPLIERS), dtype=object), size=n)
+    invest = rng.integers(100, 10_001, size=n)
+    return ages, risks, invest
+
+
+def check_exact(ages, risks, invest, sample: int = 2_000):
+    """Verify the batch output against the scalar function on a sample"""
+    batch = all_weather_portfolio_batch(ages[:sample], risks[:sample], invest[:sample])
+    for row, age, risk, amount in zip(batch_to_results(batch), ages, risks, invest):
+        expected = all_weather_portfolio_strategy(int(age), risk, int(amount))
+        assert row["allocation"] == expected["allocation"], (age, risk, amount)
+        assert row["investment_projections"] == expected["investment_projections"], (age, risk, amount)
+
+
+def main():
+    ages, risks, invest = make_profiles(max(SIZES))
+    check_exact(ages, risks, invest)
+
+    start = time.perf_counter()
+    for age, risk, amount in zip(ages[:SIZES[0]], risks, invest):
+        all_weather_portfolio_strategy(int(age), risk, int(amount))
+    scalar_rate = SIZES[0] / (time.perf_counter() - start)
+    print(f"{'scalar':>10} {SIZES[0]:>10,} profiles  {scalar_rate:>14,.0f} profiles/s")
+
+    for n in SIZES:
+        start = time.perf_counter()
+        all_weather_portfolio_batch(ages[:n], risks[:n], invest[:n])
+        elapsed = time.perf_counter() - start
+        print(f"{'batch':>10} {n:>10,} profiles  {n / elapsed:>14,.0f} profiles/s  ({elapsed * 1000:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
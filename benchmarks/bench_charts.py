@@ -0,0 +1,73 @@
+"""
+Per-rerun chart cost: legacy pyplot rendering vs. cached chart artifacts
+
+Simulates thousands of Streamlit reruns over a realistic mix of inputs and
+reports time per rerun and memory growth for each rendering path.
+Run from the repository root:
+    python -m benchmarks.bench_charts
+"""
+import gc
+import io
+import time
+import tracemalloc
+
+from utils import charts
+from utils.allocation import RISK_MULTIPLIERS, all_weather_portfolio_strategy
+from utils.projections import monte_carlo_projection
+
+
+def legacy_render(allocation, projection):
+    """What app.main used to do: a fresh pyplot figure per rerun, never closed"""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    plt.rcParams["figure.max_open_warning"] = 0
+    fig, ax = plt.subplots(figsize=(10, 6))
+    ax.pie(list(allocation.values()), labels=list(allocation), autopct='%1.1f%%')
+    ax.set_title("Asset Class Distribution", fontsize=16)
+    fig.savefig(io.BytesIO(), format="png")
+
+
+def cached_render(allocation, projection):
+    charts.allocation_pie_spec(allocation)
+    charts.projection_chart_spec(projection)
+
+
+def cached_png_render(allocation, projection):
+    charts.allocation_pie_png(allocation)
+    charts.projection_chart_spec(projection)
+
+
+def workload(reruns: int):
+    """Reruns cycling over a few popular profiles, like real traffic"""
+    profiles = [(age, risk) for age in (25, 35, 45, 55) for risk in RISK_MULTIPLIERS]
+    inputs = []
+    for age, risk in profiles:
+        allocation = all_weather_portfolio_strategy(age, risk, 1000)["allocation"]
+        inputs.append((allocation, monte_carlo_projection(allocation, 1000, n_paths=1000)))
+    return [inputs[i % len(inputs)] for i in range(reruns)]
+
+
+def measure(label, render, reruns):
+    requests = workload(reruns)
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    for allocation, projection in requests:
+        render(allocation, projection)
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:>22}: {reruns:>5} reruns  {elapsed / reruns * 1000:8.3f} ms/rerun  "
+          f"retained {current / 2**20:7.2f} MiB")
+
+
+def main():
+    measure("legacy pyplot", legacy_render, 200)
+    measure("cached Vega-Lite", cached_render, 5_000)
+    measure("cached PNG", cached_png_render, 5_000)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Columnar export of strategy results versus JSON lines
+
+Streams 1,000,000 batch-strategy results in 100,000-row batches. They go to
+Parquet and to Arrow files, both partitioned by risk tolerance. For each
+format the benchmark reports build and write throughput, size on disk, and
+the time to read every allocation back. The same for the first batch
+written as JSONL through ``batch_to_results`` shows the per-row cost the
+export avoids. Rows read back from each format are checked against
+``all_weather_portfolio_strategy``.
+Run from the repository root:
+    python -m benchmarks.bench_export
+"""
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+import pyarrow.compute as pc
+
+from utils.allocation import ASSETS, RISK_MULTIPLIERS, all_weather_portfolio_strategy
+from utils.batch import all_weather_portfolio_batch, batch_to_results
+from utils.export import ResultWriter, memory_map_table, open_dataset, part_files, strategy_record_batch
+
+ROWS = 1_000_000
+BATCH_ROWS = 100_000
+
+
+def profile_batch(index: int, rng: np.random.Generator):
+    ages = rng.integers(18, 101, BATCH_ROWS)
+    risks = np.array(list(RISK_MULTIPLIERS), dtype=object)[rng.integers(0, len(RISK_MULTIPLIERS), BATCH_ROWS)]
+    amounts = rng.choice([250.0, 500.0, 1000.0, 2500.0, 5000.0], BATCH_ROWS)
+    return ages, risks, amounts
+
+
+def disk_bytes(root: str) -> int:
+    return sum(os.path.getsize(os.path.join(d, n)) for d, _, names in os.walk(root) for n in names)
+
+
+def main():
+    rng = np.random.default_rng(0)
+    inputs = [profile_batch(i, rng) for i in range(ROWS // BATCH_ROWS)]
+    start = time.perf_counter()
+    batches = [all_weather_portfolio_batch(*profile) for profile in inputs]
+    print(f"strategy batch for {ROWS:,} profiles: {time.perf_counter() - start:.2f} s")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        with open(f"{tmp}/results.jsonl", "w") as out:
+            for result in batch_to_results(batches[0]):
+                out.write(json.dumps(result) + "\n")
+        jsonl_write = (time.perf_counter() - start) / BATCH_ROWS
+        start = time.perf_counter()
+        with open(f"{tmp}/results.jsonl") as handle:
+            allocations = np.array([list(json.loads(line)["allocation"].values()) for line in handle])
+        jsonl_read = (time.perf_counter() - start) / BATCH_ROWS
+        print(f"{'jsonl':<8} write {jsonl_write * 1e6:6.2f} us/row  read {jsonl_read * 1e6:6.2f} us/row  "
+              f"{os.path.getsize(f'{tmp}/results.jsonl') / BATCH_ROWS:6.1f} B/row  (first batch only)")
+
+        for fmt in ("parquet", "arrow"):
+            root = f"{tmp}/{fmt}"
+            start = time.perf_counter()
+            with ResultWriter(root, partition_by=["risk_tolerance"], fmt=fmt) as writer:
+                for profile, batch in zip(inputs, batches):
+                    writer.write(strategy_record_batch(*profile, batch=batch))
+            write = (time.perf_counter() - start) / ROWS
+
+            start = time.perf_counter()
+            if fmt == "arrow":
+                tables = [memory_map_table(path) for path in part_files(root, fmt)]
+                total = sum(pc.sum(pc.struct_field(t["allocation"], "US Stocks")).as_py() for t in tables)
+            else:
+                table = open_dataset(root, fmt).to_table(columns=["allocation"])
+                total = pc.sum(pc.struct_field(table["allocation"], "US Stocks")).as_py()
+            read = (time.perf_counter() - start) / ROWS
+            expected = sum(batch["allocation"][:, 0].sum() for batch in batches)
+            assert abs(total - expected) < 1e-6 * expected
+            print(f"{fmt:<8} write {write * 1e6:6.2f} us/row  read {read * 1e6:6.2f} us/row  "
+                  f"{disk_bytes(root) / ROWS:6.1f} B/row")
+
+            rows = open_dataset(root, fmt).head(200).to_pylist()
+            for row in rows:
+                reference = all_weather_portfolio_strategy(row["age"], row["risk_tolerance"], row["monthly_investment"])
+                assert row["allocation"] == reference["allocation"]
+                assert row["investment_projections"] == reference["investment_projections"]
+                assert list(row["allocation"]) == ASSETS
+        assert allocations.shape == (BATCH_ROWS, len(ASSETS))
+        print("rows read back from each format match all_weather_portfolio_strategy")
+
+
+if __name__ == "__main__":
+    main()
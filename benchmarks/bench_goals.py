@@ -0,0 +1,49 @@
+"""
+Goal-solver throughput and round-trip accuracy
+
+Solves the required monthly investment for a grid of targets x horizons in
+one call, and compares the time with a scalar loop. It then checks that
+projecting the solved contributions forward lands back on the targets, and
+that the array and scalar annuity formulas agree.
+Run from the repository root:
+    python -m benchmarks.bench_goals
+"""
+import time
+
+import numpy as np
+
+from utils.allocation import annuity_factor
+from utils.goals import future_values, required_monthly_investment
+
+TARGETS = np.linspace(10_000, 5_000_000, 1_000)
+YEARS = np.arange(1, 51)
+RATE = 0.06
+INITIAL = 25_000.0
+
+
+def scalar_required(target, years, rate, initial):
+    shortfall = target - initial * (1 + rate) ** years
+    return max(shortfall, 0.0) / annuity_factor(rate, years)
+
+
+def main():
+    cells = TARGETS.size * YEARS.size
+    start = time.perf_counter()
+    monthly = required_monthly_investment(TARGETS[:, None], YEARS[None, :], RATE, INITIAL)
+    vectorized = time.perf_counter() - start
+
+    start = time.perf_counter()
+    expected = [[scalar_required(t, y, RATE, INITIAL) for y in YEARS.tolist()] for t in TARGETS.tolist()]
+    scalar = time.perf_counter() - start
+    print(f"{cells:,} goals  vectorized {vectorized * 1e3:7.2f} ms  scalar loop {scalar * 1e3:8.2f} ms  "
+          f"({scalar / vectorized:,.0f}x)")
+
+    np.testing.assert_allclose(monthly, expected, rtol=1e-10)
+    projected = future_values(monthly, RATE, YEARS[None, :], INITIAL)
+    reachable = monthly > 0
+    error = np.abs(projected - TARGETS[:, None])[reachable].max()
+    print(f"max round-trip error {error:.2e} dollars; {(~reachable).sum()} goals met by the initial balance alone")
+
+
+if __name__ == "__main__":
+    main()
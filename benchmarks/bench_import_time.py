@@ -0,0 +1,116 @@
+"""
+Startup cost report built from ``python -X importtime``
+
+Imports each entry module in a fresh interpreter, reports its cumulative
+import time and heaviest dependencies, and fails when a dependency that is
+meant to load lazily shows up at import time or when startup regresses
+against a saved baseline.
+
+Run from the repository root:
+    python -m benchmarks.bench_import_time
+    python -m benchmarks.bench_import_time --save-baseline benchmarks/import_time.json
+    python -m benchmarks.bench_import_time --baseline benchmarks/import_time.json
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TARGETS = ["app", "agents.portfolio_agents"]
+
+# Packages that must only load on first use
+DEFERRED = ["pandas", "numpy", "matplotlib", "altair", "transformers", "langchain_community", "yfinance"]
+
+LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s+)(\S+)")
+
+
+def measure(target: str) -> List[Tuple[str, int, int, int]]:
+    """(module, self us, cumulative us, depth) for every import made by ``import target``"""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=REPO_ROOT, capture_output=True, text=True,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"import {target} failed:\n{completed.stderr[-2000:]}")
+    rows = []
+    for line in completed.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            own, cumulative, indent, module = match.groups()
+            rows.append((module, int(own), int(cumulative), (len(indent) - 1) // 2))
+    return rows
+
+
+def target_subtree(rows: List[Tuple[str, int, int, int]], target: str) -> List[Tuple[str, int, int, int]]:
+    """
+    The target's own row and the imports it made
+
+    ``-X importtime`` logs a module after its children. They are the
+    contiguous deeper rows just before its depth-0 line. Earlier rows belong
+    to interpreter startup.
+    """
+    end = next(i for i, (m, _, _, d) in enumerate(rows) if m == target and d == 0)
+    start = end
+    while start > 0 and rows[start - 1][3] > 0:
+        start -= 1
+    return rows[start:end + 1]
+
+
+def report(target: str, repeats: int, top: int) -> Dict:
+    runs = [measure(target) for _ in range(repeats)]
+    # Keep the fastest run; import time noise is one-sided
+    best = min(runs, key=lambda rows: next(c for m, _, c, d in rows if m == target and d == 0))
+    total = next(c for m, _, c, d in best if m == target and d == 0)
+    subtree = target_subtree(best, target)
+    modules = {m for m, _, _, _ in subtree}
+    leaked = sorted(p for p in DEFERRED if p in modules)
+    heaviest = sorted(
+        ((m, c) for m, _, c, d in subtree if d == 1), key=lambda item: -item[1]
+    )[:top]
+
+    print(f"import {target}: {total / 1000:.1f} ms cumulative, {len(subtree)} modules")
+    for module, cumulative in heaviest:
+        print(f"    {cumulative / 1000:8.1f} ms  {module}")
+    if leaked:
+        print(f"    eagerly imported: {', '.join(leaked)}")
+    return {"total_us": total, "modules": len(best), "leaked": leaked}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8)
+    parser.add_argument("--baseline", help="compare against a saved baseline JSON")
+    parser.add_argument("--save-baseline", help="write the measurements to this JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown vs. baseline")
+    args = parser.parse_args(argv)
+
+    results = {target: report(target, args.repeats, args.top) for target in TARGETS}
+    failed = any(result["leaked"] for result in results.values())
+
+    if args.baseline:
+        with open(args.baseline) as handle:
+            baseline = json.load(handle)
+        for target, result in results.items():
+            if target not in baseline:
+                continue
+            limit = baseline[target]["total_us"] * (1 + args.tolerance)
+            ratio = result["total_us"] / baseline[target]["total_us"]
+            status = "REGRESSION" if result["total_us"] > limit else "ok"
+            failed |= status != "ok"
+            print(f"{target}: {ratio:.2f}x baseline {status}")
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as handle:
+            json.dump(results, handle, indent=2)
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""
+Per-tick cost of the incremental indicator engine vs. full recomputation
+
+For a growing number of tickers, replays a history and times one new bar:
+recomputing every window from the full history (what analyze_market used to
+do for SPY) against ``IndicatorEngine.update``. Also checks the incremental
+figures against the recomputed ones and times a snapshot round-trip.
+Run from the repository root:
+    python -m benchmarks.bench_indicators
+"""
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from utils.indicators import DEFAULT_WINDOWS, TRADING_DAYS, IndicatorEngine
+
+HISTORY = 2_000
+TICKS = 200
+
+
+def recompute(prices: np.ndarray):
+    """Every window from scratch, vectorized across tickers"""
+    returns = np.diff(np.log(prices), axis=0)
+    out = {}
+    for name, size in DEFAULT_WINDOWS.items():
+        closes = prices[-size:]
+        out[name] = (
+            returns[-size:].std(axis=0, ddof=1) * np.sqrt(TRADING_DAYS) * 100,
+            closes.mean(axis=0),
+            (prices[-1] / closes.max(axis=0) - 1) * 100,
+        )
+    return out
+
+
+def check(engine: IndicatorEngine, prices: np.ndarray):
+    expected = recompute(prices)
+    for column, ticker in enumerate(engine.tickers[:20]):
+        got = engine.indicators(ticker)
+        for name, (volatility, average, drawdown) in expected.items():
+            assert np.isclose(got[name]["volatility"], volatility[column], rtol=1e-9), (ticker, name)
+            assert np.isclose(got[name]["moving_average"], average[column], rtol=1e-12), (ticker, name)
+            assert np.isclose(got[name]["drawdown"], drawdown[column], rtol=1e-9, atol=1e-12), (ticker, name)
+
+
+def main():
+    print(f"{'tickers':>8} {'recompute/tick':>15} {'incremental/tick':>17} {'per ticker':>11} {'snapshot':>10}")
+    for n in (6, 100, 1_000):
+        rng = np.random.default_rng(n)
+        prices = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.01, size=(HISTORY + TICKS, n)), axis=0))
+        engine = IndicatorEngine([f"T{i}" for i in range(n)])
+        for row in prices[:HISTORY]:
+            engine.update(row)
+
+        start = time.perf_counter()
+        for t in range(HISTORY, HISTORY + TICKS):
+            recompute(prices[: t + 1])
+        full = (time.perf_counter() - start) / TICKS
+
+        start = time.perf_counter()
+        for row in prices[HISTORY:]:
+            engine.update(row)
+        incremental = (time.perf_counter() - start) / TICKS
+        check(engine, prices)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "indicators.npz")
+            start = time.perf_counter()
+            engine.save(path)
+            IndicatorEngine.load(path)
+            snapshot = time.perf_counter() - start
+
+        print(f"{n:>8} {full * 1e3:>12.3f} ms {incremental * 1e3:>14.3f} ms "
+              f"{incremental / n * 1e6:>8.2f} µs {snapshot * 1e3:>7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
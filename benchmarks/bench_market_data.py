@@ -0,0 +1,53 @@
+"""
+Read latency benchmark for the local price store
+
+Builds an offline CSV fixture with a year of synthetic daily bars for the
+recommended ETFs, loads it into a temporary store and times reads.
+Run from the repository root:
+    python -m benchmarks.bench_market_data
+"""
+import tempfile
+import time
+
+import numpy as np
+
+from agents.market_data import MARKET_TICKER, RECOMMENDED_TICKERS, CSVFixtureSource, PriceStore, write_fixture
+
+TICKERS = RECOMMENDED_TICKERS + [MARKET_TICKER]
+
+
+def synthetic_bars(days: int = 365, seed: int = 0):
+    """Business-day dates and a geometric random walk of closes"""
+    rng = np.random.default_rng(seed)
+    end = np.datetime64("today", "D")
+    dates = np.arange(end - np.timedelta64(days, "D"), end, dtype="datetime64[D]")
+    dates = dates[np.is_busday(dates)]
+    closes = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.01, size=len(dates))))
+    return dates, closes
+
+
+def main(repeats: int = 200):
+    with tempfile.TemporaryDirectory() as tmp:
+        for seed, ticker in enumerate(TICKERS):
+            write_fixture(f"{tmp}/fixtures", ticker, *synthetic_bars(seed=seed))
+        store = PriceStore(f"{tmp}/store", source=CSVFixtureSource(f"{tmp}/fixtures"))
+
+        start = time.perf_counter()
+        for ticker in TICKERS:
+            store.refresh(ticker)
+        print(f"initial fill from fixture  {(time.perf_counter() - start) * 1000:8.2f} ms")
+
+        cold = PriceStore(f"{tmp}/store", source=store.source)
+        start = time.perf_counter()
+        bars = cold.history_many(TICKERS, lookback_days=365)
+        print(f"cold read, {len(TICKERS)} tickers      {(time.perf_counter() - start) * 1000:8.2f} ms "
+              f"({sum(len(d) for d, _ in bars.values())} bars)")
+
+        start = time.perf_counter()
+        for _ in range(repeats):
+            cold.history_many(TICKERS, lookback_days=365)
+        print(f"warm read, {len(TICKERS)} tickers      {(time.perf_counter() - start) / repeats * 1000:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
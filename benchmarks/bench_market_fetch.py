@@ -0,0 +1,100 @@
+"""
+Cold vs. warm latency of the concurrent market-data fetcher
+
+Serves synthetic CSV bars for every ticker from a local stand-in HTTP server
+that adds a fixed delay per request, then times:
+
+- cold: empty store, every ticker fetched (sequential vs. concurrent)
+- warm: fresh store, answered from disk
+- stale: expired store, answered from disk while refills run behind it
+- coalescing: many concurrent requests for one ticker, one refill
+- timeout: a server slower than the fetch timeout
+
+Run from the repository root:
+    python -m benchmarks.bench_market_fetch
+"""
+import asyncio
+import functools
+import http.server
+import tempfile
+import threading
+import time
+
+from agents.market_data import ALL_TICKERS, HTTPCSVSource, PriceStore, write_fixture
+from agents.market_fetcher import MarketDataFetcher
+from benchmarks.bench_market_data import synthetic_bars
+
+DELAY = 0.2  # seconds the stand-in server waits before answering
+
+
+class SlowHandler(http.server.SimpleHTTPRequestHandler):
+    delay = DELAY
+
+    def do_GET(self):
+        time.sleep(self.delay)
+        super().do_GET()
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(directory: str, delay: float):
+    handler = type("Handler", (SlowHandler,), {"delay": delay})
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(handler, directory=directory))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def timed(label: str, call):
+    start = time.perf_counter()
+    result = call()
+    print(f"{label:<34} {(time.perf_counter() - start) * 1000:9.2f} ms")
+    return result
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        for seed, ticker in enumerate(ALL_TICKERS):
+            write_fixture(f"{tmp}/fixtures", ticker, *synthetic_bars(seed=seed))
+        server, url = serve(f"{tmp}/fixtures", DELAY)
+        print(f"stand-in server at {url}, {DELAY * 1000:.0f} ms per request, {len(ALL_TICKERS)} tickers")
+
+        sequential = PriceStore(f"{tmp}/sequential", source=HTTPCSVSource(url))
+        timed("cold, sequential store.history", lambda: sequential.history_many(ALL_TICKERS))
+
+        store = PriceStore(f"{tmp}/store", source=HTTPCSVSource(url))
+        fetcher = MarketDataFetcher(store, timeout=5.0)
+        bars = timed("cold, concurrent fetch_all", fetcher.fetch_all)
+        assert all(len(closes) for _, closes in bars.values())
+        timed("warm (fresh store)", fetcher.fetch_all)
+
+        store.refresh_interval = 0  # every ticker is now stale
+        timed("stale-while-revalidate", fetcher.fetch_all)
+        timed("  background refills finish", fetcher.wait)
+        store.refresh_interval = 3600
+
+        coalesce_store = PriceStore(f"{tmp}/coalesce", source=HTTPCSVSource(url))
+        coalescing = MarketDataFetcher(coalesce_store)
+
+        async def burst():
+            await asyncio.gather(*(coalescing.fetch("SPY") for _ in range(100)))
+
+        timed("100 concurrent cold SPY requests", lambda: asyncio.run(burst()))
+        print(f"{'  refills issued':<34} {coalescing.stats()['refills']:9d}")
+
+        server.shutdown()
+        slow_server, slow_url = serve(f"{tmp}/fixtures", delay=2.0)
+        slow = MarketDataFetcher(PriceStore(f"{tmp}/slow", source=HTTPCSVSource(slow_url)), timeout=0.25)
+        bars = timed("cold, server slower than timeout", slow.fetch_all)
+        stats = slow.stats()
+        print(f"{'  tickers timed out':<34} {stats['timeouts']:9d}  (empty: "
+              f"{sum(not len(closes) for _, closes in bars.values())})")
+        slow.wait()
+        timed("  after late refills landed", slow.fetch_all)
+        slow_server.shutdown()
+        for each in (fetcher, coalescing, slow):
+            each.close()
+
+
+if __name__ == "__main__":
+    main()
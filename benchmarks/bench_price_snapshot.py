@@ -0,0 +1,119 @@
+"""
+Worker memory and startup with a shared price snapshot
+
+Fills a temporary store with 30 years of daily bars for 200 tickers. It
+then starts 1, 4 and 8 spawned worker processes that each need the full
+aligned price and return matrix. In one mode every worker builds its own
+copy with ``PriceStore.price_matrix``. In the other it maps the published
+snapshot. Each worker reads every value, then reports its startup time, its
+resident memory and its proportional share (PSS, which splits shared pages
+between the processes mapping them). Both are measured above the
+interpreter's own baseline. Finally, the allocation sweep replays the
+snapshot's history in pool workers that each map it. Linux only, since it
+reads /proc/self/smaps_rollup.
+Run from the repository root:
+    python -m benchmarks.bench_price_snapshot
+"""
+import multiprocessing
+import tempfile
+import time
+
+import numpy as np
+
+from agents.market_data import PriceStore
+from agents.price_snapshot import PriceSnapshot, publish_snapshot, snapshot_root
+from utils.sweep import ASSET_TICKERS, perturb_weights, snapshot_monthly_returns, sweep
+
+TICKERS = list(ASSET_TICKERS.values()) + [f"T{i:03d}" for i in range(200 - len(ASSET_TICKERS))]
+YEARS = 30
+
+
+def memory_kb():
+    fields = {}
+    with open("/proc/self/smaps_rollup") as handle:
+        for line in handle:
+            parts = line.split()
+            if parts[0] in ("Rss:", "Pss:"):
+                fields[parts[0][:-1]] = int(parts[1])
+    return fields["Rss"], fields["Pss"]
+
+
+def worker(mode, store_root, ready, go, results):
+    base_rss, base_pss = memory_kb()
+    start = time.perf_counter()
+    if mode == "copy":
+        _, closes = PriceStore(store_root).price_matrix(TICKERS)
+        returns = closes[1:] / closes[:-1] - 1
+    else:
+        snapshot = PriceSnapshot.open(snapshot_root(PriceStore(store_root)))
+        closes, returns = snapshot.closes, snapshot.returns
+    checksum = float(closes.sum() + returns.sum())
+    startup = time.perf_counter() - start
+    ready.put(None)
+    go.wait()  # measure only once every worker holds its data, so shared pages are split
+    rss, pss = memory_kb()
+    results.put((startup, rss - base_rss, pss - base_pss, checksum))
+    go.wait()
+
+
+def run(mode, store_root, workers):
+    context = multiprocessing.get_context("spawn")
+    ready, results = context.Queue(), context.Queue()
+    go = context.Barrier(workers + 1)
+    processes = [context.Process(target=worker, args=(mode, store_root, ready, go, results)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    for _ in processes:
+        ready.get()
+    go.wait()
+    stats = [results.get() for _ in processes]
+    go.wait()
+    for process in processes:
+        process.join()
+    startup, rss, pss, checksums = (np.array(column) for column in zip(*stats))
+    assert np.allclose(checksums, checksums[0])
+    return startup.mean(), rss.sum() / 1024, pss.sum() / 1024, checksums[0]
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = PriceStore(f"{tmp}/store")
+        rng = np.random.default_rng(0)
+        dates = np.arange(np.datetime64("1995-01-02"), np.datetime64("1995-01-02") + YEARS * 365, dtype="datetime64[D]")
+        dates = dates[np.is_busday(dates)]
+        for ticker in TICKERS:
+            keep = rng.random(len(dates)) > 0.002  # a few missing bars per ticker, so alignment has work to do
+            store.append(ticker, dates[keep], 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.01, keep.sum()))))
+
+        start = time.perf_counter()
+        version = publish_snapshot(store, TICKERS)
+        print(f"publish v{version}: {(time.perf_counter() - start) * 1000:.0f} ms")
+        start = time.perf_counter()
+        assert publish_snapshot(store, TICKERS) == version
+        print(f"republish unchanged store: {(time.perf_counter() - start) * 1000:.2f} ms (no new version)")
+        snapshot = PriceSnapshot.open(snapshot_root(store))
+        print(f"matrix {snapshot.closes.shape[0]:,} dates x {len(snapshot.tickers)} tickers, "
+              f"{(snapshot.closes.nbytes + snapshot.returns.nbytes) / 2**20:.1f} MiB")
+        assert not snapshot.closes.flags.writeable
+
+        print(f"{'mode':<9} {'workers':>7} {'startup ms':>11} {'total RSS MiB':>14} {'total PSS MiB':>14}")
+        checksums = set()
+        for workers in (1, 4, 8):
+            for mode in ("copy", "snapshot"):
+                startup, rss, pss, checksum = run(mode, f"{tmp}/store", workers)
+                checksums.add(round(checksum, 3))
+                print(f"{mode:<9} {workers:>7} {startup * 1000:>11.1f} {rss:>14.1f} {pss:>14.1f}")
+        assert len(checksums) == 1, "snapshot and per-worker copy disagree"
+
+        base_weights = perturb_weights(20)
+        start = time.perf_counter()
+        mapped = sweep(base_weights=base_weights, snapshot_root=snapshot_root(store), workers=4)
+        elapsed = time.perf_counter() - start
+        copied = sweep(base_weights=base_weights, asset_returns=snapshot_monthly_returns(snapshot), workers=1)
+        assert np.array_equal(mapped["drawdown"], copied["drawdown"])
+        print(f"sweep over snapshot history, 4 workers: {mapped['points']:,} points, "
+              f"{len(mapped['allocations']):,} allocations in {elapsed:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
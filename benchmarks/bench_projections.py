@@ -0,0 +1,33 @@
+"""
+Timing and memory benchmark for the Monte Carlo projection engine
+
+Run from the repository root:
+    python -m benchmarks.bench_projections
+"""
+import time
+import tracemalloc
+
+from utils.allocation import all_weather_portfolio_strategy
+from utils.projections import monte_carlo_projection
+
+PATH_COUNTS = [10_000, 100_000, 1_000_000]
+
+
+def main():
+    allocation = all_weather_portfolio_strategy(35, "Moderate", 1000)["allocation"]
+    monte_carlo_projection(allocation, 1000, n_paths=1_000)  # warm-up
+
+    for n_paths in PATH_COUNTS:
+        tracemalloc.start()
+        start = time.perf_counter()
+        projection = monte_carlo_projection(allocation, 1000, n_paths=n_paths)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        median_30y = projection["percentiles"]["P50"][-1]
+        print(f"{n_paths:>10,} paths x 360 months  {elapsed * 1000:>8.1f} ms  "
+              f"peak {peak / 2**20:>6.1f} MiB  P50@30y ${median_30y:,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Throughput of the vectorized drift rebalancer
+
+Builds a book of accounts with drifted holdings in the recommended ETFs and
+targets from ``PortfolioAgent.get_allocation``, generates orders for all of
+them in one call and checks the invariants: no shorting, no negative cash,
+sells only where contributions could not restore the bands, and every account
+back in band up to one lot of rounding.
+Run from the repository root:
+    python -m benchmarks.bench_rebalance
+"""
+import time
+
+import numpy as np
+
+from agents.market_data import RECOMMENDED_TICKERS
+from agents.portfolio_agents import PortfolioAgent
+from utils.allocation import RISK_MULTIPLIERS
+from utils.rebalance import DEFAULT_DRIFT_THRESHOLD, account_orders, rebalance_orders, target_weights
+
+SIZES = [1_000, 100_000]
+PRICES = np.array([265.0, 61.0, 72.5, 49.0, 1.0])  # VTI, VXUS, BND, BNDX, VMFXX
+
+
+def make_book(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    agent = PortfolioAgent()
+    profiles = {(age, risk): agent.get_allocation(age, risk) for age in range(18, 91) for risk in RISK_MULTIPLIERS}
+    keys = list(profiles)
+    picks = rng.integers(len(keys), size=n)
+    unique = target_weights([profiles[key] for key in keys], RECOMMENDED_TICKERS)
+    targets = unique[picks]
+    balances = rng.lognormal(np.log(50_000), 1.0, size=n)
+    # Markets moved since the last rebalance: scale each asset's value by a random drift
+    drift = rng.lognormal(0.0, 0.15, size=(n, len(PRICES)))
+    holdings = np.floor(targets * drift * balances[:, None] / PRICES)
+    contributions = rng.choice([0.0, 500.0, 1_000.0, 5_000.0], size=n)
+    return holdings, targets, contributions
+
+
+def check(holdings, targets, contributions, result):
+    assert (holdings + result["shares"] >= 0).all(), "short position"
+    assert (result["cash_left"] >= -1e-6).all(), "negative cash"
+    assert not (result["sold"] & (result["drift_before"] <= DEFAULT_DRIFT_THRESHOLD)).any(), "needless sell"
+    # One lot per asset is the most rounding can leave an asset off its band edge
+    total = (holdings * PRICES).sum(axis=1) + contributions
+    slack = (PRICES.sum() / total)
+    assert (result["drift_after"] <= DEFAULT_DRIFT_THRESHOLD + slack + 1e-9).all(), "still out of band"
+
+
+def main():
+    for n in SIZES:
+        holdings, targets, contributions = make_book(n)
+        start = time.perf_counter()
+        result = rebalance_orders(holdings, targets, PRICES, contributions)
+        elapsed = time.perf_counter() - start
+        check(holdings, targets, contributions, result)
+        out_before = (result["drift_before"] > DEFAULT_DRIFT_THRESHOLD).mean()
+        print(f"{n:>8,} accounts  {elapsed * 1000:8.1f} ms  {n / elapsed:>12,.0f} accounts/s  "
+              f"out of band before {out_before:6.1%}  needed sells {result['sold'].mean():6.1%}  "
+              f"max drift after {result['drift_after'].max():.3f}")
+    print("sample orders:", account_orders(result, 0, RECOMMENDED_TICKERS))
+
+
+if __name__ == "__main__":
+    main()
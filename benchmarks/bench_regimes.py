@@ -0,0 +1,38 @@
+"""
+Latency of the regime-switching simulator
+
+Times ``simulate_regimes`` for a Moderate allocation at several path counts
+(ten years of monthly steps, best of a few runs) and prints the per-regime
+statistics of the largest run.
+Run from the repository root:
+    python -m benchmarks.bench_regimes
+"""
+import time
+
+from utils.allocation import all_weather_portfolio_strategy
+from utils.regimes import simulate_regimes
+
+PATHS = [1_000, 2_000, 5_000, 10_000]
+REPEATS = 5
+
+
+def main():
+    allocation = all_weather_portfolio_strategy(35, "Moderate", 1000)["allocation"]
+    simulate_regimes(allocation, n_paths=100)
+    for n_paths in PATHS:
+        timings = []
+        for seed in range(REPEATS):
+            start = time.perf_counter()
+            result = simulate_regimes(allocation, n_paths=n_paths, seed=seed)
+            timings.append(time.perf_counter() - start)
+        print(f"{n_paths:>7,} paths x {result['months']} months  best {min(timings) * 1e3:7.2f} ms  "
+              f"median {sorted(timings)[REPEATS // 2] * 1e3:7.2f} ms")
+
+    print()
+    for regime in result["regimes"]:
+        print(f"  {regime['name']:<36} time {regime['time_share']:6.1%}  return {regime['expected_return']:6.2%}  "
+              f"vol {regime['volatility']:6.2%}  worst drawdown {regime['worst_drawdown']:7.2%}")
+
+
+if __name__ == "__main__":
+    main()
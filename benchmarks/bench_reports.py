@@ -0,0 +1,73 @@
+"""
+Render rate of the compiled report templates
+
+Streams 100k reports per format into one file and reports reports/second
+and peak traced memory, which stays flat because nothing is
+materialized. Growth bands are simulated once per profile up front so the
+numbers measure rendering, not Monte Carlo.
+Run from the repository root:
+    python -m benchmarks.bench_reports
+"""
+import os
+import tempfile
+import time
+import tracemalloc
+
+from agents.portfolio_agents import ImplementationAgent, PortfolioAgent
+from utils.allocation import RISK_MULTIPLIERS
+from utils.projections import monte_carlo_projection
+from utils.reports import FORMATS, build_report, stream_reports
+
+REPORTS = 100_000
+TRACED_REPORTS = 5_000
+
+
+def sample_results():
+    """One result per (age, risk) profile, in the shape generate_portfolio returns"""
+    portfolio, implementation = PortfolioAgent(), ImplementationAgent()
+    results = []
+    for age in range(25, 70, 5):
+        for risk in RISK_MULTIPLIERS:
+            amount = 500.0 + 25 * age
+            allocation = portfolio.get_allocation(age, risk)
+            results.append({
+                "market_analysis": {"volatility": 12.0 + age / 5, "trend": "bullish" if age % 2 else "bearish"},
+                "allocation": allocation,
+                "summary": {"age": age, "risk_profile": risk, "monthly_investment": amount},
+                "implementation": implementation.create_plan(allocation, amount),
+                "projections": monte_carlo_projection(allocation, amount, n_paths=1_000),
+            })
+    return results
+
+
+def stream(results, n):
+    for i in range(n):
+        yield results[i % len(results)]
+
+
+def measure(label, fmt, results, path, models=False):
+    start = time.perf_counter()
+    count = stream_reports(stream(results, REPORTS), path, fmt, models=models)
+    elapsed = time.perf_counter() - start
+    size = os.path.getsize(path)
+    # Tracing slows rendering several-fold, so peak memory comes from a shorter run
+    tracemalloc.start()
+    stream_reports(stream(results, TRACED_REPORTS), path, fmt, models=models)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:>22}: {count:,} reports in {elapsed:6.2f}s  {count / elapsed:>9,.0f}/s  "
+          f"{size / 2**20:7.1f} MiB written  peak {peak / 2**20:5.2f} MiB")
+
+
+def main():
+    results = sample_results()
+    report_models = [build_report(result) for result in results]
+    with tempfile.TemporaryDirectory() as directory:
+        for fmt in FORMATS:
+            path = os.path.join(directory, f"reports.{fmt}")
+            measure(f"{fmt} (from results)", fmt, results, path)
+            measure(f"{fmt} (from models)", fmt, report_models, path, models=True)
+
+
+if __name__ == "__main__":
+    main()
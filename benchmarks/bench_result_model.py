@@ -0,0 +1,81 @@
+"""
+Memory held by results as dicts versus compact records
+
+Builds a batch of ``all_weather_portfolio_strategy`` results and a batch of
+``generate_portfolio`` results, then measures the traced bytes retained per
+result in each form. Every record is checked to convert back to a dict equal
+to the original.
+Run from the repository root:
+    python -m benchmarks.bench_result_model
+"""
+import gc
+import sys
+import itertools
+import time
+import tracemalloc
+
+import numpy as np
+
+from benchmarks.suite import StubMarketAgent
+from utils.allocation import RISK_MULTIPLIERS, all_weather_portfolio_strategy
+from utils.batch import all_weather_portfolio_batch
+from utils.result_model import PortfolioRecord, StrategyRecord
+
+STRATEGY_RESULTS = 20_000
+PORTFOLIO_RESULTS = 500
+
+
+def retained(build):
+    """Objects returned by ``build`` and the traced bytes they keep alive"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    value = build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return value, after - before
+
+
+def profiles(n):
+    grid = itertools.cycle(itertools.product(range(18, 101), RISK_MULTIPLIERS, (250, 1000, 5000)))
+    return list(itertools.islice(grid, n))
+
+
+def report(label, n, dict_bytes, record_bytes):
+    print(f"{label:<22} {n:>7,} results  dict {dict_bytes / n:>8,.0f} B/result  "
+          f"record {record_bytes / n:>7,.0f} B/result  ({dict_bytes / record_bytes:.1f}x smaller)")
+
+
+def main():
+    from agents.portfolio_agents import AllWeatherPortfolioManager
+
+    inputs = profiles(STRATEGY_RESULTS)
+    dicts, dict_bytes = retained(lambda: [all_weather_portfolio_strategy(*p) for p in inputs])
+    records, record_bytes = retained(lambda: [StrategyRecord.from_dict(d) for d in dicts])
+    assert all(record.to_dict() == d for record, d in zip(records, dicts))
+    report("strategy", STRATEGY_RESULTS, dict_bytes, record_bytes)
+
+    ages, risks, amounts = zip(*inputs)
+    batch = all_weather_portfolio_batch(ages, np.array(risks, dtype=object), amounts)
+    batch_records, batch_bytes = retained(lambda: StrategyRecord.from_batch(batch))
+    assert all(record.to_dict() == d for record, d in zip(batch_records, dicts))
+    report("strategy (batch views)", STRATEGY_RESULTS, dict_bytes, batch_bytes)
+
+    manager = AllWeatherPortfolioManager()
+    manager.market_agent = StubMarketAgent()
+    manager.generate_portfolio(40, "Moderate", 1000)  # lazy imports and compiled templates
+    inputs = profiles(PORTFOLIO_RESULTS)
+    results, dict_bytes = retained(lambda: [manager.generate_portfolio(*p) for p in inputs])
+    records, record_bytes = retained(lambda: [PortfolioRecord.from_dict(r) for r in results])
+    start = time.perf_counter()
+    assert all(record.to_dict() == r for record, r in zip(records, results))
+    rebuild = (time.perf_counter() - start) / PORTFOLIO_RESULTS
+    report("generate_portfolio", PORTFOLIO_RESULTS, dict_bytes, record_bytes)
+    text = sum(sys.getsizeof(r["formatted_output"]) for r in results) / PORTFOLIO_RESULTS
+    print(f"keep_output=True adds the report text, {text:,.0f} B/result; "
+          f"without it to_dict re-renders in {rebuild * 1e6:.0f} us/result")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Stress analytics over every age/risk profile and 30 years of daily prices
+
+Backtests the profile grid with quarterly rebalancing. It then times the
+drawdown, recovery and rolling-return statistics for every start date, and
+the crisis replays, on the resulting equity curves. One allocation is
+checked against a direct O(n^2) scan over start dates.
+Run from the repository root:
+    python -m benchmarks.bench_stress
+"""
+import time
+
+import numpy as np
+
+from benchmarks.bench_backtest import synthetic_prices
+from utils.allocation import RISK_MULTIPLIERS
+from utils.batch import all_weather_portfolio_batch
+from utils.stress import crisis_replay, drawdown_paths, stress_metrics, stress_test
+
+
+def brute_force_worst_entry_drawdown(equity: np.ndarray, step: int = 97) -> np.ndarray:
+    """Deepest drawdown lived through from every ``step``-th start date, one window at a time"""
+    return np.array([
+        (equity[t:] / np.maximum.accumulate(equity[t:]) - 1).min() for t in range(0, len(equity), step)
+    ])
+
+
+def main():
+    dates, prices = synthetic_prices()
+    ages = np.repeat(np.arange(18, 101), len(RISK_MULTIPLIERS))
+    risks = np.tile(list(RISK_MULTIPLIERS), 101 - 18)
+    weights = all_weather_portfolio_batch(ages, risks, 1000)["allocation"]
+
+    start = time.perf_counter()
+    result = stress_test(weights, prices, dates=dates, rebalance="quarterly")
+    total = time.perf_counter() - start
+    equity = result["backtest"]["equity"]
+
+    start = time.perf_counter()
+    stress = stress_metrics(equity, dates)
+    analytics = time.perf_counter() - start
+    start = time.perf_counter()
+    crises = crisis_replay(equity, dates)
+    replay = time.perf_counter() - start
+    print(f"{len(weights)} allocations x {len(dates):,} days: backtest + stress {total * 1000:7.1f} ms  "
+          f"(stress metrics {analytics * 1000:.1f} ms, crisis replays {replay * 1000:.1f} ms)")
+
+    step = 97
+    start = time.perf_counter()
+    expected = brute_force_worst_entry_drawdown(equity[0], step)
+    brute = (time.perf_counter() - start) * step  # extrapolated to every start date
+    np.testing.assert_allclose(drawdown_paths(equity[:1])["worst_drawdown_from_start"][0, ::step], expected)
+    print(f"direct scan, every start date (extrapolated): {brute * 1000:,.0f} ms for one allocation, "
+          f"{brute * len(weights):,.1f} s for the grid")
+
+    i = 0
+    print(f"\nage {ages[i]}, {risks[i]}: max drawdown {stress['max_drawdown'][i]:.2%} "
+          f"({stress['peak'][i]} -> {stress['trough'][i]}, recovered {stress['recovery'][i]}), "
+          f"longest underwater {stress['longest_underwater_days'][i]} days")
+    for years, rolling in stress["rolling"].items():
+        print(f"  {years:>2}-year rolling: worst {rolling['worst'][i]:7.2%}  median {rolling['median'][i]:6.2%}  "
+              f"best {rolling['best'][i]:6.2%}  losing starts {rolling['loss_share'][i]:6.1%}")
+    for name, crisis in crises.items():
+        print(f"  {name:<22} return {crisis['return'][i]:7.2%}  max drawdown {crisis['max_drawdown'][i]:7.2%}  "
+              f"recovered after {crisis['days_to_recover'][i]} days")
+
+
+if __name__ == "__main__":
+    main()
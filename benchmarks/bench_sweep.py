@@ -0,0 +1,84 @@
+"""
+Allocation-surface sweep over ~1M grid points
+
+The grid is every age 18-100, 101 risk multipliers from 0.5 to 1.5 and 120
+perturbations of the base weights. The benchmark times finding the
+distinct allocations, then the drawdown simulation at 1, 2, 4, ... pool
+workers up to the machine's core count. Random grid points are checked
+against ``all_weather_portfolio_strategy``. Drawdowns are checked against
+a direct running-maximum computation. It then prints the efficient
+frontier. The speedup column is only meaningful on a multi-core machine;
+with one core the pool adds overhead and no speedup.
+Run from the repository root:
+    python -m benchmarks.bench_sweep
+"""
+import os
+import time
+
+import numpy as np
+
+from utils.allocation import ASSETS, all_weather_portfolio_strategy
+from utils.sweep import (
+    DEFAULT_AGES,
+    DEFAULT_RISK_MULTIPLIERS,
+    frontier_table,
+    max_drawdowns,
+    perturb_weights,
+    simulate_asset_returns,
+    sweep,
+    sweep_allocations,
+)
+
+CHECKED_POINTS = 2_000
+
+
+def check_allocations(base_weights, grid):
+    rng = np.random.default_rng(1)
+    for _ in range(CHECKED_POINTS):
+        p, m, a = (rng.integers(n) for n in grid["index"].shape)
+        expected = all_weather_portfolio_strategy(
+            int(DEFAULT_AGES[a]), "Moderate", 1000, base_allocation=dict(zip(ASSETS, base_weights[p].tolist())),
+            risk_multiplier=float(DEFAULT_RISK_MULTIPLIERS[m]),
+        )["allocation"]
+        assert list(expected.values()) == grid["allocations"][grid["index"][p, m, a]].tolist()
+
+
+def check_drawdowns(weights, asset_returns):
+    wealth = np.cumprod(1 + asset_returns.astype(float) @ weights.T, axis=1)
+    wealth = np.concatenate([np.ones((wealth.shape[0], 1, wealth.shape[2])), wealth], axis=1)
+    direct = (wealth / np.maximum.accumulate(wealth, axis=1) - 1).min(axis=1)
+    fast = max_drawdowns(weights, np.ascontiguousarray(asset_returns.transpose(1, 0, 2)))
+    assert np.abs(direct - fast).max() < 1e-4
+
+
+def main():
+    base_weights = perturb_weights()
+    start = time.perf_counter()
+    grid = sweep_allocations(base_weights, DEFAULT_RISK_MULTIPLIERS, DEFAULT_AGES)
+    print(f"{grid['index'].size:,} grid points -> {len(grid['allocations']):,} distinct allocations "
+          f"in {time.perf_counter() - start:.2f} s")
+    check_allocations(base_weights, grid)
+    check_drawdowns(grid["allocations"][:50] / 100, simulate_asset_returns())
+    print(f"{CHECKED_POINTS:,} random points match all_weather_portfolio_strategy; drawdowns match a direct scan")
+
+    cores = os.cpu_count() or 1
+    counts = sorted({1, cores} | {n for n in (2, 4, 8, 16) if n < cores})
+    print(f"{cores} core{'s' if cores > 1 else ''} available")
+    baseline = None
+    for workers in counts:
+        start = time.perf_counter()
+        result = sweep(base_weights=base_weights, workers=workers)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"{workers:>3} workers  {elapsed:6.2f} s  {result['points'] / elapsed:>12,.0f} points/s  "
+              f"speedup {baseline / elapsed:4.2f}x")
+
+    print(f"\n{'vol':>6} {'return':>7} {'p5 DD':>7} {'age':>4} {'mult':>5} {'pert':>5}  allocation")
+    for row in frontier_table(result, max_rows=15):
+        weights = " ".join(f"{value:4.1f}" for value in row["allocation"].values())
+        print(f"{row['volatility']:6.2%} {row['expected_return']:7.2%} {row['drawdown']:7.1%} {row['age']:>4} "
+              f"{row['risk_multiplier']:5.2f} {row['perturbation']:>5}  {weights}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Overhead of the tracing layer and a sample of what it records
+
+Times a bare stage against a disabled span and an enabled span. Then runs
+generate_portfolio with tracing off, on, and on with the sampling profiler
+attached. Finally prints the per-stage latencies, the Prometheus export and
+the hottest profiled stacks.
+Run from the repository root:
+    python -m benchmarks.bench_tracing
+"""
+import time
+
+from benchmarks.suite import StubMarketAgent
+from utils.tracing import SamplingProfiler, Tracer, tracer
+
+SPAN_CALLS = 200_000
+REQUESTS = 100
+
+
+def per_call(func, n):
+    start = time.perf_counter()
+    func(n)
+    return (time.perf_counter() - start) / n
+
+
+def bare(n):
+    for _ in range(n):
+        pass
+
+
+def spanned(local_tracer):
+    def run(n):
+        span = local_tracer.span
+        for _ in range(n):
+            with span("stage"):
+                pass
+    return run
+
+
+def generate(manager, n):
+    for i in range(n):
+        manager.generate_portfolio(25 + i % 50, "Moderate", 1000)
+
+
+def main():
+    from agents.portfolio_agents import AllWeatherPortfolioManager
+
+    base = per_call(bare, SPAN_CALLS)
+    off = per_call(spanned(Tracer(enabled=False)), SPAN_CALLS) - base
+    on = per_call(spanned(Tracer(enabled=True)), SPAN_CALLS) - base
+    print(f"span overhead: disabled {off * 1e9:7.0f} ns   enabled {on * 1e9:7.0f} ns")
+
+    manager = AllWeatherPortfolioManager()
+    manager.market_agent = StubMarketAgent()
+    generate(manager, 5)
+    tracer.disable()
+    disabled = per_call(lambda n: generate(manager, n), REQUESTS)
+    tracer.enable()
+    enabled = per_call(lambda n: generate(manager, n), REQUESTS)
+    profiler = SamplingProfiler(tracer, interval=0.002).start()
+    profiled = per_call(lambda n: generate(manager, n), REQUESTS)
+    profiler.stop()
+    print(f"generate_portfolio: off {disabled * 1e3:.3f} ms  on {enabled * 1e3:.3f} ms  "
+          f"profiled {profiled * 1e3:.3f} ms")
+
+    print("\nper-stage latency (bucket upper bounds):")
+    for histogram in tracer.metrics.to_dict()["histograms"]:
+        mean = histogram["sum"] / histogram["count"]
+        print(f"  {histogram['labels']['stage']:<20} n={histogram['count']:<5} mean {mean * 1e3:8.3f} ms  "
+              f"p50 <= {histogram['p50']}  p99 <= {histogram['p99']}")
+
+    print("\nPrometheus export (first lines):")
+    print("\n".join(tracer.metrics.to_prometheus().splitlines()[:12]))
+
+    print("\nhottest profiled stacks (leaf frames):")
+    for stack, count in profiler.samples.most_common(5):
+        frames = stack.split(";")
+        print(f"  {count:5d}  {frames[0]} ... {' > '.join(frames[-2:])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+Load test for the JSON API
+
+Starts ``api.py`` on a free local port, unless ``--url`` points at a running
+server. Then ``--concurrency`` keep-alive connections send requests
+back to back for ``--duration`` seconds. Each scenario reports requests
+per second, p50/p99 latency and non-200 responses. The scenarios are the
+cheap endpoints, projections with repeating profiles (many requests
+coalesce), a mix of every endpoint, and batches of 50 plans.
+The client is plain asyncio streams, so it needs no HTTP library.
+Run from the repository root:
+    python -m benchmarks.load_test
+    python -m benchmarks.load_test --url http://127.0.0.1:8000 --concurrency 64 --duration 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RISKS = ("Low", "Moderate", "High")
+
+
+class Connection:
+    """One keep-alive HTTP/1.1 connection"""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+    async def request(self, method: str, path: str, body: Optional[Dict] = None) -> Tuple[int, bytes]:
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        payload = json.dumps(body).encode() if body is not None else b""
+        self.writer.write(
+            f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(payload)}\r\n\r\n".encode() + payload
+        )
+        head = await self.reader.readuntil(b"\r\n\r\n")
+        lines = head.decode("latin-1").split("\r\n")
+        status = int(lines[0].split()[1])
+        headers = dict(line.split(": ", 1) for line in lines[1:] if ": " in line)
+        length = int(next(v for k, v in headers.items() if k.lower() == "content-length"))
+        return status, await self.reader.readexactly(length)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def profile(rng: random.Random, ages: int = 80) -> Dict:
+    return {"age": 20 + rng.randrange(ages), "risk_tolerance": rng.choice(RISKS), "monthly_investment": 1000}
+
+
+SCENARIOS = {
+    "allocation+plan": lambda rng: ("/allocation" if rng.random() < 0.5 else "/plan", profile(rng)),
+    # Few distinct profiles, so concurrent identical projections share one computation
+    "projection (hot keys)": lambda rng: ("/projection", {**profile(rng, ages=4), "n_paths": 2_000}),
+    "mixed": lambda rng: rng.choice([
+        ("/allocation", profile(rng)),
+        ("/plan", profile(rng)),
+        ("/projection", {**profile(rng), "n_paths": 2_000}),
+        ("/report", profile(rng, ages=10)),
+    ]),
+    "batch of 50 plans": lambda rng: ("/batch", {"requests": [{"endpoint": "plan", **profile(rng)} for _ in range(50)]}),
+}
+
+
+async def run_scenario(host: str, port: int, make_request, concurrency: int, duration: float) -> Dict:
+    latencies: List[float] = []
+    failures = 0
+    deadline = time.perf_counter() + duration
+
+    async def client(seed: int):
+        nonlocal failures
+        rng = random.Random(seed)
+        connection = Connection(host, port)
+        try:
+            while time.perf_counter() < deadline:
+                path, body = make_request(rng)
+                start = time.perf_counter()
+                status, _ = await connection.request("POST", path, body)
+                latencies.append(time.perf_counter() - start)
+                failures += status != 200
+        finally:
+            connection.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client(seed) for seed in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    pick = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))]  # noqa: E731
+    return {"requests": len(latencies), "rps": len(latencies) / elapsed, "p50": pick(0.50),
+            "p99": pick(0.99), "failures": failures}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def wait_healthy(host: str, port: int, timeout: float = 60.0):
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            connection = Connection(host, port)
+            status, _ = await connection.request("GET", "/health")
+            connection.close()
+            if status == 200:
+                return
+        except OSError:
+            pass
+        if time.perf_counter() > deadline:
+            raise RuntimeError("API server did not become healthy")
+        await asyncio.sleep(0.2)
+
+
+async def fetch_metrics(host: str, port: int) -> Dict:
+    connection = Connection(host, port)
+    _, body = await connection.request("GET", "/metrics")
+    connection.close()
+    return {gauge["labels"]["stat"]: gauge["value"]
+            for gauge in json.loads(body)["gauges"] if gauge["name"] == "all_weather_api"}
+
+
+async def run(host: str, port: int, args):
+    await wait_healthy(host, port)
+    print(f"{'scenario':<22} {'requests':>9} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'failed':>7}")
+    for name, make_request in SCENARIOS.items():
+        if args.k and args.k not in name:
+            continue
+        await run_scenario(host, port, make_request, args.concurrency, min(1.0, args.duration))  # warm-up
+        stats = await run_scenario(host, port, make_request, args.concurrency, args.duration)
+        print(f"{name:<22} {stats['requests']:>9,} {stats['rps']:>9,.0f} {stats['p50'] * 1e3:>8.2f} "
+              f"{stats['p99'] * 1e3:>8.2f} {stats['failures']:>7}")
+    print("server metrics:", await fetch_metrics(host, port))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Load-test the portfolio JSON API")
+    parser.add_argument("--url", default=None, help="running server to test; default starts api.py locally")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per scenario")
+    parser.add_argument("--workers", type=int, default=None, help="process-pool size for a locally started server")
+    parser.add_argument("-k", default=None, help="only scenarios whose name contains this")
+    args = parser.parse_args(argv)
+
+    server = None
+    if args.url:
+        url = urlparse(args.url)
+        host, port = url.hostname, url.port or 80
+    else:
+        host, port = "127.0.0.1", free_port()
+        command = [sys.executable, "api.py", "--port", str(port), "--offline"]
+        if args.workers:
+            command += ["--workers", str(args.workers)]
+        server = subprocess.Popen(command, cwd=REPO_ROOT)
+    try:
+        asyncio.run(run(host, port, args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
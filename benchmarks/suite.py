@@ -0,0 +1,194 @@
+"""
+Benchmark suite for the per-request code paths
+
+Times allocation, planning, portfolio generation, report formatting and a
+headless page render of ``app.main`` through Streamlit's ``AppTest``
+harness. Each case is calibrated to run for at least ``--min-time`` seconds
+per round with the garbage collector off. The fastest of ``--repeats`` rounds
+is reported, since timing noise is one-sided. Memory is the peak traced
+allocation of a single call and what it leaves behind.
+
+Run from the repository root:
+    python -m benchmarks.suite
+    python -m benchmarks.suite --save-baseline benchmarks/baseline.json
+    python -m benchmarks.suite --baseline benchmarks/baseline.json --tolerance 0.25
+    python -m benchmarks.suite -k report          # only cases whose name contains "report"
+"""
+import argparse
+import gc
+import itertools
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MARKET_ANALYSIS = {"volatility": 17.5, "trend": "bullish", "drawdown": -3.2, "as_of": "2024-01-02"}
+
+# Ages cycled through by the page-render cases, so cold renders miss the cache
+AGES = list(range(18, 101))
+
+
+class StubMarketAgent:
+    """Stands in for MarketAnalysisAgent so no case touches the network or disk"""
+
+    def analyze_market(self) -> Dict:
+        return MARKET_ANALYSIS
+
+
+def measure(func: Callable[[], object], min_time: float, repeats: int) -> Dict:
+    """Best and median seconds per call, plus peak and retained bytes of one call"""
+    func()  # warm caches and lazy imports
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        if time.perf_counter() - start >= min_time / 5 or loops >= 1 << 20:
+            break
+        loops *= 2
+    loops = max(1, int(loops * min_time / 5 / max(time.perf_counter() - start, 1e-9)))
+
+    rounds = []
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            for _ in range(loops):
+                func()
+            rounds.append((time.perf_counter() - start) / loops)
+    finally:
+        if enabled:
+            gc.enable()
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    func()
+    after, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "best": min(rounds),
+        "median": statistics.median(rounds),
+        "loops": loops,
+        "peak_bytes": peak - before,
+        "retained_bytes": after - before,
+    }
+
+
+def core_cases() -> Dict[str, Callable[[], object]]:
+    from agents.portfolio_agents import AllWeatherPortfolioManager, ImplementationAgent, PortfolioAgent
+    from utils.allocation import all_weather_portfolio_strategy
+
+    portfolio, implementation = PortfolioAgent(), ImplementationAgent()
+    manager = AllWeatherPortfolioManager()
+    manager.market_agent = StubMarketAgent()
+    result = manager.generate_portfolio(35, "Moderate", 1000)
+    allocation = portfolio.get_allocation(35, "Moderate")
+
+    return {
+        "strategy": lambda: all_weather_portfolio_strategy(35, "Moderate", 1000),
+        "get_allocation": lambda: portfolio.get_allocation(35, "Moderate"),
+        "create_plan": lambda: implementation.create_plan(allocation, 1000),
+        "generate_portfolio": lambda: manager.generate_portfolio(35, "Moderate", 1000),
+        "format_allocation.markdown": lambda: manager.format_allocation(result),
+        "format_allocation.html": lambda: manager.format_allocation(result, "html"),
+        "format_allocation.json": lambda: manager.format_allocation(result, "json"),
+    }
+
+
+def app_cases() -> Dict[str, Callable[[], object]]:
+    """Headless reruns of app.py; each case builds on a fresh ``AppTest``"""
+    from streamlit.testing.v1 import AppTest
+
+    # Per-rerun deprecation and bare-mode warnings would flood the table
+    for name in ("streamlit.deprecation_util", "streamlit.runtime.scriptrunner_utils.script_run_context"):
+        logging.getLogger(name).disabled = True
+    script = os.path.join(REPO_ROOT, "app.py")
+
+    def page():
+        app = AppTest.from_file(script, default_timeout=60)
+        app.run()
+        return app
+
+    app = page()
+    ages = itertools.cycle(AGES)
+
+    def generate(age: int):
+        app.number_input[0].set_value(age)
+        app.button[0].click().run()
+        if app.exception:
+            raise RuntimeError(app.exception[0].message)
+
+    return {
+        "app.initial_render": page,
+        "app.generate_cold": lambda: generate(next(ages)),
+        "app.generate_cached": lambda: generate(35),
+    }
+
+
+def format_bytes(size: int) -> str:
+    return f"{size / 1024:8.1f} KiB" if abs(size) < 2**20 else f"{size / 2**20:8.2f} MiB"
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-k", dest="keyword", help="only run cases whose name contains this")
+    parser.add_argument("--min-time", type=float, default=0.5, help="seconds per timing round")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--no-app", action="store_true", help="skip the Streamlit page-render cases")
+    parser.add_argument("--baseline", help="compare against a saved baseline JSON")
+    parser.add_argument("--save-baseline", help="write the measurements to this JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown vs. baseline")
+    args = parser.parse_args(argv)
+
+    # Keep page renders away from the real result cache and model backends
+    os.environ.setdefault("ALL_WEATHER_CACHE_PATH", os.path.join(tempfile.mkdtemp(), "cache.json"))
+    os.environ.setdefault("ALL_WEATHER_LLM_BACKEND", "stub")
+    sys.path.insert(0, REPO_ROOT)
+
+    cases = core_cases()
+    if not args.no_app:
+        cases.update(app_cases())
+    if args.keyword:
+        cases = {name: func for name, func in cases.items() if args.keyword in name}
+
+    baseline: Optional[Dict] = None
+    if args.baseline:
+        with open(args.baseline) as handle:
+            baseline = json.load(handle)
+
+    results: Dict[str, Dict] = {}
+    regressions: List[str] = []
+    print(f"{'case':<28} {'best':>11} {'median':>11} {'loops':>7} {'peak':>12} {'retained':>12}  baseline")
+    for name, func in cases.items():
+        result = results[name] = measure(func, args.min_time, args.repeats)
+        line = (f"{name:<28} {result['best'] * 1e3:>8.3f} ms {result['median'] * 1e3:>8.3f} ms "
+                f"{result['loops']:>7} {format_bytes(result['peak_bytes']):>12} "
+                f"{format_bytes(result['retained_bytes']):>12}")
+        if baseline and name in baseline:
+            ratio = result["best"] / baseline[name]["best"]
+            status = "REGRESSION" if ratio > 1 + args.tolerance else "ok"
+            if status != "ok":
+                regressions.append(name)
+            line += f"  {ratio:5.2f}x {status}"
+        print(line, flush=True)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as handle:
+            json.dump(results, handle, indent=2)
+
+    if regressions:
+        print(f"regressed: {', '.join(regressions)}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,221 @@
+"""
+Headless batch mode: generate portfolio reports for a file of client profiles
+
+Reads a CSV or JSONL file with ``age``, ``risk_tolerance`` and
+``monthly_investment`` columns (plus an optional ``client_id``) and runs
+every profile through ``AllWeatherPortfolioManager.generate_portfolio`` or
+``all_weather_portfolio_strategy`` on a process pool. Market analysis is
+computed once up front and shared with every worker. Results are streamed
+to a JSONL file as they complete. The output file doubles as the
+checkpoint, so re-running the same command skips clients that are already done
+and retries those that failed. A retried client's latest line is its result.
+
+Usage:
+    python cli.py clients.csv results.jsonl --workers 4
+    python cli.py clients.jsonl results.jsonl --mode strategy
+    python cli.py clients.csv results.jsonl --fixtures data/fixtures --offline  # no network
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, Iterator, Optional, Set, Tuple
+
+MODES = ("generate", "strategy")
+
+# Set in each worker by _init_worker
+_worker_state: Dict = {}
+
+
+def read_profiles(path: str) -> Iterator[Dict]:
+    """Yield client profiles one at a time from a CSV or JSONL file"""
+    with open(path, newline="") as handle:
+        if path.endswith((".jsonl", ".ndjson")):
+            for line in handle:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(handle)
+
+
+def normalize_profile(row: Dict, row_number: int) -> Dict:
+    return {
+        "client_id": str(row.get("client_id") or row_number),
+        "age": float(row["age"]),
+        "risk_tolerance": str(row["risk_tolerance"]).strip(),
+        "monthly_investment": float(row["monthly_investment"]),
+    }
+
+
+def completed_ids(output: str) -> Set[str]:
+    """
+    Client ids whose latest record in ``output`` succeeded; drops a torn final line
+
+    Clients whose latest record is an error are retried, and the retry is
+    appended after it.
+    """
+    succeeded: Dict[str, bool] = {}
+    if not os.path.exists(output):
+        return set()
+    valid_bytes = 0
+    with open(output, "rb") as handle:
+        for line in handle:
+            try:
+                record = json.loads(line)
+                succeeded[str(record["client_id"])] = "error" not in record
+            except (ValueError, KeyError, TypeError):
+                break
+            valid_bytes += len(line)
+    if valid_bytes != os.path.getsize(output):
+        os.truncate(output, valid_bytes)
+    return {client_id for client_id, ok in succeeded.items() if ok}
+
+
+def shared_market_analysis(data_dir: Optional[str], fixtures: Optional[str], offline: bool) -> Dict:
+    """Run market analysis once, reading through the local price store"""
+    from agents.market_data import CSVFixtureSource, PriceStore, YFinanceSource
+    from agents.portfolio_agents import MarketAnalysisAgent
+
+    if fixtures:
+        source = CSVFixtureSource(fixtures)
+    else:
+        source = None if offline else YFinanceSource()
+    store = PriceStore(data_dir, source=source) if data_dir else PriceStore(source=source)
+    return MarketAnalysisAgent(price_store=store).analyze_market()
+
+
+def _init_worker(mode: str, analysis: Dict):
+    _worker_state["mode"] = mode
+    if mode == "generate":
+        from agents.portfolio_agents import AllWeatherPortfolioManager, SharedMarketAgent
+
+        manager = AllWeatherPortfolioManager()
+        manager.market_agent = SharedMarketAgent(analysis)
+        _worker_state["manager"] = manager
+
+
+def _run_profile(profile: Dict) -> Dict:
+    try:
+        if _worker_state["mode"] == "generate":
+            result = _worker_state["manager"].generate_portfolio(
+                profile["age"], profile["risk_tolerance"], profile["monthly_investment"]
+            )
+        else:
+            from utils.allocation import all_weather_portfolio_strategy
+
+            result = all_weather_portfolio_strategy(
+                profile["age"], profile["risk_tolerance"], profile["monthly_investment"]
+            )
+        return {"client_id": profile["client_id"], "profile": profile, "result": result}
+    except Exception as e:
+        return {"client_id": profile["client_id"], "profile": profile, "error": f"{type(e).__name__}: {e}"}
+
+
+def count_profiles(path: str) -> int:
+    return sum(1 for _ in read_profiles(path))
+
+
+class Progress:
+    """Rate-limited progress line on stderr"""
+
+    def __init__(self, total: int, every: float = 1.0):
+        self.total = total
+        self.every = every
+        self.done = 0
+        self.errors = 0
+        self.started = time.perf_counter()
+        self._shown = 0.0
+
+    def update(self, record: Dict):
+        self.done += 1
+        self.errors += "error" in record
+        self.show()
+
+    def show(self, force: bool = False):
+        now = time.perf_counter()
+        if force or now - self._shown >= self.every:
+            self._shown = now
+            rate = self.done / max(now - self.started, 1e-9)
+            print(f"\r{self.done}/{self.total} clients  {rate:,.0f}/s  {self.errors} errors",
+                  end="", file=sys.stderr, flush=True)
+
+
+def run_batch(
+    input_path: str,
+    output_path: str,
+    mode: str = "generate",
+    workers: Optional[int] = None,
+    in_flight: Optional[int] = None,
+    analysis: Optional[Dict] = None,
+) -> Tuple[int, int]:
+    """
+    Process every pending profile and return (written, skipped)
+
+    At most ``in_flight`` profiles are queued at once, so memory stays
+    bounded regardless of input size.
+    """
+    workers = workers or os.cpu_count() or 1
+    in_flight = in_flight or workers * 4
+    done = completed_ids(output_path)
+    progress = Progress(count_profiles(input_path) - len(done))
+    written = skipped = 0
+
+    with open(output_path, "a") as out, ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(mode, analysis or {})
+    ) as pool:
+        pending = set()
+
+        def drain(return_when):
+            nonlocal pending, written
+            finished, pending = wait(pending, return_when=return_when)
+            for future in finished:
+                record = future.result()
+                out.write(json.dumps(record, default=float) + "\n")
+                written += 1
+                progress.update(record)
+            out.flush()
+
+        for row_number, row in enumerate(read_profiles(input_path), start=1):
+            profile = normalize_profile(row, row_number)
+            if profile["client_id"] in done:
+                skipped += 1
+                continue
+            pending.add(pool.submit(_run_profile, profile))
+            if len(pending) >= in_flight:
+                drain(FIRST_COMPLETED)
+        while pending:
+            drain(FIRST_COMPLETED)
+
+    progress.show(force=True)
+    print(file=sys.stderr)
+    return written, skipped
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Generate All-Weather portfolios for a file of clients")
+    parser.add_argument("input", help="CSV or JSONL file of client profiles")
+    parser.add_argument("output", help="JSONL file to append results to (also the resume checkpoint)")
+    parser.add_argument("--mode", choices=MODES, default="generate")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--in-flight", type=int, default=None, help="max profiles queued at once")
+    parser.add_argument("--data-dir", default=None, help="local price store directory")
+    parser.add_argument("--fixtures", default=None, help="offline CSV price fixtures to refill the store from")
+    parser.add_argument("--offline", action="store_true", help="never refill the price store from the network")
+    args = parser.parse_args(argv)
+
+    analysis = None
+    if args.mode == "generate":
+        analysis = shared_market_analysis(args.data_dir, args.fixtures, args.offline)
+        if "error" in analysis:
+            print(f"warning: {analysis['error']}", file=sys.stderr)
+
+    written, skipped = run_batch(args.input, args.output, args.mode, args.workers, args.in_flight, analysis)
+    print(f"wrote {written} results to {args.output} ({skipped} already done)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
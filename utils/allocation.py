@@ -0,0 +1,167 @@
+"""
+All-Weather allocation tables and the per-profile strategy function
+"""
+import functools
+
+from utils.lazy import lazy_import
+
+# NumPy loads when the first projection is computed, not when the tables are imported
+np = lazy_import("numpy")
+
+# Detailed asset allocation based on Ray Dalio's principles
+BASE_ALLOCATION = {
+    "US Stocks": 15,            # Domestic large-cap equities
+    "International Stocks": 10, # Global market exposure
+    "Long-Term US Treasuries": 40,  # Protection during economic downturns
+    "Intermediate-Term Treasuries": 15,  # Balanced fixed income
+    "Treasury Inflation-Protected Securities (TIPS)": 7.5,  # Inflation protection
+    "Gold": 7.5,                # Ultimate hedge against uncertainty
+    "Commodities": 5            # Inflation and economic cycle hedge
+}
+
+# Fixed asset order shared by every array-based engine
+ASSETS = list(BASE_ALLOCATION)
+
+# Risk and age adjustment factors
+RISK_MULTIPLIERS = {
+    "Low": 0.8,
+    "Moderate": 1.0,
+    "High": 1.2
+}
+
+# Fixed-rate projection scenarios and horizons (years)
+PROJECTION_RATES = {
+    "conservative_6%": 0.06,
+    "expected_8%": 0.08
+}
+PROJECTION_YEARS = [10, 20, 30]
+
+
+def annuity_factors(annual_rates, years):
+    """
+    Balance per $1 contributed at the start of every month for ``years``
+
+    ``annual_rates`` are effective annual returns, compounded monthly at the
+    equivalent monthly rate. Each contribution grows only for the months it
+    is actually invested. Rates broadcast against horizons.
+    """
+    annual_rates, years = np.broadcast_arrays(np.asarray(annual_rates, dtype=float), np.asarray(years, dtype=float))
+    months = years * 12
+    rate = np.expm1(np.log1p(annual_rates) / 12)
+    growth = np.exp(np.log1p(rate) * months)
+    # Zero rates are the limit of the formula: every dollar stays a dollar
+    safe_rate = np.where(rate == 0, 1.0, rate)
+    return np.where(rate == 0, months, (growth - 1) / safe_rate * (1 + rate))
+
+
+@functools.lru_cache(maxsize=1024)
+def annuity_factor(annual_rate, years) -> float:
+    """``annuity_factors`` for one rate and horizon; projections reuse the same few pairs, so they are cached"""
+    return float(annuity_factors(annual_rate, years))
+
+ECONOMIC_SCENARIOS = [
+    {
+        "name": "Rising Growth & Rising Inflation",
+        "description": "Economy expanding, prices increasing",
+        "best_performers": ["Commodities", "Stocks", "TIPS"]
+    },
+    {
+        "name": "Rising Growth & Falling Inflation",
+        "description": "Economic expansion with stable prices",
+        "best_performers": ["Stocks", "Intermediate Bonds"]
+    },
+    {
+        "name": "Falling Growth & Rising Inflation",
+        "description": "Economic slowdown with increasing prices",
+        "best_performers": ["Gold", "TIPS", "Commodities"]
+    },
+    {
+        "name": "Falling Growth & Falling Inflation",
+        "description": "Economic contraction with decreasing prices",
+        "best_performers": ["Long-Term Treasuries"]
+    }
+]
+
+
+def all_weather_portfolio_strategy(age, risk_tolerance, monthly_investment, base_allocation=None,
+                                   risk_multiplier=None):
+    """
+    Comprehensive All-Weather Portfolio Strategy
+
+    ``base_allocation`` overrides the fixed ``BASE_ALLOCATION`` table, e.g. with
+    weights from ``utils.risk_parity``. ``risk_multiplier`` is used instead of
+    looking ``risk_tolerance`` up in ``RISK_MULTIPLIERS``, e.g. for levels
+    between the named ones.
+    """
+    base_allocation = base_allocation or BASE_ALLOCATION
+    if risk_multiplier is None:
+        risk_multiplier = RISK_MULTIPLIERS.get(risk_tolerance, 1.0)
+
+    # Age-based risk reduction
+    age_risk_factor = max(0.5, (100 - age) / 100)
+
+    # Adjust allocation based on risk tolerance and age
+    adjusted_allocation = {
+        asset: round(weight * risk_multiplier * age_risk_factor, 1)
+        for asset, weight in base_allocation.items()
+    }
+
+    # Normalize to ensure 100%
+    total = sum(adjusted_allocation.values())
+    normalized_allocation = {
+        asset: round((weight / total) * 100, 1)
+        for asset, weight in adjusted_allocation.items()
+    }
+
+    # Projected growth calculations
+    def calculate_growth(rate):
+        return [
+            round(monthly_investment * annuity_factor(rate, years), 2)
+            for years in PROJECTION_YEARS
+        ]
+
+    return {
+        "allocation": normalized_allocation,
+        "investment_projections": {
+            name: calculate_growth(rate)
+            for name, rate in PROJECTION_RATES.items()
+        },
+        "economic_scenarios": [
+            {**scenario, "best_performers": list(scenario["best_performers"])}
+            for scenario in ECONOMIC_SCENARIOS
+        ]
+    }
+
+# Long-run capital-market assumptions per asset: (annual expected return, annual volatility)
+ASSET_ASSUMPTIONS = {
+    "US Stocks": (0.070, 0.160),
+    "International Stocks": (0.065, 0.180),
+    "Long-Term US Treasuries": (0.040, 0.120),
+    "Intermediate-Term Treasuries": (0.035, 0.055),
+    "Treasury Inflation-Protected Securities (TIPS)": (0.035, 0.060),
+    "Gold": (0.040, 0.150),
+    "Commodities": (0.040, 0.180)
+}
+
+# Correlations between the assets above, in ``ASSETS`` order
+ASSET_CORRELATIONS = [
+    [1.00, 0.85, -0.20, -0.10, 0.10, 0.05, 0.35],
+    [0.85, 1.00, -0.15, -0.05, 0.15, 0.15, 0.40],
+    [-0.20, -0.15, 1.00, 0.85, 0.65, 0.20, -0.15],
+    [-0.10, -0.05, 0.85, 1.00, 0.75, 0.25, -0.05],
+    [0.10, 0.15, 0.65, 0.75, 1.00, 0.40, 0.25],
+    [0.05, 0.15, 0.20, 0.25, 0.40, 1.00, 0.30],
+    [0.35, 0.40, -0.15, -0.05, 0.25, 0.30, 1.00]
+]
+
+# Cash sleeve used by the stocks/bonds/cash allocation in the agents module
+CASH_ASSUMPTION = (0.030, 0.005)
+
+# How the agents' stocks/bonds sleeves map onto the asset classes above,
+# following the ETF splits in the portfolio report (VTI/VXUS, BND/BNDX).
+# BND and BNDX are both intermediate-duration aggregates, so the whole
+# bonds sleeve is modelled as Intermediate-Term Treasuries
+SLEEVE_PROXIES = {
+    "stocks": {"US Stocks": 0.7, "International Stocks": 0.3},
+    "bonds": {"Intermediate-Term Treasuries": 1.0}
+}
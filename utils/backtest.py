@@ -0,0 +1,219 @@
+"""
+Vectorized historical backtest for All-Weather allocations
+
+Runs many allocations against one price matrix at once. Calendar and
+buy-and-hold policies are solved for every date in a single matrix product.
+Drift-band policies are path dependent, so time is processed in blocks:
+every block computes drifted weights for all allocations and all days in
+the block with array operations, and only the first rebalance inside a
+block sends that allocation back for another pass.
+"""
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+TRADING_DAYS = 252
+
+# ETF splits used in the portfolio report for the agents' stocks/bonds/cash sleeves
+ETF_PROXIES = {
+    "stocks": {"VTI": 0.7, "VXUS": 0.3},
+    "bonds": {"BND": 0.8, "BNDX": 0.2},
+    "cash": {"VMFXX": 1.0}
+}
+
+CALENDAR_PERIODS = ("monthly", "quarterly", "annually")
+
+
+def allocation_matrix(
+    allocations: Union[Dict, Sequence[Dict]],
+    columns: Sequence[str],
+    proxies: Optional[Dict[str, Dict[str, float]]] = None,
+) -> np.ndarray:
+    """
+    Stack percentage allocations into a (allocations x columns) weight matrix
+
+    Keys must name price columns directly, or be expanded through ``proxies``
+    (e.g. ``ETF_PROXIES`` for ``PortfolioAgent.get_allocation`` output).
+    Each row is normalized to sum to one.
+    """
+    if isinstance(allocations, dict):
+        allocations = [allocations]
+    columns = list(columns)
+    proxies = proxies or {}
+    weights = np.zeros((len(allocations), len(columns)))
+    for row, allocation in enumerate(allocations):
+        for name, percent in allocation.items():
+            for column, share in proxies.get(name, {name: 1.0}).items():
+                if column not in columns:
+                    raise KeyError(f"No price column for {column!r}")
+                weights[row, columns.index(column)] += percent * share
+    totals = weights.sum(axis=1, keepdims=True)
+    if (totals <= 0).any():
+        raise ValueError("Every allocation needs a positive total weight")
+    return weights / totals
+
+
+def calendar_flags(dates: np.ndarray, period: str) -> np.ndarray:
+    """True on the last available date of each month/quarter/year"""
+    if period not in CALENDAR_PERIODS:
+        raise ValueError(f"Unknown rebalancing period: {period}")
+    months = np.asarray(dates, dtype="datetime64[M]").astype(np.int64)
+    buckets = {"monthly": months, "quarterly": months // 3, "annually": months // 12}[period]
+    return np.append(buckets[1:] != buckets[:-1], False)
+
+
+def _simulate_calendar(weights, prices, flags):
+    """Closed-form path when rebalance dates are known up front (or never happen)"""
+    days = prices.shape[0]
+    trigger = np.zeros(days, dtype=bool) if flags is None else flags.copy()
+    trigger[0] = True
+    positions = np.flatnonzero(trigger)
+    segment = np.searchsorted(positions, np.arange(days), side="left") - 1
+    segment[0] = 0
+    anchor = positions[segment]
+
+    # Growth of each allocation since its last rebalance, for every date at once
+    relative = prices / prices[anchor]
+    growth = weights @ relative.T
+
+    flagged = positions[1:]
+    anchor_value = np.ones((weights.shape[0], len(positions)))
+    anchor_value[:, 1:] = np.cumprod(growth[:, flagged], axis=1)
+    equity = anchor_value[:, segment] * growth
+
+    grown = weights[:, None, :] * relative[flagged][None, :, :]
+    drifted = grown / growth[:, flagged][..., None]
+    turnover = 0.5 * np.abs(drifted - weights[:, None, :]).sum(axis=(1, 2))
+    rebalances = np.full(weights.shape[0], len(flagged))
+    return equity, turnover, rebalances
+
+
+def _simulate(weights, prices, flags, drift_threshold, block):
+    """Path-dependent drift-band rebalancing, one block of dates per pass"""
+    count, days = weights.shape[0], prices.shape[0]
+    steps = np.arange(block)
+    equity = np.empty((count, days))
+    equity[:, 0] = 1.0
+    turnover = np.zeros(count)
+    rebalances = np.zeros(count, dtype=int)
+    anchor = np.zeros(count, dtype=int)      # date of the last rebalance
+    anchor_value = np.ones(count)            # portfolio value at that date
+    cursor = np.ones(count, dtype=int)       # next date to process
+
+    rows = np.flatnonzero(cursor < days)
+    while len(rows):
+        index = cursor[rows, None] + steps
+        valid = index < days
+        index = np.minimum(index, days - 1)
+
+        target = weights[rows][:, None, :]
+        grown = target * (prices[index] / prices[anchor[rows]][:, None, :])
+        growth = grown.sum(axis=2)
+        drifted = grown / growth[..., None]
+
+        trigger = valid & (np.abs(drifted - target).max(axis=2) > drift_threshold)
+        if flags is not None:
+            trigger &= flags[index]
+
+        hit = trigger.any(axis=1)
+        first = np.where(hit, trigger.argmax(axis=1), block - 1)
+        values = anchor_value[rows, None] * growth
+        commit = valid & (steps[None, :] <= first[:, None])
+        r, j = np.nonzero(commit)
+        equity[rows[r], index[r, j]] = values[r, j]
+
+        hit_rows = np.flatnonzero(hit)
+        if len(hit_rows):
+            at = first[hit_rows]
+            who = rows[hit_rows]
+            turnover[who] += 0.5 * np.abs(drifted[hit_rows, at] - weights[who]).sum(axis=1)
+            rebalances[who] += 1
+            anchor[who] = index[hit_rows, at]
+            anchor_value[who] = values[hit_rows, at]
+        cursor[rows] = np.where(hit, index[np.arange(len(rows)), first] + 1, cursor[rows] + block)
+        rows = rows[cursor[rows] < days]
+
+    return equity, turnover, rebalances
+
+
+def backtest(
+    allocations: Union[Dict, Sequence[Dict], np.ndarray],
+    prices,
+    dates: Optional[np.ndarray] = None,
+    columns: Optional[Sequence[str]] = None,
+    rebalance: Optional[str] = "quarterly",
+    drift_threshold: Optional[float] = None,
+    proxies: Optional[Dict[str, Dict[str, float]]] = None,
+    block: int = 63,
+) -> Dict:
+    """
+    Backtest one or many allocations against a (dates x assets) price matrix
+
+    ``prices`` may be a DataFrame (dates index, asset columns) or an array
+    with ``columns`` and optionally ``dates``. ``rebalance`` picks a calendar
+    period ("monthly", "quarterly", "annually" or None) and
+    ``drift_threshold`` an absolute weight drift such as 0.05. With both set,
+    drift is only checked on calendar dates; with neither, the portfolio is
+    bought and held. Rebalancing happens at the close of the trigger date.
+    """
+    if hasattr(prices, "columns"):
+        columns = list(prices.columns)
+        dates = prices.index.values
+        prices = prices.to_numpy(dtype=float)
+    prices = np.asarray(prices, dtype=float)
+    if prices.ndim != 2 or prices.shape[0] < 2:
+        raise ValueError("prices must be a (dates x assets) matrix with at least two rows")
+    if np.isnan(prices).any() or (prices <= 0).any():
+        raise ValueError("prices must be positive and free of gaps")
+
+    if isinstance(allocations, np.ndarray):
+        weights = allocations / allocations.sum(axis=1, keepdims=True)
+    else:
+        if columns is None:
+            raise ValueError("columns are required to match allocation keys")
+        weights = allocation_matrix(allocations, columns, proxies)
+
+    flags = None
+    if rebalance is not None:
+        if dates is None:
+            raise ValueError("dates are required for calendar rebalancing")
+        flags = calendar_flags(dates, rebalance)
+
+    if drift_threshold is None:
+        equity, turnover, rebalances = _simulate_calendar(weights, prices, flags)
+    else:
+        equity, turnover, rebalances = _simulate(weights, prices, flags, drift_threshold, block)
+
+    if dates is not None:
+        dates = np.asarray(dates, dtype="datetime64[D]")
+        years = (dates[-1] - dates[0]).astype(int) / 365.25
+    else:
+        years = (prices.shape[0] - 1) / TRADING_DAYS
+
+    daily = equity[:, 1:] / equity[:, :-1] - 1
+    drawdown = equity / np.maximum.accumulate(equity, axis=1) - 1
+    return {
+        "columns": columns,
+        "dates": dates,
+        "weights": weights,
+        "equity": equity,
+        "cagr": equity[:, -1] ** (1 / years) - 1,
+        "volatility": daily.std(axis=1, ddof=1) * np.sqrt(TRADING_DAYS),
+        "max_drawdown": drawdown.min(axis=1),
+        "turnover": turnover / years,
+        "rebalances": rebalances,
+    }
+
+
+def summarize(result: Dict) -> List[Dict]:
+    """Per-allocation metric dicts for display"""
+    return [
+        {
+            "cagr": float(result["cagr"][i]),
+            "volatility": float(result["volatility"][i]),
+            "max_drawdown": float(result["max_drawdown"][i]),
+            "annual_turnover": float(result["turnover"][i]),
+            "rebalances": int(result["rebalances"][i]),
+        }
+        for i in range(len(result["cagr"]))
+    ]
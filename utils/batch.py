@@ -0,0 +1,143 @@
+"""
+Vectorized batch mode for the All-Weather strategy
+
+Evaluates many (age, risk_tolerance, monthly_investment) profiles at once with
+NumPy broadcasting. Every value matches ``all_weather_portfolio_strategy``
+exactly, including Python's ``round`` semantics.
+"""
+from typing import Dict
+
+import numpy as np
+
+from utils.allocation import (
+    ASSETS,
+    BASE_ALLOCATION,
+    PROJECTION_RATES,
+    PROJECTION_YEARS,
+    RISK_MULTIPLIERS,
+    annuity_factor,
+)
+
+BASE_WEIGHTS = np.array([BASE_ALLOCATION[asset] for asset in ASSETS], dtype=float)
+
+
+def _split(values: np.ndarray):
+    """Veltkamp split of a float into two non-overlapping halves"""
+    c = 134217729.0 * values  # 2**27 + 1
+    high = c - (c - values)
+    return high, values - high
+
+
+def round_like_python(values, ndigits: int) -> np.ndarray:
+    """Round an array exactly like the builtin ``round`` does for floats"""
+    values = np.asarray(values, dtype=float)
+    scale = 10.0 ** ndigits
+    scaled = values * scale
+    rounded = np.rint(scaled)
+
+    # ``round`` works on the exact binary value, so a product that landed on a
+    # half only ties if the multiplication was exact. Recover the rounding
+    # error of the product (Dekker's two-product) to break the tie correctly.
+    tie = (scaled - np.floor(scaled)) == 0.5
+    if tie.any():
+        v, p = values[tie], scaled[tie]
+        v_hi, v_lo = _split(v)
+        s_hi, s_lo = _split(np.full_like(v, scale))
+        error = ((v_hi * s_hi - p) + v_hi * s_lo + v_lo * s_hi) + v_lo * s_lo
+        fixed = rounded[tie]
+        fixed[error > 0] = np.ceil(p[error > 0])
+        fixed[error < 0] = np.floor(p[error < 0])
+        rounded[tie] = fixed
+    return rounded / scale
+
+
+def risk_multiplier_array(risk_tolerances) -> np.ndarray:
+    """Map risk labels to multipliers, defaulting unknown labels to 1.0"""
+    risks = np.asarray(risk_tolerances, dtype=object)
+    multipliers = np.ones(risks.shape)
+    for level, multiplier in RISK_MULTIPLIERS.items():
+        multipliers[risks == level] = multiplier
+    return multipliers
+
+
+def all_weather_portfolio_batch(ages, risk_tolerances, monthly_investments, base_allocation=None) -> Dict:
+    """
+    Batch All-Weather Portfolio Strategy
+
+    Inputs broadcast against each other, so a scalar risk level or investment
+    can be combined with an array of ages. Returns the allocation matrix
+    (profiles x ``ASSETS``) and one (profiles x ``PROJECTION_YEARS``) matrix
+    per projection scenario. ``base_allocation`` overrides ``BASE_ALLOCATION``
+    and must use the same asset names.
+    """
+    ages, risks, invest = np.broadcast_arrays(
+        np.asarray(ages, dtype=float),
+        np.asarray(risk_tolerances, dtype=object),
+        np.asarray(monthly_investments, dtype=float),
+    )
+    ages, risks, invest = ages.ravel(), risks.ravel(), invest.ravel()
+
+    # Age-based risk reduction
+    age_risk_factor = np.maximum(0.5, (100 - ages) / 100)
+
+    # Same operation order as the scalar path: (weight * multiplier) * age factor
+    base = BASE_WEIGHTS if base_allocation is None else np.array(
+        [base_allocation[asset] for asset in ASSETS], dtype=float
+    )
+    multipliers = risk_multiplier_array(risks)
+    adjusted = round_like_python(
+        (base[None, :] * multipliers[:, None]) * age_risk_factor[:, None], 1
+    )
+
+    # Sum left to right like the builtin ``sum`` so totals are bit-identical
+    total = np.zeros(len(ages))
+    for column in range(adjusted.shape[1]):
+        total = total + adjusted[:, column]
+    allocation = round_like_python((adjusted / total[:, None]) * 100, 1)
+
+    # Factors come from the scalar function, so only the final product is vectorized
+    projections = {}
+    for name, rate in PROJECTION_RATES.items():
+        factors = np.array([annuity_factor(rate, y) for y in PROJECTION_YEARS])
+        projections[name] = round_like_python(invest[:, None] * factors, 2)
+
+    return {
+        "assets": list(ASSETS),
+        "years": list(PROJECTION_YEARS),
+        "allocation": allocation,
+        "investment_projections": projections,
+    }
+
+
+def all_weather_portfolio_frame(profiles):
+    """
+    Run the batch strategy over a DataFrame with ``age``, ``risk_tolerance``
+    and ``monthly_investment`` columns and return one row per profile
+    """
+    import pandas as pd
+
+    batch = all_weather_portfolio_batch(
+        profiles["age"].to_numpy(),
+        profiles["risk_tolerance"].to_numpy(dtype=object),
+        profiles["monthly_investment"].to_numpy(),
+    )
+    columns = {asset: batch["allocation"][:, i] for i, asset in enumerate(batch["assets"])}
+    for name, values in batch["investment_projections"].items():
+        for i, years in enumerate(batch["years"]):
+            columns[f"{name}_{years}y"] = values[:, i]
+    return pd.DataFrame(columns, index=profiles.index)
+
+
+def batch_to_results(batch: Dict) -> list:
+    """Expand a batch back into the scalar function's allocation/projection dicts"""
+    assets = batch["assets"]
+    rows = []
+    for i in range(batch["allocation"].shape[0]):
+        rows.append({
+            "allocation": dict(zip(assets, batch["allocation"][i].tolist())),
+            "investment_projections": {
+                name: values[i].tolist()
+                for name, values in batch["investment_projections"].items()
+            },
+        })
+    return rows
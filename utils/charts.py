@@ -0,0 +1,110 @@
+"""
+Cached chart artifacts for the allocation pie and projection chart
+
+Charts are built as Vega-Lite specs (plain dicts rendered in the browser),
+which is far cheaper than rasterizing a matplotlib figure on the server.
+A PNG path is kept for exports; it draws on a standalone ``Figure`` that is
+never registered with pyplot and is always cleared, so repeated renders do
+not accumulate figures. Every artifact is cached by a hash of its input data.
+"""
+import hashlib
+import io
+import json
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+from utils.result_cache import ResultCache
+
+# In-memory only: artifacts are cheap to rebuild after a restart
+ARTIFACT_CACHE = ResultCache(path=None, max_entries=1024, ttl=24 * 3600, name="chart_artifact")
+
+
+def data_key(kind: str, data) -> str:
+    """Stable hash of a chart kind and its JSON-serializable input data"""
+    payload = json.dumps([kind, data], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _allocation_spec(allocation: Dict[str, float]) -> Dict:
+    return {
+        "$schema": "https://vega.github.io/schema/vega-lite/v5.json",
+        "title": {"text": "Asset Class Distribution", "fontSize": 16},
+        "data": {"values": [{"Asset": asset, "Allocation": weight} for asset, weight in allocation.items()]},
+        "mark": {"type": "arc", "tooltip": True},
+        "encoding": {
+            "theta": {"field": "Allocation", "type": "quantitative", "stack": True},
+            "color": {"field": "Asset", "type": "nominal", "sort": None},
+            "order": {"field": "Allocation", "type": "quantitative", "sort": "descending"},
+        },
+        "view": {"stroke": None},
+    }
+
+
+def _projection_spec(projection: Dict) -> Dict:
+    series = {
+        "Pessimistic (P5)": projection["percentiles"]["P5"],
+        "Median (P50)": projection["percentiles"]["P50"],
+        "Optimistic (P95)": projection["percentiles"]["P95"],
+        "Total Contributed": projection["total_contributed"],
+    }
+    values = [
+        {"Duration": f"{years} Years", "variable": name, "value": amounts[i]}
+        for name, amounts in series.items()
+        for i, years in enumerate(projection["years"])
+    ]
+    return {
+        "$schema": "https://vega.github.io/schema/vega-lite/v5.json",
+        "title": f"Investment Growth Projection ({projection['n_paths']:,} simulated paths)",
+        "data": {"values": values},
+        "mark": {"type": "line", "point": True},
+        "encoding": {
+            "x": {"field": "Duration", "type": "nominal"},
+            "y": {"field": "value", "type": "quantitative"},
+            "color": {"field": "variable", "type": "nominal"},
+            "tooltip": [{"field": "Duration"}, {"field": "variable"}, {"field": "value"}],
+        },
+    }
+
+
+def allocation_pie_spec(allocation: Dict[str, float]) -> Dict:
+    """Vega-Lite pie spec for an allocation; treat the result as read-only"""
+    return ARTIFACT_CACHE.get_or_compute(
+        data_key("allocation-pie", allocation), lambda: _allocation_spec(allocation)
+    )
+
+
+def projection_chart_spec(projection: Dict) -> Dict:
+    """Vega-Lite line spec for a Monte Carlo projection; treat the result as read-only"""
+    data = {k: projection[k] for k in ("years", "percentiles", "total_contributed", "n_paths")}
+    return ARTIFACT_CACHE.get_or_compute(
+        data_key("projection-line", data), lambda: _projection_spec(projection)
+    )
+
+
+@contextmanager
+def standalone_figure(**kwargs) -> Iterator:
+    """A matplotlib Figure outside pyplot's registry, cleared on exit"""
+    from matplotlib.figure import Figure
+
+    figure = Figure(**kwargs)
+    try:
+        yield figure
+    finally:
+        figure.clear()
+
+
+def _render_pie_png(allocation: Dict[str, float], dpi: int) -> bytes:
+    with standalone_figure(figsize=(10, 6)) as figure:
+        ax = figure.subplots()
+        ax.pie(list(allocation.values()), labels=list(allocation), autopct='%1.1f%%')
+        ax.set_title("Asset Class Distribution", fontsize=16)
+        buffer = io.BytesIO()
+        figure.savefig(buffer, format="png", dpi=dpi, bbox_inches="tight")
+        return buffer.getvalue()
+
+
+def allocation_pie_png(allocation: Dict[str, float], dpi: int = 100) -> bytes:
+    """Matplotlib-rendered PNG of the allocation pie, cached by allocation"""
+    return ARTIFACT_CACHE.get_or_compute(
+        data_key("allocation-pie-png", [allocation, dpi]), lambda: _render_pie_png(allocation, dpi)
+    )
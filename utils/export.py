@@ -0,0 +1,283 @@
+"""
+Columnar export of portfolio results to Arrow and Parquet
+
+Record batches are built straight from the result arrays. The batch
+strategy's (profiles x ``ASSETS``) matrices and ``PortfolioRecord`` fields
+become struct and fixed-size-list columns, with no per-row dicts. Each
+contiguous column is handed to Arrow without a copy. ``ResultWriter``
+streams batches into Hive-style partition directories
+(``risk_tolerance=Moderate/part-00000.parquet``). A later writer on the same
+root adds new part files next to the old ones, so runs append rather than
+overwrite. The Arrow IPC format can be memory-mapped by readers
+(``memory_map_table``); Parquet is smaller on disk. pyarrow is optional and
+only imported when a batch is built or written.
+"""
+import os
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+from utils.allocation import PROJECTION_YEARS
+from utils.lazy import lazy_import
+from utils.projections import DEFAULT_PERCENTILES
+from utils.result_model import SLEEVES, PortfolioRecord
+
+pa = lazy_import("pyarrow")
+pq = lazy_import("pyarrow.parquet")
+
+FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+
+
+def _column(values: np.ndarray):
+    """
+    float64 Arrow array over a NumPy column; contiguous float columns are not copied
+
+    The type is fixed rather than inferred, so integer and float inputs give
+    batches that one writer, or one dataset, can hold together.
+    """
+    return pa.array(np.ascontiguousarray(values, dtype=np.float64), type=pa.float64())
+
+
+def _struct(names: Sequence[str], matrix: np.ndarray):
+    """Struct column with one field per matrix column"""
+    columns = np.ascontiguousarray(np.asarray(matrix, dtype=float).T)  # each row is then one contiguous column
+    return pa.StructArray.from_arrays([pa.array(column) for column in columns], names=list(names))
+
+
+def _fixed_lists(matrix: np.ndarray):
+    """Fixed-size list column, one list per matrix row"""
+    matrix = np.ascontiguousarray(matrix, dtype=float)
+    return pa.FixedSizeListArray.from_arrays(pa.array(matrix.ravel()), matrix.shape[1])
+
+
+def strategy_record_batch(ages, risk_tolerances, monthly_investments, batch: Optional[Dict] = None):
+    """
+    One row per profile of ``all_weather_portfolio_batch``
+
+    Inputs broadcast like the batch function's, which is run unless its
+    result is passed in as ``batch``. ``allocation`` and ``monthly_amount``
+    are structs keyed by asset. ``investment_projections`` is a struct of
+    one list per scenario, aligned with the batch's ``years``.
+    """
+    ages, risks, invest = np.broadcast_arrays(
+        np.asarray(ages), np.asarray(risk_tolerances, dtype=object), np.asarray(monthly_investments, dtype=float)
+    )
+    ages, risks, invest = ages.ravel(), risks.ravel(), invest.ravel()
+    if batch is None:
+        from utils.batch import all_weather_portfolio_batch
+
+        batch = all_weather_portfolio_batch(ages, risks, invest)
+    allocation = batch["allocation"]
+    projections = batch["investment_projections"]
+    return pa.RecordBatch.from_arrays(
+        [
+            _column(ages),
+            pa.array(risks, type=pa.string()),
+            _column(invest),
+            _struct(batch["assets"], allocation),
+            _struct(batch["assets"], invest[:, None] * (allocation / 100)),
+            pa.StructArray.from_arrays([_fixed_lists(values) for values in projections.values()], names=list(projections)),
+        ],
+        names=["age", "risk_tolerance", "monthly_investment", "allocation", "monthly_amount", "investment_projections"],
+    )
+
+
+def portfolio_record_batch(results: Sequence[Union[PortfolioRecord, Dict]]):
+    """
+    One row per ``generate_portfolio`` result (dicts are compacted first)
+
+    The market analysis is shared between results. Each row carries only its
+    ``market_as_of`` date, and ``market_record_batch`` exports the analysis
+    itself. Projection bands are structs of per-horizon lists. They are null
+    for results without a projection.
+    """
+    records = [r if isinstance(r, PortfolioRecord) else PortfolioRecord.from_dict(r) for r in results]
+    arrays = [
+        pa.array([record.age for record in records], type=pa.float64()),
+        pa.array([record.risk_profile for record in records], type=pa.string()),
+        pa.array([record.monthly_investment for record in records], type=pa.float64()),
+        _struct(SLEEVES, np.stack([record.allocation for record in records])),
+        _struct(SLEEVES, np.stack([record.monthly_investments for record in records])),
+        pa.array([record.rebalancing for record in records], type=pa.string()),
+        pa.array([record.market_analysis.get("as_of") for record in records], type=pa.string()),
+    ]
+    names = ["age", "risk_profile", "monthly_investment", "allocation", "monthly_investments", "rebalancing",
+             "market_as_of"]
+
+    # Without any projection the default years and bands keep the schema stable across batches
+    projected = [record.projection for record in records if record.projection is not None]
+    years = projected[0].years if projected else tuple(PROJECTION_YEARS)
+    bands = projected[0].bands if projected else tuple(f"P{p:g}" for p in DEFAULT_PERCENTILES)
+    if any(p.years != years or p.bands != bands for p in projected):
+        raise ValueError("projections do not share the same years and percentile bands")
+    has = np.array([record.projection is not None for record in records], dtype=bool)
+    values = np.full((len(records), len(bands), len(years)), np.nan)
+    if projected:
+        values[has] = np.stack([p.values for p in projected])
+    fields = [
+        pa.FixedSizeListArray.from_arrays(pa.array(values[:, band].ravel()), len(years))
+        for band in range(len(bands))
+    ]
+    arrays.append(pa.StructArray.from_arrays(fields, names=list(bands), mask=pa.array(~has)))
+    names.append("projection_bands")
+    for name in ("expected_return", "volatility"):
+        column = np.full(len(records), np.nan)
+        column[has] = [getattr(p, name) for p in projected]
+        arrays.append(pa.array(column, mask=~has))
+        names.append(f"projection_{name}")
+    return pa.RecordBatch.from_arrays(arrays, names=names)
+
+
+def _repeat(analysis: Dict, key: str, rows: int, type_):
+    """A market-wide reading repeated per row, typed so a failed analysis (all nulls) keeps the schema"""
+    return pa.array([analysis.get(key)] * rows, type=type_)
+
+
+def market_record_batch(analysis: Dict):
+    """
+    One row per priced ticker of a market analysis, with the market-wide readings repeated
+
+    An ``{"error": ...}`` analysis gives an empty batch with the same schema.
+    """
+    prices = analysis.get("prices", {})
+    tickers = list(prices)
+    return pa.RecordBatch.from_arrays(
+        [
+            pa.array(tickers, type=pa.string()),
+            pa.array([prices[t]["close"] for t in tickers], type=pa.float64()),
+            pa.array([prices[t]["as_of"] for t in tickers], type=pa.string()),
+            _repeat(analysis, "as_of", len(tickers), pa.string()),
+            _repeat(analysis, "volatility", len(tickers), pa.float64()),
+            _repeat(analysis, "trend", len(tickers), pa.string()),
+            _repeat(analysis, "drawdown", len(tickers), pa.float64()),
+        ],
+        names=["ticker", "close", "price_as_of", "market_as_of", "market_volatility", "market_trend",
+               "market_drawdown"],
+    )
+
+
+class ResultWriter:
+    """
+    Streaming writer of record batches into partitioned Parquet or Arrow files
+
+    Rows are split by the ``partition_by`` columns into
+    ``root/column=value/...`` directories, without those columns in the
+    files. Each partition gets one open file for the writer's lifetime, and
+    every batch is appended to it as a row group (Parquet) or record batch
+    (Arrow). All batches must share the first batch's schema.
+    """
+
+    def __init__(self, root: str, partition_by: Sequence[str] = (), fmt: str = "parquet",
+                 compression: Optional[str] = "zstd"):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown format {fmt!r}; choose from {', '.join(FORMATS)}")
+        self.root = root
+        self.partition_by = list(partition_by)
+        self.fmt = fmt
+        self.compression = compression
+        self.schema = None
+        self.rows = 0
+        self._writers: Dict[str, object] = {}
+
+    def _writer(self, directory: str, schema):
+        writer = self._writers.get(directory)
+        if writer is None:
+            os.makedirs(directory, exist_ok=True)
+            path = self._claim(directory)
+            if self.fmt == "parquet":
+                writer = pq.ParquetWriter(path, schema, compression=self.compression)
+            else:
+                writer = pa.ipc.new_file(path, schema)
+            self._writers[directory] = writer
+        return writer
+
+    def _claim(self, directory: str) -> str:
+        """
+        Create the next free part file exclusively and return its path
+
+        The exclusive create means another writer on the same root, or a
+        gap left by a deleted part, can never make two writers share a file.
+        """
+        suffix = FORMATS[self.fmt]
+        number = sum(name.startswith("part-") and name.endswith(suffix) for name in os.listdir(directory))
+        while True:
+            path = os.path.join(directory, f"part-{number:05d}{suffix}")
+            try:
+                os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return path
+            except FileExistsError:
+                number += 1
+
+    def _emit(self, directory: str, batch):
+        self._writer(directory, batch.schema).write_batch(batch)
+
+    def write(self, batch):
+        """Append a ``pyarrow.RecordBatch`` (or Table)"""
+        if self.schema is None:
+            self.schema = batch.schema
+        elif not batch.schema.equals(self.schema):
+            raise ValueError(f"batch schema does not match the writer's:\n{batch.schema}")
+        self.rows += batch.num_rows
+        if isinstance(batch, pa.Table):
+            for chunk in batch.to_batches():
+                self._write_partitions(chunk)
+        else:
+            self._write_partitions(batch)
+
+    def _write_partitions(self, batch):
+        if not self.partition_by:
+            self._emit(self.root, batch)
+            return
+        # Group rows by the combination of partition values
+        codes, levels = [], []
+        for name in self.partition_by:
+            values = batch.column(name).to_numpy(zero_copy_only=False)
+            level, code = np.unique(values, return_inverse=True)
+            levels.append(level)
+            codes.append(code.ravel())
+        combined = np.ravel_multi_index(codes, [len(level) for level in levels]) if len(codes) > 1 else codes[0]
+        order = np.argsort(combined, kind="stable")
+        starts = np.flatnonzero(np.diff(combined[order], prepend=-1))
+        body = batch.drop_columns(self.partition_by)
+        for start, end in zip(starts, np.append(starts[1:], len(order))):
+            rows = order[start:end]
+            first = rows[0]
+            parts = [f"{name}={levels[i][codes[i][first]]}" for i, name in enumerate(self.partition_by)]
+            # Rows of one partition are usually one run, which slices without a copy
+            if rows[-1] - rows[0] + 1 == len(rows):
+                chunk = body.slice(int(rows[0]), len(rows))
+            else:
+                chunk = body.take(pa.array(rows))
+            self._emit(os.path.join(self.root, *parts), chunk)
+
+    def close(self):
+        for writer in self._writers.values():
+            writer.close()
+        self._writers.clear()
+
+    def __enter__(self) -> "ResultWriter":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_dataset(root: str, fmt: str = "parquet"):
+    """``pyarrow.dataset`` over everything written under ``root``, partition columns included"""
+    import pyarrow.dataset as ds
+
+    return ds.dataset(root, format="ipc" if fmt == "arrow" else "parquet", partitioning="hive")
+
+
+def memory_map_table(path: str):
+    """Zero-copy ``pyarrow.Table`` over one Arrow part file"""
+    return pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+
+
+def part_files(root: str, fmt: str = "parquet") -> List[str]:
+    suffix = FORMATS[fmt]
+    return sorted(
+        os.path.join(directory, name)
+        for directory, _, names in os.walk(root)
+        for name in names if name.startswith("part-") and name.endswith(suffix)
+    )
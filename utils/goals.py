@@ -0,0 +1,67 @@
+"""
+Annuity projections and the contribution-goal solver
+
+Contributions are made at the start of every month and compound at the
+monthly rate equivalent to an effective annual return, through
+``utils.allocation.annuity_factors``. Rates, horizons, amounts and targets
+broadcast against each other, so a whole grid of goals is solved in one call.
+"""
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+from utils.allocation import annuity_factors
+from utils.projections import portfolio_moments
+
+DEFAULT_GOAL_TARGETS = (100_000, 250_000, 500_000, 1_000_000, 2_000_000)
+DEFAULT_GOAL_YEARS = (5, 10, 15, 20, 25, 30, 40)
+
+
+def future_values(monthly_investments, annual_rates, years, initial=0.0) -> np.ndarray:
+    """Projected balances of monthly contributions plus an ``initial`` lump sum"""
+    annual_rates = np.asarray(annual_rates, dtype=float)
+    years = np.asarray(years, dtype=float)
+    lump_growth = np.exp(np.log1p(annual_rates) * years)
+    return np.asarray(monthly_investments, dtype=float) * annuity_factors(annual_rates, years) + initial * lump_growth
+
+
+def required_monthly_investment(targets, years, annual_rates, initial=0.0) -> np.ndarray:
+    """
+    Monthly contribution that grows to each target by its horizon
+
+    Inverts ``future_values``. Targets the ``initial`` balance already
+    reaches on its own need nothing, so the result is never negative.
+    """
+    targets = np.asarray(targets, dtype=float)
+    annual_rates = np.asarray(annual_rates, dtype=float)
+    years = np.asarray(years, dtype=float)
+    if (years <= 0).any():
+        raise ValueError("Horizons must be positive")
+    shortfall = targets - initial * np.exp(np.log1p(annual_rates) * years)
+    return np.maximum(shortfall, 0.0) / annuity_factors(annual_rates, years)
+
+
+def goal_table(
+    allocation: Dict,
+    targets: Sequence[float] = DEFAULT_GOAL_TARGETS,
+    years: Sequence[float] = DEFAULT_GOAL_YEARS,
+    initial: float = 0.0,
+    annual_rate: Optional[float] = None,
+) -> Dict:
+    """
+    Required monthly investment for every (target, horizon) pair
+
+    ``annual_rate`` defaults to the allocation's expected return from
+    ``utils.projections``. ``monthly`` is a (targets x years) list of rows.
+    """
+    if annual_rate is None:
+        annual_rate = portfolio_moments(allocation)[0]
+    monthly = required_monthly_investment(np.asarray(targets, dtype=float)[:, None], np.asarray(years)[None, :],
+                                          annual_rate, initial)
+    return {
+        "annual_rate": float(annual_rate),
+        "initial": float(initial),
+        "targets": [float(target) for target in targets],
+        "years": list(years),
+        "monthly": np.round(monthly, 2).tolist(),
+    }
@@ -0,0 +1,257 @@
+"""
+Incremental market indicators over several rolling windows
+
+``IndicatorEngine`` keeps, for every ticker and window, a sliding Welford
+mean/variance of daily log returns, a running sum of closes (moving
+average) and the window's peak close (drawdown). The peak comes from a
+monotonic queue of bar numbers with decreasing closes, kept in a ring
+buffer. Bars leave from its head when they fall out of the window, and a
+new bar pops the smaller closes off its tail. Every bar enters and leaves
+the queue once, so a new bar costs O(1) amortized per window, even in a
+steadily falling market. A tick for many tickers is one vectorized step.
+All state lives in flat arrays, so it can be snapshotted to an ``.npz``
+file and resumed later.
+"""
+import os
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+TRADING_DAYS = 252
+
+# Window name -> trading days
+DEFAULT_WINDOWS = {"1m": 21, "3m": 63, "12m": 252}
+
+# Running sums are recomputed exactly this often to bound rounding drift
+RESYNC_BARS = 4096
+
+_NO_DATE = np.iinfo(np.int64).min
+
+
+class IndicatorEngine:
+    """
+    Rolling volatility, moving-average trend and drawdown for many tickers
+
+    ``update`` takes one close per ticker (NaN where a ticker has no bar) and
+    ``feed`` catches up from a ``PriceStore`` by reading only bars newer than
+    the last one seen.
+    """
+
+    def __init__(self, tickers: Sequence[str], windows: Optional[Dict[str, int]] = None):
+        self.tickers = [ticker.upper() for ticker in tickers]
+        self.windows = dict(windows or DEFAULT_WINDOWS)
+        self._index = {ticker: i for i, ticker in enumerate(self.tickers)}
+        n, k = len(self.tickers), len(self.windows)
+        self._sizes = np.array(list(self.windows.values()), dtype=np.int64)
+        # Ring buffers one longer than the longest window, so the bar leaving
+        # a window is still readable after the new bar has been written
+        self._ring = int(self._sizes.max()) + 1
+        self.state = {
+            "bars": np.zeros(n, dtype=np.int64),
+            "last_date": np.full(n, _NO_DATE, dtype=np.int64),
+            "closes": np.zeros((n, self._ring)),
+            "returns": np.zeros((n, self._ring)),
+            "mean": np.zeros((n, k)),
+            "m2": np.zeros((n, k)),
+            "close_sum": np.zeros((n, k)),
+            "peak": np.zeros((n, k)),
+            # Monotonic queue of bar numbers per ticker and window; the head is the peak
+            "peak_queue": np.zeros((n, k, self._ring), dtype=np.int32),
+            "peak_head": np.zeros((n, k), dtype=np.int64),
+            "peak_len": np.zeros((n, k), dtype=np.int64),
+        }
+
+    def _rows(self, tickers: Optional[Sequence[str]]) -> np.ndarray:
+        if tickers is None:
+            return np.arange(len(self.tickers))
+        return np.array([self._index[ticker.upper()] for ticker in tickers], dtype=np.int64)
+
+    def update(self, closes, date=None, tickers: Optional[Sequence[str]] = None):
+        """
+        Add one bar per ticker; NaN closes are skipped
+
+        ``closes`` follows ``tickers`` (all tickers by default). ``date``
+        (a day) is recorded so ``feed`` knows where to resume.
+        """
+        rows = self._rows(tickers)
+        closes = np.asarray(closes, dtype=float)
+        present = ~np.isnan(closes)
+        rows, closes = rows[present], closes[present]
+        if not len(rows):
+            return
+        s = self.state
+        bars = s["bars"][rows]
+        ring = self._ring
+        s["closes"][rows, bars % ring] = closes
+        if date is not None:
+            s["last_date"][rows] = np.datetime64(date, "D").astype(np.int64)
+
+        for j, size in enumerate(self._sizes):
+            self._update_closes(rows, closes, bars, j, size)
+
+        # Returns need a previous close
+        has_prev = bars > 0
+        if has_prev.any():
+            r, b = rows[has_prev], bars[has_prev]
+            previous = s["closes"][r, (b - 1) % ring]
+            returns = np.log(closes[has_prev] / previous)
+            n_returns = b - 1  # returns stored before this one
+            s["returns"][r, n_returns % ring] = returns
+            for j, size in enumerate(self._sizes):
+                self._update_returns(r, returns, n_returns, j, size)
+
+        s["bars"][rows] = bars + 1
+        resync = rows[(bars + 1) % RESYNC_BARS == 0]
+        if len(resync):
+            self._resync(resync)
+
+    def _update_closes(self, rows, closes, bars, j, size):
+        s = self.state
+        full = bars >= size
+        leaving = np.where(full, s["closes"][rows, (bars - size) % self._ring], 0.0)
+        s["close_sum"][rows, j] += closes - leaving
+        ring = self._ring
+        queue = s["peak_queue"]
+        head, length = s["peak_head"][rows, j], s["peak_len"][rows, j]
+        # The head bar left the window; at most one bar leaves per update
+        expired = (length > 0) & (queue[rows, j, head] <= bars - size)
+        head = (head + expired) % ring
+        length = length - expired
+        # Pop tail bars that can no longer be the peak; each bar is popped once
+        while True:
+            tail = queue[rows, j, (head + length - 1) % ring]
+            popping = (length > 0) & (s["closes"][rows, tail % ring] <= closes)
+            if not popping.any():
+                break
+            length = length - popping
+        queue[rows, j, (head + length) % ring] = bars
+        s["peak_head"][rows, j] = head
+        s["peak_len"][rows, j] = length + 1
+        s["peak"][rows, j] = s["closes"][rows, queue[rows, j, head] % ring]
+
+    def _update_returns(self, rows, returns, n_returns, j, size):
+        s = self.state
+        mean, m2 = s["mean"][rows, j], s["m2"][rows, j]
+        full = n_returns >= size
+        # Growing window: standard Welford step with count n_returns + 1
+        count = np.minimum(n_returns + 1, size)
+        delta = returns - mean
+        grown_mean = mean + delta / count
+        grown_m2 = m2 + delta * (returns - grown_mean)
+        # Full window: replace the oldest return in one step
+        leaving = s["returns"][rows, (n_returns - size) % self._ring]
+        slid_mean = mean + (returns - leaving) / size
+        slid_m2 = m2 + (returns - leaving) * (returns - slid_mean + leaving - mean)
+        s["mean"][rows, j] = np.where(full, slid_mean, grown_mean)
+        s["m2"][rows, j] = np.maximum(np.where(full, slid_m2, grown_m2), 0.0)
+
+    def _resync(self, rows: np.ndarray):
+        """Recompute the running sums of ``rows`` exactly from their ring buffers"""
+        s = self.state
+        for row in rows:
+            bars = int(s["bars"][row])
+            for j, size in enumerate(self._sizes):
+                count = min(bars, size)
+                closes = s["closes"][row, (bars - count + np.arange(count)) % self._ring]
+                s["close_sum"][row, j] = closes.sum()
+                n_returns = max(bars - 1, 0)
+                count = min(n_returns, size)
+                returns = s["returns"][row, (n_returns - count + np.arange(count)) % self._ring]
+                s["mean"][row, j] = returns.mean() if count else 0.0
+                s["m2"][row, j] = ((returns - returns.mean()) ** 2).sum() if count else 0.0
+
+    def feed(self, store, tickers: Optional[Sequence[str]] = None) -> int:
+        """
+        Consume bars a ``PriceStore`` holds beyond what was last seen
+
+        Bars are aligned on the union of new dates, so tickers that did not
+        trade on a date simply skip it. Returns the number of dates fed.
+        """
+        tickers = [ticker.upper() for ticker in (tickers or self.tickers)]
+        rows = self._rows(tickers)
+        new = {}
+        for ticker, row in zip(tickers, rows):
+            dates, closes = store.read(ticker)
+            first = np.searchsorted(dates.view(np.int64), self.state["last_date"][row], side="right")
+            if first < len(dates):
+                new[ticker] = (np.asarray(dates[first:]), np.asarray(closes[first:]))
+        if not new:
+            return 0
+        calendar = np.unique(np.concatenate([dates for dates, _ in new.values()]))
+        matrix = np.full((len(calendar), len(tickers)), np.nan)
+        for column, ticker in enumerate(tickers):
+            if ticker in new:
+                dates, closes = new[ticker]
+                matrix[np.searchsorted(calendar, dates), column] = closes
+        for date, closes in zip(calendar, matrix):
+            self.update(closes, date, tickers)
+        return len(calendar)
+
+    def indicators(self, ticker: str) -> Dict[str, Dict]:
+        """
+        Per-window indicators for one ticker
+
+        ``volatility`` is annualized percent volatility of daily log returns,
+        ``trend`` compares the last close with the window's moving average
+        and ``drawdown`` is the percent drop from the window's peak close.
+        """
+        row = self._index[ticker.upper()]
+        s = self.state
+        bars = int(s["bars"][row])
+        if bars == 0:
+            return {}
+        close = float(s["closes"][row, (bars - 1) % self._ring])
+        result = {}
+        for j, (name, size) in enumerate(self.windows.items()):
+            n_returns = min(bars - 1, size)
+            variance = s["m2"][row, j] / (n_returns - 1) if n_returns > 1 else 0.0
+            average = s["close_sum"][row, j] / min(bars, size)
+            result[name] = {
+                "bars": min(bars, size),
+                "volatility": float(np.sqrt(variance * TRADING_DAYS) * 100),
+                "moving_average": float(average),
+                "trend": "bullish" if close > average else "bearish",
+                "drawdown": float((close / s["peak"][row, j] - 1) * 100),
+            }
+        return result
+
+    def last_date(self, ticker: str) -> Optional[np.datetime64]:
+        value = self.state["last_date"][self._index[ticker.upper()]]
+        return None if value == _NO_DATE else np.datetime64(int(value), "D")
+
+    def save(self, path: str):
+        """Atomically write the engine state to an ``.npz`` snapshot"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(temporary, tickers=np.array(self.tickers), window_names=np.array(list(self.windows)),
+                 window_sizes=self._sizes, **self.state)
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path: str, tickers: Optional[Sequence[str]] = None,
+             windows: Optional[Dict[str, int]] = None) -> "IndicatorEngine":
+        """
+        Resume from a snapshot, or start empty if it is missing, corrupt or
+        was taken with different tickers or windows
+        """
+        try:
+            with np.load(path) as stored:
+                saved_tickers: List[str] = [str(t) for t in stored["tickers"]]
+                saved_windows = dict(zip((str(w) for w in stored["window_names"]),
+                                         (int(s) for s in stored["window_sizes"])))
+                state = {name: stored[name] for name in ("bars", "last_date", "closes", "returns",
+                                                         "mean", "m2", "close_sum", "peak",
+                                                         "peak_queue", "peak_head", "peak_len")}
+        except (OSError, ValueError, KeyError):
+            return cls(tickers or [], windows)
+        engine = cls(saved_tickers, saved_windows)
+        if tickers is not None and [t.upper() for t in tickers] != saved_tickers:
+            return cls(tickers, windows)
+        if windows is not None and dict(windows) != saved_windows:
+            return cls(tickers or saved_tickers, windows)
+        if any(engine.state[name].shape != value.shape for name, value in state.items()):
+            return cls(saved_tickers, saved_windows)
+        engine.state = state
+        return engine
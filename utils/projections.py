@@ -0,0 +1,138 @@
+"""
+Monte Carlo projection engine
+
+Simulates monthly contributions into an allocation under the capital-market
+assumptions in ``utils.allocation`` and reports percentile bands of the
+ending balance for each horizon. Paths are simulated in fixed-size chunks,
+so memory stays bounded by ``chunk_size`` x months regardless of path count.
+"""
+from typing import Dict, Iterator, Sequence, Tuple
+
+import numpy as np
+
+from utils.allocation import (
+    ASSET_ASSUMPTIONS,
+    ASSET_CORRELATIONS,
+    ASSETS,
+    CASH_ASSUMPTION,
+    PROJECTION_YEARS,
+    SLEEVE_PROXIES,
+)
+
+DEFAULT_PERCENTILES = (5, 50, 95)
+
+_MEANS = np.array([ASSET_ASSUMPTIONS[asset][0] for asset in ASSETS])
+_VOLS = np.array([ASSET_ASSUMPTIONS[asset][1] for asset in ASSETS])
+ASSET_COVARIANCE = np.outer(_VOLS, _VOLS) * np.array(ASSET_CORRELATIONS)
+
+
+def allocation_weights(allocation: Dict) -> Tuple[np.ndarray, float]:
+    """
+    Convert a percentage allocation into weights over ``ASSETS`` plus a cash weight
+
+    Accepts either the seven-asset allocation from ``all_weather_portfolio_strategy``
+    or the stocks/bonds/cash allocation from ``PortfolioAgent.get_allocation``.
+    """
+    weights = np.zeros(len(ASSETS))
+    cash = 0.0
+    for name, percent in allocation.items():
+        share = percent / 100
+        if name in SLEEVE_PROXIES:
+            for asset, split in SLEEVE_PROXIES[name].items():
+                weights[ASSETS.index(asset)] += share * split
+        elif name == "cash":
+            cash += share
+        elif name in ASSETS:
+            weights[ASSETS.index(name)] += share
+        else:
+            raise KeyError(f"Unknown asset class: {name}")
+    return weights, cash
+
+
+def portfolio_moments(allocation: Dict) -> Tuple[float, float]:
+    """Annual expected return and volatility implied by an allocation"""
+    weights, cash = allocation_weights(allocation)
+    mean = weights @ _MEANS + cash * CASH_ASSUMPTION[0]
+    variance = weights @ ASSET_COVARIANCE @ weights + (cash * CASH_ASSUMPTION[1]) ** 2
+    return float(mean), float(np.sqrt(variance))
+
+
+def simulate_horizon_values(
+    allocation: Dict,
+    monthly_investment: float,
+    years: Sequence[int] = PROJECTION_YEARS,
+    n_paths: int = 10_000,
+    seed: int = 0,
+    chunk_size: int = 16_384,
+) -> Iterator[np.ndarray]:
+    """
+    Yield simulated balances one chunk at a time
+
+    Each yielded array has shape (paths in chunk, len(years)). The balance is
+    contributed at the start of every month and then grows with a lognormal
+    monthly return matching the allocation's annual mean and volatility.
+    Paths come in antithetic pairs within each chunk.
+    """
+    mean, vol = portfolio_moments(allocation)
+    monthly_vol = vol / np.sqrt(12)
+    monthly_drift = np.log1p(mean) / 12 - monthly_vol ** 2 / 2
+
+    horizons = np.array(years, dtype=int) * 12
+    months = int(horizons.max())
+    record_at = np.zeros(months + 1, dtype=int) - 1
+    record_at[horizons] = np.arange(len(horizons))
+
+    children = np.random.SeedSequence(seed).spawn((n_paths + chunk_size - 1) // chunk_size)
+    for chunk, child in enumerate(children):
+        size = min(chunk_size, n_paths - chunk * chunk_size)
+        rng = np.random.Generator(np.random.SFC64(child))
+        # Antithetic pairs halve the normal draws and reduce estimator variance
+        half = (size + 1) // 2
+        growth = np.empty((2, months, half), dtype=np.float32)
+        rng.standard_normal((months, half), dtype=np.float32, out=growth[0])
+        np.negative(growth[0], out=growth[1])
+        growth *= monthly_vol
+        growth += monthly_drift
+        np.exp(growth, out=growth)
+
+        balance = np.zeros((2, half))
+        values = np.empty((len(horizons), 2, half))
+        for month in range(months):
+            balance += monthly_investment
+            balance *= growth[:, month]
+            slot = record_at[month + 1]
+            if slot >= 0:
+                values[slot] = balance
+        yield values.reshape(len(horizons), -1)[:, :size].T
+
+
+def monte_carlo_projection(
+    allocation: Dict,
+    monthly_investment: float,
+    years: Sequence[int] = PROJECTION_YEARS,
+    n_paths: int = 10_000,
+    seed: int = 0,
+    percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+    chunk_size: int = 16_384,
+) -> Dict:
+    """
+    Percentile bands of the ending balance for each horizon
+
+    Results are reproducible for a given ``seed`` and ``chunk_size``.
+    """
+    values = np.concatenate(list(simulate_horizon_values(
+        allocation, monthly_investment, years, n_paths, seed, chunk_size
+    )))
+    bands = np.percentile(values, percentiles, axis=0)
+    mean, vol = portfolio_moments(allocation)
+    return {
+        "years": list(years),
+        "percentiles": {
+            f"P{p:g}": [round(v, 2) for v in band.tolist()]
+            for p, band in zip(percentiles, bands)
+        },
+        "total_contributed": [round(monthly_investment * 12 * y, 2) for y in years],
+        "expected_return": mean,
+        "volatility": vol,
+        "n_paths": n_paths,
+    }
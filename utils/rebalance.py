@@ -0,0 +1,143 @@
+"""
+Drift-band rebalancing orders for many accounts at once
+
+``rebalance_orders`` takes share holdings for a batch of accounts, their
+target weights, prices and this period's contribution. It returns the
+whole-share orders that bring every account back inside its drift bands
+with as little trading as possible:
+
+1. The contribution is spent on underweight assets first, in proportion to
+   how far each is below target. Most accounts are back in band without
+   selling anything.
+2. Accounts still outside a band move each offending asset only to the edge
+   of its band. The cash that frees up (or uses) is absorbed by assets on the
+   other side of their targets, and no asset is pushed past its target.
+3. Orders are rounded to whole lots: buys down and sells up, so no account
+   ever needs more cash than it has. Leftover cash buys whole lots of the
+   most underweight asset.
+
+Every step is an array operation over (accounts x assets).
+"""
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+from utils.backtest import ETF_PROXIES, allocation_matrix
+
+DEFAULT_DRIFT_THRESHOLD = 0.05  # "Monitor for 5% asset drift"
+
+# Absorbs float error when a trade is an exact whole number of lots
+_ROUNDING_SLACK = 1e-9
+
+
+def target_weights(
+    allocations: Union[Dict, Sequence[Dict]],
+    columns: Sequence[str],
+    proxies: Optional[Dict[str, Dict[str, float]]] = ETF_PROXIES,
+) -> np.ndarray:
+    """(accounts x columns) weights from percent allocations, e.g. ``get_allocation`` output"""
+    return allocation_matrix(allocations, columns, proxies)
+
+
+def _spread(amount: np.ndarray, capacity: np.ndarray) -> np.ndarray:
+    """Split each row's ``amount`` across its ``capacity`` proportionally, never exceeding it"""
+    total = capacity.sum(axis=1, keepdims=True)
+    share = np.divide(capacity, total, out=np.zeros_like(capacity), where=total > 0)
+    return np.minimum(share * amount[:, None], capacity)
+
+
+def rebalance_orders(
+    holdings,
+    targets,
+    prices,
+    contributions=0.0,
+    drift_threshold: float = DEFAULT_DRIFT_THRESHOLD,
+    lot_size=1.0,
+) -> Dict[str, np.ndarray]:
+    """
+    Whole-lot orders per account and asset
+
+    ``holdings`` is (accounts x assets) shares and ``targets`` is the matching
+    weights (rows sum to one). ``prices`` and ``lot_size`` are per asset,
+    or per account and asset. ``contributions`` is new cash per account.
+    ``drift_threshold`` is the allowed absolute weight deviation.
+
+    Returns ``shares`` (signed order sizes), ``notional`` (signed dollars),
+    ``cash_left`` (uninvested cash), ``sold`` (accounts that needed sells),
+    ``drift_before`` and ``drift_after`` (largest absolute weight deviation
+    before trading, counting the contribution as cash, and after trading).
+    """
+    holdings = np.asarray(holdings, dtype=float)
+    targets = np.asarray(targets, dtype=float)
+    n, m = holdings.shape
+    prices = np.broadcast_to(np.asarray(prices, dtype=float), (n, m))
+    lots = np.broadcast_to(np.asarray(lot_size, dtype=float), (n, m))
+    cash = np.broadcast_to(np.asarray(contributions, dtype=float), (n,)).copy()
+    if (prices <= 0).any():
+        raise ValueError("Prices must be positive")
+
+    values = holdings * prices
+    total = values.sum(axis=1) + cash
+    safe_total = np.where(total > 0, total, 1.0)
+    target_values = targets * total[:, None]
+    drift_before = np.abs(values / safe_total[:, None] - targets).max(axis=1)
+
+    # 1. Contributions go to underweight assets first, the rest by target weight
+    gap = np.maximum(target_values - values, 0.0)
+    fill = _spread(cash, gap)
+    fill += targets * (cash - fill.sum(axis=1))[:, None]
+    after_fill = values + fill
+
+    # 2. Accounts still out of band: move offending assets to their band edge
+    low = np.maximum(targets - drift_threshold, 0.0) * total[:, None]
+    high = (targets + drift_threshold) * total[:, None]
+    out_of_band = ((after_fill < low) | (after_fill > high)).any(axis=1)
+    desired = after_fill.copy()
+    if out_of_band.any():
+        edge = np.clip(after_fill[out_of_band], low[out_of_band], high[out_of_band])
+        target_out = target_values[out_of_band]
+        residual = total[out_of_band] - edge.sum(axis=1)
+        # Spare cash buys below-target assets; a shortfall sells above-target ones
+        edge += _spread(np.maximum(residual, 0.0), np.maximum(target_out - edge, 0.0))
+        edge -= _spread(np.maximum(-residual, 0.0), np.maximum(edge - target_out, 0.0))
+        desired[out_of_band] = edge
+
+    # 3. Whole lots: buys round down, sells round up (never past the holding)
+    exact = (desired - values) / prices / lots
+    shares = np.where(exact > 0, np.floor(exact + _ROUNDING_SLACK), -np.ceil(-exact - _ROUNDING_SLACK)) * lots
+    shares = np.maximum(shares, -holdings)
+    cash_left = cash - (shares * prices).sum(axis=1)
+
+    # Spend leftover cash on whole lots of the most underweight asset
+    final_values = (holdings + shares) * prices
+    underweight = np.argmax(target_values - final_values, axis=1)
+    rows = np.arange(n)
+    lot_cost = prices[rows, underweight] * lots[rows, underweight]
+    extra = np.floor(np.maximum(cash_left, 0.0) / lot_cost + _ROUNDING_SLACK)
+    shares[rows, underweight] += extra * lots[rows, underweight]
+    cash_left -= extra * lot_cost
+
+    final_values = (holdings + shares) * prices
+    drift_after = np.abs(final_values / safe_total[:, None] - targets).max(axis=1)
+    return {
+        "shares": shares,
+        "notional": shares * prices,
+        "cash_left": cash_left,
+        "sold": (shares < 0).any(axis=1),
+        "drift_before": drift_before,
+        "drift_after": drift_after,
+    }
+
+
+def account_orders(result: Dict[str, np.ndarray], account: int, columns: Sequence[str]) -> List[Dict]:
+    """Non-zero orders for one account as readable rows"""
+    orders = []
+    for column, shares, notional in zip(columns, result["shares"][account], result["notional"][account]):
+        if shares:
+            orders.append({
+                "ticker": column,
+                "side": "buy" if shares > 0 else "sell",
+                "shares": float(abs(shares)),
+                "notional": float(abs(notional)),
+            })
+    return orders
@@ -0,0 +1,171 @@
+"""
+Regime-switching simulation over the four growth/inflation quadrants
+
+The economy moves between the four ``ECONOMIC_SCENARIOS`` as a monthly
+Markov chain. Each regime has its own asset return and volatility
+assumptions. Given an allocation, every path simulates a regime sequence
+and the portfolio's monthly returns under it. The engine then reports the
+portfolio's annualized return, volatility and worst drawdown conditional on
+each regime. All paths advance together, one month per array step.
+"""
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from utils.allocation import ASSET_ASSUMPTIONS, ASSET_CORRELATIONS, ASSETS, ECONOMIC_SCENARIOS
+from utils.projections import allocation_weights
+
+REGIMES = [scenario["name"] for scenario in ECONOMIC_SCENARIOS]
+
+# Monthly transition probabilities, rows = from, columns = to, in ``REGIMES`` order
+REGIME_TRANSITIONS = np.array([
+    [0.94, 0.02, 0.03, 0.01],
+    [0.02, 0.95, 0.01, 0.02],
+    [0.03, 0.01, 0.93, 0.03],
+    [0.01, 0.03, 0.02, 0.94],
+])
+
+# Annual expected return per asset in each regime, in ``REGIMES`` order
+REGIME_RETURNS = {
+    "US Stocks": (0.06, 0.13, -0.04, 0.02),
+    "International Stocks": (0.07, 0.12, -0.05, 0.01),
+    "Long-Term US Treasuries": (-0.03, 0.05, -0.02, 0.12),
+    "Intermediate-Term Treasuries": (0.00, 0.04, 0.00, 0.07),
+    "Treasury Inflation-Protected Securities (TIPS)": (0.06, 0.03, 0.07, 0.02),
+    "Gold": (0.08, 0.00, 0.12, 0.03),
+    "Commodities": (0.14, -0.01, 0.10, -0.08),
+}
+REGIME_CASH_RETURNS = (0.040, 0.025, 0.035, 0.015)
+
+# Long-run volatilities are scaled by regime; stressed regimes are more volatile
+REGIME_VOL_MULTIPLIERS = (1.00, 0.85, 1.30, 1.20)
+
+DEFAULT_MONTHS = 120
+
+# Transitions are drawn from a lookup table indexed by a uniform integer;
+# probabilities resolve to 1 / TRANSITION_RESOLUTION
+TRANSITION_RESOLUTION = 10_000
+
+
+def stationary_distribution(transitions: np.ndarray = REGIME_TRANSITIONS) -> np.ndarray:
+    """Long-run share of months spent in each regime"""
+    values, vectors = np.linalg.eig(transitions.T)
+    vector = np.real(vectors[:, np.argmin(np.abs(values - 1))])
+    return vector / vector.sum()
+
+
+def transition_table(transitions: np.ndarray = REGIME_TRANSITIONS) -> np.ndarray:
+    """(regimes x TRANSITION_RESOLUTION) next regime for each current regime and uniform draw"""
+    draws = (np.arange(TRANSITION_RESOLUTION) + 0.5) / TRANSITION_RESOLUTION
+    cumulative = np.cumsum(transitions, axis=1)
+    table = np.stack([np.searchsorted(row, draws, side="right") for row in cumulative])
+    return np.minimum(table, len(transitions) - 1).astype(np.int8)
+
+
+_TRANSITION_TABLE = transition_table()
+
+
+def regime_moments(allocation: Dict) -> np.ndarray:
+    """(regimes x 2) monthly log drift and volatility of an allocation in each regime"""
+    weights, cash = allocation_weights(allocation)
+    vols = np.array([ASSET_ASSUMPTIONS[asset][1] for asset in ASSETS])
+    correlations = np.array(ASSET_CORRELATIONS)
+    moments = np.empty((len(REGIMES), 2))
+    for regime, multiplier in enumerate(REGIME_VOL_MULTIPLIERS):
+        means = np.array([REGIME_RETURNS[asset][regime] for asset in ASSETS])
+        scaled = vols * multiplier
+        mean = weights @ means + cash * REGIME_CASH_RETURNS[regime]
+        variance = weights @ (np.outer(scaled, scaled) * correlations) @ weights
+        monthly_vol = np.sqrt(variance / 12)
+        moments[regime] = (np.log1p(mean) / 12 - monthly_vol ** 2 / 2, monthly_vol)
+    return moments
+
+
+def best_performers(regime: int, top: int = 3) -> List[str]:
+    """Assets with the highest expected return in a regime"""
+    ranked = sorted(ASSETS, key=lambda asset: -REGIME_RETURNS[asset][regime])
+    return ranked[:top]
+
+
+def simulate_regimes(
+    allocation: Dict,
+    n_paths: int = 2_000,
+    months: int = DEFAULT_MONTHS,
+    seed: int = 0,
+    start: Optional[int] = None,
+    drawdown_percentile: float = 5.0,
+) -> Dict:
+    """
+    Portfolio statistics conditional on each regime
+
+    Paths start in regime ``start``, or are drawn from the stationary
+    distribution. Paths come in antithetic pairs (``n_paths`` rounds up to
+    even) that share a regime sequence and have mirrored return shocks. For each regime the result holds the
+    share of simulated months spent in it, the annualized mean return and
+    volatility of those months, and ``worst_drawdown``: the
+    ``drawdown_percentile`` percentile, across paths, of the deepest
+    peak-to-trough loss inside any spell of that regime.
+    """
+    rng = np.random.default_rng(seed)
+    # Paths run in float32: the statistics are reported to basis points and
+    # the arrays are bandwidth-bound
+    moments = regime_moments(allocation).astype(np.float32)
+    drift, vol = moments[:, 0], moments[:, 1]
+    n_regimes = len(REGIMES)
+    half = (n_paths + 1) // 2
+
+    # Regime chain: (months x pairs), one table lookup per month
+    chain = np.empty((months, half), dtype=np.int8)
+    if start is None:
+        chain[0] = rng.choice(n_regimes, size=half, p=stationary_distribution())
+    else:
+        chain[0] = start
+    draws = rng.integers(TRANSITION_RESOLUTION, size=(months, half), dtype=np.int16)
+    for month in range(1, months):
+        chain[month] = _TRANSITION_TABLE[chain[month - 1], draws[month]]
+    shocks = rng.standard_normal((months, half), dtype=np.float32)
+
+    # Antithetic pairs share the chain, so everything indexed by regime is
+    # computed once on (months x half) and broadcast over the pair axis
+    step_drift = np.take(drift, chain)
+    step_vol = np.take(vol, chain)
+    steps = np.stack([step_drift + step_vol * shocks, step_drift - step_vol * shocks])
+    wealth = np.cumsum(steps, axis=1)  # log wealth after each month
+
+    # Peaks restart with every spell: offsetting each spell above the previous
+    # one lets a single running max along time act as a per-spell max
+    spell_start = np.ones(chain.shape, dtype=bool)
+    spell_start[1:] = chain[1:] != chain[:-1]
+    offset = np.cumsum(spell_start, axis=0, dtype=np.float32) * (2 * np.abs(wealth).max() + 1)
+    candidate = np.where(spell_start, np.maximum(wealth - steps, wealth), wealth)
+    drawdown = wealth - (np.maximum.accumulate(candidate + offset, axis=1) - offset)
+
+    simple = np.expm1(steps)
+    months_in = 2 * np.bincount(chain.ravel(), minlength=n_regimes)
+    return_sum = np.bincount(chain.ravel(), weights=(simple[0] + simple[1]).ravel(), minlength=n_regimes)
+    squares = (simple * simple).sum(axis=0)
+    return_sq = np.bincount(chain.ravel(), weights=squares.ravel(), minlength=n_regimes)
+    total = 2 * months * half
+
+    # Deepest drawdown per (regime, path); regimes a path never visits stay inf
+    worst = np.full((n_regimes, 2, half), np.inf, dtype=np.float32)
+    cells = (chain.astype(np.intp) * 2 * half + np.arange(half)).ravel()
+    flat_worst = worst.reshape(-1)
+    for pair in range(2):
+        np.minimum.at(flat_worst, cells + pair * half, drawdown[pair].ravel())
+
+    regimes = []
+    for regime, name in enumerate(REGIMES):
+        count = months_in[regime]
+        mean = return_sum[regime] / count if count else 0.0
+        variance = return_sq[regime] / count - mean ** 2 if count else 0.0
+        visited = worst[regime][np.isfinite(worst[regime])]
+        regimes.append({
+            "name": name,
+            "time_share": float(count / total),
+            "expected_return": float((1 + mean) ** 12 - 1),
+            "volatility": float(np.sqrt(max(variance, 0.0) * 12)),
+            "worst_drawdown": float(np.expm1(np.percentile(visited, drawdown_percentile))) if visited.size else 0.0,
+            "best_performers": best_performers(regime),
+        })
+    return {"regimes": regimes, "n_paths": 2 * half, "months": months}
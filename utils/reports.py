@@ -0,0 +1,392 @@
+"""
+Portfolio report rendering in Markdown, HTML and JSON
+
+``build_report`` turns a ``generate_portfolio`` result into a plain report
+model: every derived figure (volatility level, per-sleeve monthly amounts,
+growth bands) is computed exactly once. Each output format is a template
+compiled once at import into literal chunks and field lookups, so rendering
+a report is a single pass of lookups and ``format`` calls. ``stream_reports``
+writes any number of reports into one file as they are produced.
+"""
+import html
+import json
+import string
+from typing import IO, Callable, Dict, Iterable, List, Optional, Union
+
+from utils.lazy import lazy_import
+
+projections = lazy_import("utils.projections")
+
+FORMATS = ("markdown", "html", "json")
+
+SLEEVES = {
+    "stocks": {"label": "Stocks", "icon": "📈", "etfs": "VTI (70%), VXUS (30%)"},
+    "bonds": {"label": "Bonds", "icon": "🏛️", "etfs": "BND (80%), BNDX (20%)"},
+    "cash": {"label": "Cash", "icon": "💵", "etfs": "VMFXX"},
+}
+
+
+def _field_getter(field: str) -> Callable[[Dict], object]:
+    """Lookup for a dotted field such as ``growth.P5.0`` (digits index lists)"""
+    keys = [int(part) if part.isdigit() else part for part in field.split(".")]
+
+    def get(context):
+        value = context
+        for key in keys:
+            value = value[key]
+        return value
+
+    return get
+
+
+class CompiledTemplate:
+    """
+    A ``str.format``-style template parsed once
+
+    Fields are dotted paths into the report model, e.g. ``{market.volatility:.2f}``.
+    ``escape`` is applied to every substituted value, never to the literal text.
+    """
+
+    __slots__ = ("source", "escape", "_parts")
+
+    def __init__(self, source: str, escape: Optional[Callable[[str], str]] = None):
+        self.source = source
+        self.escape = escape
+        self._parts = [
+            (literal, _field_getter(field) if field else None, spec or "")
+            for literal, field, spec, _ in string.Formatter().parse(source)
+        ]
+
+    def render(self, context: Dict) -> str:
+        out: List[str] = []
+        append = out.append
+        escape = self.escape
+        for literal, get, spec in self._parts:
+            append(literal)
+            if get is not None:
+                value = format(get(context), spec)
+                append(escape(value) if escape else value)
+        return "".join(out)
+
+
+MARKDOWN_TEMPLATE = """\
+# 🎯 All-Weather Portfolio Report
+
+## 📊 Market Analysis
+{market_section}
+---
+
+## 💼 Portfolio Allocation
+- **Risk Profile**: {profile.risk_profile}
+- **Age**: {profile.age}
+- **Monthly Investment**: ${profile.monthly_investment:.2f}
+
+```mermaid
+pie title Asset Allocation
+    "Stocks" : {allocation.stocks.percent:.1f}
+    "Bonds" : {allocation.bonds.percent:.1f}
+    "Cash" : {allocation.cash.percent:.1f}
+```
+
+### 🔍 Detailed Breakdown:
+| Asset Class  | Allocation (%) | Recommended ETFs | Monthly Investment |
+|-------------|--------------|------------------|--------------------|
+| **Stocks** 📈 | {allocation.stocks.percent:.1f}% | {allocation.stocks.etfs} | ${allocation.stocks.monthly:.2f} |
+| **Bonds** 🏛️ | {allocation.bonds.percent:.1f}% | {allocation.bonds.etfs} | ${allocation.bonds.monthly:.2f} |
+| **Cash** 💵 | {allocation.cash.percent:.1f}% | {allocation.cash.etfs} | ${allocation.cash.monthly:.2f} |
+
+---
+
+## 📈 Investment Growth Projection
+- Starting Monthly Investment: **${profile.monthly_investment:.2f}**
+
+```mermaid
+graph LR
+    A[Start] --> B[{growth.years.0} Years]
+    B --> C[{growth.years.1} Years]
+    C --> D[{growth.years.2} Years]
+```
+
+**Growth Estimates** ({growth.n_paths:,} simulated paths, {growth.expected_return:.1f}% expected return, {growth.volatility:.1f}% volatility):
+- 📉 **Pessimistic (5th percentile)**:
+  - {growth.years.0} Years: **${growth.P5.0:.2f}**
+  - {growth.years.1} Years: **${growth.P5.1:.2f}**
+  - {growth.years.2} Years: **${growth.P5.2:.2f}**
+
+- 📊 **Median (50th percentile)**:
+  - {growth.years.0} Years: **${growth.P50.0:.2f}**
+  - {growth.years.1} Years: **${growth.P50.1:.2f}**
+  - {growth.years.2} Years: **${growth.P50.2:.2f}**
+
+- 🚀 **Optimistic (95th percentile)**:
+  - {growth.years.0} Years: **${growth.P95.0:.2f}**
+  - {growth.years.1} Years: **${growth.P95.1:.2f}**
+  - {growth.years.2} Years: **${growth.P95.2:.2f}**
+
+---
+
+## 📝 Implementation Plan
+### ✅ Step 1: Account Setup
+- 🏦 Open brokerage account (**Vanguard, Fidelity, Schwab**)
+- 🔄 Set up **${profile.monthly_investment:.2f}** automatic monthly investments
+- 🔁 Enable **Dividend Reinvestment (DRIP)**
+
+### 🔄 Step 2: Rebalancing Strategy
+- ✅ Monitor for **5% asset drift**
+- 🔁 Adjust portfolio every **quarter**
+- 📊 Review market & personal financial changes
+
+---
+
+## 🛡 Risk Management
+- ✅ **Diversification** across multiple asset classes
+- 🔄 **Regular Rebalancing** to maintain risk
+- 📉 **Dollar-Cost Averaging** for market fluctuations
+- 🏦 **Emergency Fund** maintained at **{allocation.cash.percent:.1f}%**
+
+---
+
+## 📚 Recommended Reading
+- 📖 [Bridgewater All-Weather Portfolio](https://www.bridgewater.com/research-and-insights/the-all-weather-story)
+- 📖 [Bogleheads Investment Philosophy](https://www.bogleheads.org/wiki/Bogleheads®_investment_philosophy)
+- 📖 [Risk Parity Explained](https://www.investopedia.com/terms/r/risk-parity.asp)
+
+🚀 **Take Action Now!** 🏦 Open your brokerage, set up investments, and grow your wealth!
+"""
+
+HTML_TEMPLATE = """\
+<article class="all-weather-report">
+<h1>🎯 All-Weather Portfolio Report</h1>
+<h2>📊 Market Analysis</h2>
+{market_section}<h2>💼 Portfolio Allocation</h2>
+<ul>
+<li><strong>Risk Profile</strong>: {profile.risk_profile}</li>
+<li><strong>Age</strong>: {profile.age}</li>
+<li><strong>Monthly Investment</strong>: ${profile.monthly_investment:.2f}</li>
+</ul>
+<table>
+<thead><tr><th>Asset Class</th><th>Allocation (%)</th><th>Recommended ETFs</th><th>Monthly Investment</th></tr></thead>
+<tbody>
+<tr><td><strong>Stocks</strong> 📈</td><td>{allocation.stocks.percent:.1f}%</td><td>{allocation.stocks.etfs}</td><td>${allocation.stocks.monthly:.2f}</td></tr>
+<tr><td><strong>Bonds</strong> 🏛️</td><td>{allocation.bonds.percent:.1f}%</td><td>{allocation.bonds.etfs}</td><td>${allocation.bonds.monthly:.2f}</td></tr>
+<tr><td><strong>Cash</strong> 💵</td><td>{allocation.cash.percent:.1f}%</td><td>{allocation.cash.etfs}</td><td>${allocation.cash.monthly:.2f}</td></tr>
+</tbody>
+</table>
+<h2>📈 Investment Growth Projection</h2>
+<p>Growth estimates from {growth.n_paths:,} simulated paths, {growth.expected_return:.1f}% expected return, {growth.volatility:.1f}% volatility.</p>
+<table>
+<thead><tr><th>Horizon</th><th>📉 Pessimistic (P5)</th><th>📊 Median (P50)</th><th>🚀 Optimistic (P95)</th></tr></thead>
+<tbody>
+<tr><td>{growth.years.0} Years</td><td>${growth.P5.0:.2f}</td><td>${growth.P50.0:.2f}</td><td>${growth.P95.0:.2f}</td></tr>
+<tr><td>{growth.years.1} Years</td><td>${growth.P5.1:.2f}</td><td>${growth.P50.1:.2f}</td><td>${growth.P95.1:.2f}</td></tr>
+<tr><td>{growth.years.2} Years</td><td>${growth.P5.2:.2f}</td><td>${growth.P50.2:.2f}</td><td>${growth.P95.2:.2f}</td></tr>
+</tbody>
+</table>
+<h2>📝 Implementation Plan</h2>
+<h3>✅ Step 1: Account Setup</h3>
+<ul>
+<li>🏦 Open brokerage account (<strong>Vanguard, Fidelity, Schwab</strong>)</li>
+<li>🔄 Set up <strong>${profile.monthly_investment:.2f}</strong> automatic monthly investments</li>
+<li>🔁 Enable <strong>Dividend Reinvestment (DRIP)</strong></li>
+</ul>
+<h3>🔄 Step 2: Rebalancing Strategy</h3>
+<ul>
+<li>✅ Monitor for <strong>5% asset drift</strong></li>
+<li>🔁 Adjust portfolio every <strong>quarter</strong></li>
+<li>📊 Review market &amp; personal financial changes</li>
+</ul>
+<h2>🛡 Risk Management</h2>
+<ul>
+<li>✅ <strong>Diversification</strong> across multiple asset classes</li>
+<li>🔄 <strong>Regular Rebalancing</strong> to maintain risk</li>
+<li>📉 <strong>Dollar-Cost Averaging</strong> for market fluctuations</li>
+<li>🏦 <strong>Emergency Fund</strong> maintained at <strong>{allocation.cash.percent:.1f}%</strong></li>
+</ul>
+<h2>📚 Recommended Reading</h2>
+<ul>
+<li><a href="https://www.bridgewater.com/research-and-insights/the-all-weather-story">Bridgewater All-Weather Portfolio</a></li>
+<li><a href="https://www.bogleheads.org/wiki/Bogleheads®_investment_philosophy">Bogleheads Investment Philosophy</a></li>
+<li><a href="https://www.investopedia.com/terms/r/risk-parity.asp">Risk Parity Explained</a></li>
+</ul>
+</article>
+"""
+
+MARKDOWN_MARKET = """\
+- **Volatility Level**: {market.volatility_level} ({market.volatility:.2f}%)
+- **Market Trend**: 🚀 {market.trend_label}
+- **Market Outlook**: {market.outlook_icon} {market.outlook}
+"""
+
+MARKDOWN_MARKET_UNAVAILABLE = """\
+- ⚠️ **{market.error}**
+- **Market Outlook**: 📉 Good time for dollar-cost averaging
+"""
+
+HTML_MARKET = """\
+<ul>
+<li><strong>Volatility Level</strong>: {market.volatility_level} ({market.volatility:.2f}%)</li>
+<li><strong>Market Trend</strong>: 🚀 {market.trend_label}</li>
+<li><strong>Market Outlook</strong>: {market.outlook_icon} {market.outlook}</li>
+</ul>
+"""
+
+HTML_MARKET_UNAVAILABLE = """\
+<ul>
+<li>⚠️ <strong>{market.error}</strong></li>
+<li><strong>Market Outlook</strong>: 📉 Good time for dollar-cost averaging</li>
+</ul>
+"""
+
+HTML_HEADER = """\
+<!DOCTYPE html>
+<html lang="en">
+<head><meta charset="utf-8"><title>All-Weather Portfolio Reports</title></head>
+<body>
+"""
+
+HTML_FOOTER = "</body>\n</html>\n"
+
+
+def _render_json(model: Dict) -> str:
+    return json.dumps(model, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+def _compile_report(source: str, market: str, unavailable: str,
+                    escape: Optional[Callable[[str], str]] = None) -> Callable[[Dict], str]:
+    """
+    Renderer for a report template with a ``{market_section}`` placeholder
+
+    The market section has its own template for when market data could not
+    be fetched; the report is split around it so the rendered section is
+    spliced in verbatim rather than escaped a second time.
+    """
+    before, after = source.split("{market_section}")
+    before, after = CompiledTemplate(before, escape), CompiledTemplate(after, escape)
+    market, unavailable = CompiledTemplate(market, escape), CompiledTemplate(unavailable, escape)
+
+    def render(model: Dict) -> str:
+        section = market if model["market"]["available"] else unavailable
+        return before.render(model) + section.render(model) + after.render(model)
+
+    return render
+
+
+# format -> (render one model, document header, separator between reports, document footer)
+_RENDERERS = {
+    "markdown": (_compile_report(MARKDOWN_TEMPLATE, MARKDOWN_MARKET, MARKDOWN_MARKET_UNAVAILABLE),
+                 "", "\n---\n\n", ""),
+    "html": (_compile_report(HTML_TEMPLATE, HTML_MARKET, HTML_MARKET_UNAVAILABLE, escape=html.escape),
+             HTML_HEADER, "", HTML_FOOTER),
+    "json": (_render_json, "", "", ""),  # one object per line when streamed
+}
+
+
+def _renderer(fmt: str):
+    try:
+        return _RENDERERS[fmt]
+    except KeyError:
+        raise ValueError(f"Unknown report format {fmt!r}; choose from {', '.join(FORMATS)}") from None
+
+
+def volatility_level(volatility: float) -> str:
+    return "Low" if volatility < 15 else "Moderate" if volatility < 25 else "High"
+
+
+def market_summary(market: Dict) -> Dict:
+    """Report fields for a market analysis, or an unavailable marker if it failed"""
+    if "error" in market or "volatility" not in market:
+        return {"available": False, "error": market.get("error", "Market data unavailable")}
+    volatility = market["volatility"]
+    bullish = market["trend"] == "bullish"
+    summary = {
+        "available": True,
+        "volatility": volatility,
+        "volatility_level": volatility_level(volatility),
+        "trend": market["trend"],
+        "trend_label": market["trend"].title(),
+        "outlook": "Favorable for gradual entry" if bullish else "Good time for dollar-cost averaging",
+        "outlook_icon": "📈" if bullish else "📉",
+    }
+    if "as_of" in market:
+        summary["as_of"] = market["as_of"]
+    return summary
+
+
+def build_report(result: Dict) -> Dict:
+    """
+    Structured report model for a ``generate_portfolio`` result
+
+    Simulates the growth bands if the result does not already carry them.
+    A failed market analysis is reported as unavailable rather than raising.
+    The model holds only JSON types, so it is also the JSON output.
+    """
+    allocation = result["allocation"]
+    summary = result["summary"]
+    market = result["market_analysis"]
+    monthly = summary["monthly_investment"]
+    projection = result.get("projections") or projections.monte_carlo_projection(allocation, monthly)
+    bands = projection["percentiles"]
+
+    return {
+        "market": market_summary(market),
+        "profile": {
+            "risk_profile": summary["risk_profile"],
+            "age": summary["age"],
+            "monthly_investment": monthly,
+        },
+        "allocation": {
+            sleeve: {
+                **details,
+                "percent": allocation[sleeve],
+                "monthly": monthly * allocation[sleeve] / 100,
+            }
+            for sleeve, details in SLEEVES.items()
+        },
+        "growth": {
+            "n_paths": projection["n_paths"],
+            "expected_return": projection["expected_return"] * 100,
+            "volatility": projection["volatility"] * 100,
+            "years": list(projection["years"]),
+            "P5": list(bands["P5"]),
+            "P50": list(bands["P50"]),
+            "P95": list(bands["P95"]),
+            "total_contributed": list(projection["total_contributed"]),
+        },
+    }
+
+
+def render_model(model: Dict, fmt: str = "markdown") -> str:
+    """Render a report model as one standalone document"""
+    render, header, _, footer = _renderer(fmt)
+    return header + render(model) + footer
+
+
+def render_report(result: Dict, fmt: str = "markdown") -> str:
+    """Render a ``generate_portfolio`` result as one standalone document"""
+    return render_model(build_report(result), fmt)
+
+
+def stream_reports(results: Iterable[Dict], output: Union[str, IO[str]], fmt: str = "markdown",
+                   models: bool = False) -> int:
+    """
+    Write every report from ``results`` into one document and return the count
+
+    Results are consumed one at a time, so a generator of any length renders
+    in constant memory. ``output`` is a path or an open text file. Pass
+    ``models=True`` when ``results`` already yields report models.
+    """
+    render, header, separator, footer = _renderer(fmt)
+    if isinstance(output, str):
+        with open(output, "w", encoding="utf-8") as handle:
+            return stream_reports(results, handle, fmt, models)
+
+    write = output.write
+    write(header)
+    count = 0
+    for item in results:
+        if count and separator:
+            write(separator)
+        write(render(item if models else build_report(item)))
+        count += 1
+    write(footer)
+    return count
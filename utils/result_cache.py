@@ -0,0 +1,174 @@
+"""
+Shared, persistent result cache for portfolio generation
+
+The input space of the generator is tiny (ages 18-100, three risk levels and
+a handful of common investment amounts), so one process-wide cache keyed by
+normalized inputs serves most requests across all sessions. Entries are
+evicted least-recently-used first and expire after ``ttl`` seconds. The
+cache is written to a JSON file so warm state survives restarts.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from utils.allocation import RISK_MULTIPLIERS
+from utils.tracing import tracer
+
+DEFAULT_CACHE_PATH = os.environ.get("ALL_WEATHER_CACHE_PATH", "data/portfolio_cache.json")
+
+
+def portfolio_key(age, risk_tolerance, monthly_investment, *extra) -> str:
+    """
+    Canonical cache key for one set of generator inputs
+
+    Unknown risk levels behave like "Moderate" in the strategy, so they share
+    its key; amounts are compared to the cent.
+    """
+    age = float(age)
+    risk = risk_tolerance if risk_tolerance in RISK_MULTIPLIERS else "Moderate"
+    parts = [int(age) if age.is_integer() else age, risk, round(float(monthly_investment), 2), *extra]
+    return json.dumps(parts, separators=(",", ":"))
+
+
+class ResultCache:
+    """
+    LRU + TTL cache of JSON-serializable results with file persistence
+
+    Writes are batched: the file is rewritten at most every
+    ``autosave_interval`` seconds, and once more at interpreter exit.
+    Lookups are counted by the tracer under the ``name`` label.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = DEFAULT_CACHE_PATH,
+        max_entries: int = 4096,
+        ttl: float = 24 * 3600,
+        autosave_interval: float = 5.0,
+        clock: Callable[[], float] = time.time,
+        name: str = "result",
+    ):
+        self.path = path
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.autosave_interval = autosave_interval
+        self.clock = clock
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (stored_at, value)
+        self._lock = threading.RLock()
+        self._dirty = False
+        self._saved_at = clock()
+        self.metrics = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+        if path:
+            self.load()
+            atexit.register(self.save)
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is not None and self.clock() - item[0] > self.ttl:
+                del self._entries[key]
+                self.metrics["expirations"] += 1
+                self._dirty = True
+                item = None
+            if item is None:
+                self.metrics["misses"] += 1
+            else:
+                self._entries.move_to_end(key)
+                self.metrics["hits"] += 1
+        tracer.cache(self.name, hit=item is not None)
+        return None if item is None else item[1]
+
+    def put(self, key: str, value: Any):
+        with self._lock:
+            self._entries[key] = (self.clock(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.metrics["evictions"] += 1
+            self._dirty = True
+        if self.path and self.clock() - self._saved_at >= self.autosave_interval:
+            self.save()
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any]) -> Any:
+        """Return the cached value for ``key``, computing and storing it on a miss"""
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._dirty = True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.metrics["hits"] + self.metrics["misses"]
+            return {
+                **self.metrics,
+                "entries": len(self._entries),
+                "hit_rate": self.metrics["hits"] / lookups if lookups else 0.0,
+            }
+
+    def load(self):
+        """Merge unexpired entries from ``path``; a missing or corrupt file is ignored"""
+        try:
+            with open(self.path) as handle:
+                stored = json.load(handle)
+        except (OSError, ValueError):
+            return
+        now = self.clock()
+        with self._lock:
+            for key, stored_at, value in stored.get("entries", []):
+                if now - stored_at <= self.ttl:
+                    self._entries[key] = (stored_at, value)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def save(self):
+        """Atomically write the cache to ``path`` if anything changed"""
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            payload = {"entries": [[key, stored_at, value] for key, (stored_at, value) in self._entries.items()]}
+            self._dirty = False
+            self._saved_at = self.clock()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary = f"{self.path}.{os.getpid()}.tmp"
+        with open(temporary, "w") as handle:
+            json.dump(payload, handle, separators=(",", ":"))
+        os.replace(temporary, self.path)
+
+
+_shared: Optional[ResultCache] = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_cache() -> ResultCache:
+    """
+    The process-wide cache at ``DEFAULT_CACHE_PATH``
+
+    Lives in this module rather than in app.py because Streamlit re-executes
+    the app script on every rerun, which would rebuild a script-level cache.
+    """
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = ResultCache()
+            tracer.metrics.register_collector(_shared_cache_gauges)
+        return _shared
+
+
+def _shared_cache_gauges():
+    for name, value in _shared.stats().items():
+        yield "all_weather_result_cache", {"stat": name}, value
@@ -0,0 +1,201 @@
+"""
+Compact in-memory form of portfolio results
+
+``all_weather_portfolio_strategy`` and ``generate_portfolio`` return nested
+dicts. Every result repeats the asset names as keys, boxes each number as a
+Python float and carries its own copy of the scenario text and ETF lists.
+The records here hold the numbers in float arrays indexed by a fixed asset
+order. They share one instance of every piece of metadata and use
+``__slots__`` instead of instance dicts. ``to_dict`` rebuilds the original
+shape exactly, so records can stand in for results held in bulk and be
+expanded only when one is displayed or serialized.
+"""
+import functools
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from utils.allocation import ASSETS, ECONOMIC_SCENARIOS, PROJECTION_RATES, PROJECTION_YEARS
+from utils.lazy import lazy_import
+
+reports = lazy_import("utils.reports")
+
+# Sleeve order of the agents' stocks/bonds/cash allocation
+SLEEVES = ("stocks", "bonds", "cash")
+
+# Metadata is drawn from a small set of values, but long-lived servers see
+# arbitrary projection horizons, so the intern table is bounded
+SHARED_VALUES = 1024
+
+
+@functools.lru_cache(maxsize=SHARED_VALUES)
+def _share(value):
+    """One shared instance per distinct immutable value, for the most recently used ``SHARED_VALUES``"""
+    return value
+
+
+def _freeze_scenarios(scenarios: Iterable[Dict]) -> Tuple:
+    return _share(tuple(
+        (scenario["name"], scenario["description"], tuple(scenario["best_performers"]))
+        for scenario in scenarios
+    ))
+
+
+def _thaw_scenarios(scenarios: Tuple) -> List[Dict]:
+    return [
+        {"name": name, "description": description, "best_performers": list(best)}
+        for name, description, best in scenarios
+    ]
+
+
+def _vector(mapping: Dict, keys: Tuple[str, ...], what: str) -> np.ndarray:
+    if tuple(mapping) != keys:
+        raise ValueError(f"{what} keys {list(mapping)} do not match {list(keys)}")
+    return np.fromiter(mapping.values(), dtype=float, count=len(keys))
+
+
+DEFAULT_SCENARIOS = _freeze_scenarios(ECONOMIC_SCENARIOS)
+_ASSET_KEYS = _share(tuple(ASSETS))
+_PROJECTION_KEYS = _share(tuple(PROJECTION_RATES))
+_YEARS = _share(tuple(PROJECTION_YEARS))
+
+
+class StrategyRecord:
+    """Compact ``all_weather_portfolio_strategy`` result"""
+
+    __slots__ = ("allocation", "projections", "scenarios")
+
+    def __init__(self, allocation: np.ndarray, projections: np.ndarray, scenarios: Tuple = DEFAULT_SCENARIOS):
+        self.allocation = allocation  # percent per ``ASSETS`` entry
+        self.projections = projections  # (``PROJECTION_RATES`` x ``PROJECTION_YEARS``)
+        self.scenarios = scenarios
+
+    @classmethod
+    def from_dict(cls, result: Dict) -> "StrategyRecord":
+        projections = result["investment_projections"]
+        if tuple(projections) != _PROJECTION_KEYS:
+            raise ValueError(f"projection keys {list(projections)} do not match {list(_PROJECTION_KEYS)}")
+        return cls(
+            _vector(result["allocation"], _ASSET_KEYS, "allocation"),
+            np.array(list(projections.values()), dtype=float),
+            _freeze_scenarios(result["economic_scenarios"]),
+        )
+
+    @classmethod
+    def from_batch(cls, batch: Dict) -> List["StrategyRecord"]:
+        """Records for every profile of ``all_weather_portfolio_batch``; rows are views into the batch arrays"""
+        if tuple(batch["assets"]) != _ASSET_KEYS or tuple(batch["investment_projections"]) != _PROJECTION_KEYS:
+            raise ValueError("batch does not use the standard asset and projection order")
+        projections = np.stack(list(batch["investment_projections"].values()), axis=1)
+        return [cls(allocation, projection) for allocation, projection in zip(batch["allocation"], projections)]
+
+    def to_dict(self) -> Dict:
+        return {
+            "allocation": dict(zip(_ASSET_KEYS, self.allocation.tolist())),
+            "investment_projections": dict(zip(_PROJECTION_KEYS, self.projections.tolist())),
+            "economic_scenarios": _thaw_scenarios(self.scenarios),
+        }
+
+
+class ProjectionRecord:
+    """Compact ``monte_carlo_projection`` output"""
+
+    __slots__ = ("years", "bands", "values", "total_contributed", "expected_return", "volatility", "n_paths")
+
+    def __init__(self, years: Tuple, bands: Tuple[str, ...], values: np.ndarray, total_contributed: np.ndarray,
+                 expected_return: float, volatility: float, n_paths: int):
+        self.years = years
+        self.bands = bands  # percentile labels, e.g. ("P5", "P50", "P95")
+        self.values = values  # (bands x years)
+        self.total_contributed = total_contributed
+        self.expected_return = expected_return
+        self.volatility = volatility
+        self.n_paths = n_paths
+
+    @classmethod
+    def from_dict(cls, projection: Dict) -> "ProjectionRecord":
+        percentiles = projection["percentiles"]
+        return cls(
+            _share(tuple(projection["years"])),
+            _share(tuple(percentiles)),
+            np.array(list(percentiles.values()), dtype=float),
+            np.array(projection["total_contributed"], dtype=float),
+            projection["expected_return"],
+            projection["volatility"],
+            projection["n_paths"],
+        )
+
+    def to_dict(self) -> Dict:
+        return {
+            "years": list(self.years),
+            "percentiles": dict(zip(self.bands, self.values.tolist())),
+            "total_contributed": self.total_contributed.tolist(),
+            "expected_return": self.expected_return,
+            "volatility": self.volatility,
+            "n_paths": self.n_paths,
+        }
+
+
+class PortfolioRecord:
+    """
+    Compact ``generate_portfolio`` result
+
+    ``market_analysis`` is kept by reference, as the agent already shares one
+    analysis between requests. The markdown report is dropped unless
+    ``keep_output`` is set and re-rendered from the record by ``to_dict``.
+    """
+
+    __slots__ = ("market_analysis", "allocation", "age", "risk_profile", "monthly_investment",
+                 "monthly_investments", "etfs", "rebalancing", "projection", "formatted_output")
+
+    def __init__(self, market_analysis: Dict, allocation: np.ndarray, age, risk_profile: str, monthly_investment,
+                 monthly_investments: np.ndarray, etfs: Tuple, rebalancing: str,
+                 projection: Optional[ProjectionRecord] = None, formatted_output: Optional[str] = None):
+        self.market_analysis = market_analysis
+        self.allocation = allocation  # percent per ``SLEEVES`` entry
+        self.age = age
+        self.risk_profile = risk_profile
+        self.monthly_investment = monthly_investment
+        self.monthly_investments = monthly_investments
+        self.etfs = etfs  # ((sleeve, (ticker, ...)), ...)
+        self.rebalancing = rebalancing
+        self.projection = projection
+        self.formatted_output = formatted_output
+
+    @classmethod
+    def from_dict(cls, result: Dict, keep_output: bool = False) -> "PortfolioRecord":
+        summary = result["summary"]
+        plan = result["implementation"]
+        projection = result.get("projections")
+        return cls(
+            result["market_analysis"],
+            _vector(result["allocation"], SLEEVES, "allocation"),
+            summary["age"],
+            _share(summary["risk_profile"]),
+            summary["monthly_investment"],
+            _vector(plan["monthly_investments"], SLEEVES, "monthly_investments"),
+            _share(tuple((sleeve, tuple(tickers)) for sleeve, tickers in plan["recommended_etfs"].items())),
+            _share(plan["rebalancing"]),
+            ProjectionRecord.from_dict(projection) if projection is not None else None,
+            result.get("formatted_output") if keep_output else None,
+        )
+
+    def to_dict(self) -> Dict:
+        result = {
+            "market_analysis": self.market_analysis,
+            "allocation": dict(zip(SLEEVES, self.allocation.tolist())),
+            "summary": {
+                "age": self.age,
+                "risk_profile": self.risk_profile,
+                "monthly_investment": self.monthly_investment,
+            },
+            "implementation": {
+                "monthly_investments": dict(zip(SLEEVES, self.monthly_investments.tolist())),
+                "recommended_etfs": {sleeve: list(tickers) for sleeve, tickers in self.etfs},
+                "rebalancing": self.rebalancing,
+            },
+        }
+        if self.projection is not None:
+            result["projections"] = self.projection.to_dict()
+        result["formatted_output"] = self.formatted_output or reports.render_report(result)
+        return result
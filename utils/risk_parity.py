@@ -0,0 +1,162 @@
+"""
+Risk-parity (equal risk contribution) weights over the All-Weather assets
+
+``RiskParitySolver`` estimates rolling covariances from prefix sums of
+returns and their outer products, so any (window end, lookback) covariance
+costs O(assets^2) instead of a pass over the window. Covariances and solved
+weights are cached by (window end date, lookback), and every solve starts
+from the previous solution, so re-solving day after day takes one or two
+Newton steps.
+"""
+from collections import OrderedDict
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+from utils.allocation import ASSETS
+from utils.projections import ASSET_COVARIANCE
+
+
+def risk_contributions(weights: np.ndarray, covariance: np.ndarray) -> np.ndarray:
+    """Fraction of portfolio variance contributed by each asset"""
+    marginal = covariance @ weights
+    total = weights @ marginal
+    return weights * marginal / total
+
+
+def risk_parity_weights(
+    covariance: np.ndarray,
+    budgets: Optional[np.ndarray] = None,
+    initial: Optional[np.ndarray] = None,
+    tol: float = 1e-10,
+    max_iter: int = 50,
+) -> np.ndarray:
+    """
+    Long-only weights whose risk contributions match ``budgets`` (equal by default)
+
+    Minimizes the convex ERC objective ``y'Σy / 2 - b'log(y)`` with damped
+    Newton steps; the normalized minimizer has the requested contributions.
+    ``initial`` warm-starts the search from a previous set of weights.
+    """
+    covariance = np.asarray(covariance, dtype=float)
+    n = covariance.shape[0]
+    budgets = np.full(n, 1.0 / n) if budgets is None else np.asarray(budgets, dtype=float) / np.sum(budgets)
+
+    if initial is None:
+        y = 1.0 / np.sqrt(np.diag(covariance))
+    else:
+        y = np.asarray(initial, dtype=float).copy()
+    # Rescale so y'Σy matches sum(b) = 1, the optimum's scale
+    y /= np.sqrt(y @ covariance @ y)
+
+    for _ in range(max_iter):
+        gradient = covariance @ y - budgets / y
+        if np.max(np.abs(gradient * y)) < tol:
+            break
+        hessian = covariance + np.diag(budgets / y ** 2)
+        step = np.linalg.solve(hessian, gradient)
+        # Keep every weight strictly positive
+        shrink = step > 0
+        scale = min(1.0, 0.95 * np.min(y[shrink] / step[shrink])) if shrink.any() else 1.0
+        y = y - scale * step
+    return y / y.sum()
+
+
+def assumption_allocation(budgets: Optional[np.ndarray] = None) -> Dict[str, float]:
+    """
+    Risk-parity percentages from the long-run assumptions in ``utils.allocation``
+
+    A drop-in replacement for ``BASE_ALLOCATION`` when no price history is at hand.
+    """
+    weights = risk_parity_weights(ASSET_COVARIANCE, budgets)
+    return {asset: round(float(weight) * 100, 1) for asset, weight in zip(ASSETS, weights)}
+
+
+class RiskParitySolver:
+    """
+    Rolling risk-parity weights for a (dates x assets) price matrix
+
+    ``solve(end)`` returns equal-risk-contribution weights estimated from the
+    ``lookback`` daily returns up to and including ``end``.
+    """
+
+    def __init__(
+        self,
+        prices: np.ndarray,
+        dates: np.ndarray,
+        columns: Sequence[str] = ASSETS,
+        budgets: Optional[np.ndarray] = None,
+        cache_size: int = 10_000,
+    ):
+        prices = np.asarray(prices, dtype=float)
+        self.dates = np.asarray(dates, dtype="datetime64[D]")[1:]
+        self.columns = list(columns)
+        self.budgets = budgets
+        self.cache_size = cache_size
+
+        returns = prices[1:] / prices[:-1] - 1
+        n = returns.shape[1]
+        # Prefix sums with a leading zero row: window [s, e) is S[e] - S[s]
+        self._sum = np.zeros((len(returns) + 1, n))
+        self._sum[1:] = np.cumsum(returns, axis=0)
+        self._outer = np.zeros((len(returns) + 1, n, n))
+        self._outer[1:] = np.cumsum(returns[:, :, None] * returns[:, None, :], axis=0)
+
+        self._covariances: "OrderedDict[tuple, np.ndarray]" = OrderedDict()
+        self._weights: "OrderedDict[tuple, np.ndarray]" = OrderedDict()
+        self._previous: Optional[np.ndarray] = None
+        self.stats = {"covariance_hits": 0, "covariance_misses": 0, "weight_hits": 0, "weight_misses": 0}
+
+    def _remember(self, cache: OrderedDict, key: tuple, value: np.ndarray):
+        cache[key] = value
+        if len(cache) > self.cache_size:
+            cache.popitem(last=False)
+
+    def _key(self, end, lookback: int) -> tuple:
+        return np.datetime64(end, "D"), int(lookback)
+
+    def covariance(self, end, lookback: int = 252) -> np.ndarray:
+        """Sample covariance of the ``lookback`` daily returns ending on ``end``"""
+        key = self._key(end, lookback)
+        cached = self._covariances.get(key)
+        if cached is not None:
+            self._covariances.move_to_end(key)
+            self.stats["covariance_hits"] += 1
+            return cached
+        self.stats["covariance_misses"] += 1
+
+        stop = int(np.searchsorted(self.dates, key[0], side="right"))
+        start = stop - lookback
+        if start < 0:
+            raise ValueError(f"Need {lookback} returns before {key[0]}, only {stop} available")
+        total = self._sum[stop] - self._sum[start]
+        outer = self._outer[stop] - self._outer[start]
+        covariance = (outer - np.outer(total, total) / lookback) / (lookback - 1)
+        self._remember(self._covariances, key, covariance)
+        return covariance
+
+    def solve(self, end, lookback: int = 252) -> np.ndarray:
+        """Risk-parity weights in ``columns`` order for the window ending on ``end``"""
+        key = self._key(end, lookback)
+        cached = self._weights.get(key)
+        if cached is not None:
+            self._weights.move_to_end(key)
+            self.stats["weight_hits"] += 1
+            return cached
+        self.stats["weight_misses"] += 1
+
+        weights = risk_parity_weights(self.covariance(end, lookback), self.budgets, self._previous)
+        self._previous = weights
+        self._remember(self._weights, key, weights)
+        return weights
+
+    def solve_range(self, ends: Sequence, lookback: int = 252) -> np.ndarray:
+        """Weights for many window ends, each warm-started from the one before"""
+        return np.array([self.solve(end, lookback) for end in ends])
+
+    def allocation(self, end, lookback: int = 252) -> Dict[str, float]:
+        """Weights as a percentage allocation dict, the shape of ``BASE_ALLOCATION``"""
+        return {
+            column: round(float(weight) * 100, 1)
+            for column, weight in zip(self.columns, self.solve(end, lookback))
+        }
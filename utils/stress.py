@@ -0,0 +1,204 @@
+"""
+Stress analytics over backtested equity curves
+
+Drawdowns, recovery times and rolling returns are computed for every
+possible start date at once. Each statistic is one or two running
+maxima/minima along the time axis, taken forward or in reverse. There are
+no loops over windows, so the cost is linear in the length of the history
+and vectorized across allocations. Crisis replays slice the same curves at
+named historical windows.
+"""
+from typing import Dict, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from utils.backtest import TRADING_DAYS, backtest
+
+DEFAULT_HORIZONS = (1, 3, 5, 10)  # years
+
+# Peak-to-trough dates of the US equity market in each episode
+CRISIS_WINDOWS = {
+    "Dot-com Bust": ("2000-03-24", "2002-10-09"),
+    "2008 Financial Crisis": ("2007-10-09", "2009-03-09"),
+    "2020 Covid Crash": ("2020-02-19", "2020-03-23"),
+    "2022 Rate Shock": ("2022-01-03", "2022-10-12"),
+}
+
+
+def _reverse_accumulate(ufunc: np.ufunc, values: np.ndarray) -> np.ndarray:
+    """``ufunc.accumulate`` from the last date backwards"""
+    return ufunc.accumulate(values[:, ::-1], axis=1)[:, ::-1]
+
+
+def drawdown_paths(equity: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Per-date drawdown statistics, each (allocations x dates)
+
+    ``drawdown``: distance below the running peak.
+    ``worst_loss_from_start``: lowest later value against the value on that date.
+    ``worst_drawdown_from_start``: deepest peak-to-trough drawdown an investor
+    entering on that date lives through before the history ends. A drawdown
+    from ``t`` either peaks at ``t`` or is a drawdown from ``t + 1``, so this
+    is a reverse running minimum of ``worst_loss_from_start``.
+    ``days_to_recovery``: dates until the running peak is regained, 0 at a
+    peak and -1 if it never is.
+    ``last_peak``: index of the running peak's date.
+    """
+    equity = np.asarray(equity, dtype=float)
+    days = equity.shape[1]
+    index = np.arange(days)
+    peak = np.maximum.accumulate(equity, axis=1)
+    at_peak = equity >= peak
+    loss_from_start = _reverse_accumulate(np.minimum, equity) / equity - 1
+    next_peak = _reverse_accumulate(np.minimum, np.where(at_peak, index, days))
+    return {
+        "drawdown": equity / peak - 1,
+        "worst_loss_from_start": loss_from_start,
+        "worst_drawdown_from_start": _reverse_accumulate(np.minimum, loss_from_start),
+        "days_to_recovery": np.where(next_peak < days, next_peak - index, -1),
+        "last_peak": np.maximum.accumulate(np.where(at_peak, index, 0), axis=1),
+    }
+
+
+def horizon_ends(days: int, years: float, dates: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """(start indexes, end indexes) of every complete ``years`` window"""
+    if dates is None:
+        span = int(round(years * TRADING_DAYS))
+        starts = np.arange(max(days - span, 0))
+        return starts, starts + span
+    dates = np.asarray(dates, dtype="datetime64[D]")
+    ends = np.searchsorted(dates, dates + np.timedelta64(int(round(years * 365.25)), "D"))
+    starts = np.flatnonzero(ends < days)
+    return starts, ends[starts]
+
+
+def rolling_returns(equity: np.ndarray, years: float, dates: Optional[np.ndarray] = None) -> np.ndarray:
+    """Annualized ``years``-year return for every start date, (allocations x complete windows)"""
+    equity = np.asarray(equity, dtype=float)
+    starts, ends = horizon_ends(equity.shape[1], years, dates)
+    return (equity[:, ends] / equity[:, starts]) ** (1 / years) - 1
+
+
+def stress_metrics(
+    equity: np.ndarray,
+    dates: Optional[np.ndarray] = None,
+    horizons: Sequence[float] = DEFAULT_HORIZONS,
+) -> Dict:
+    """
+    Drawdown, recovery and rolling-return summaries per allocation
+
+    Day counts are in dates of the history (trading days for daily prices).
+    Dates are reported as indexes unless ``dates`` is given; a drawdown that
+    never recovers has recovery -1 (or NaT). For each horizon, ``rolling``
+    holds the worst, 5th percentile, median and best annualized return over
+    every start date, the share of start dates that lost money and the worst
+    start date.
+    """
+    equity = np.asarray(equity, dtype=float)
+    paths = drawdown_paths(equity)
+    rows = np.arange(equity.shape[0])
+    if dates is not None:
+        dates = np.asarray(dates, dtype="datetime64[D]")
+
+    def label(idx, valid=True):
+        if dates is None:
+            return np.where(valid, idx, -1)
+        return np.where(valid, dates[np.where(valid, idx, 0)], np.datetime64("NaT"))
+
+    trough = paths["drawdown"].argmin(axis=1)
+    peak = paths["last_peak"][rows, trough]
+    to_recovery = paths["days_to_recovery"][rows, trough]
+    recovered = to_recovery >= 0
+    # Underwater spell length at each date: since the last peak, through recovery if there is one
+    days = equity.shape[1]
+    recovery_index = np.where(paths["days_to_recovery"] >= 0, np.arange(days) + paths["days_to_recovery"], days - 1)
+    underwater = recovery_index - paths["last_peak"]
+
+    rolling = {}
+    for years in horizons:
+        starts, _ = horizon_ends(days, years, dates)
+        if not len(starts):
+            continue
+        returns = rolling_returns(equity, years, dates)
+        p5, median = np.percentile(returns, [5, 50], axis=1)  # one partition for both
+        rolling[years] = {
+            "worst": returns.min(axis=1),
+            "p5": p5,
+            "median": median,
+            "best": returns.max(axis=1),
+            "loss_share": (returns < 0).mean(axis=1),
+            "worst_start": label(starts[returns.argmin(axis=1)]),
+        }
+
+    return {
+        "max_drawdown": paths["drawdown"][rows, trough],
+        "peak": label(peak),
+        "trough": label(trough),
+        "recovery": label(trough + to_recovery, recovered),
+        "days_to_recovery": to_recovery,
+        "peak_to_recovery_days": np.where(recovered, trough + to_recovery - peak, -1),
+        "longest_underwater_days": underwater.max(axis=1),
+        "worst_entry_drawdown": paths["worst_drawdown_from_start"].min(axis=1),
+        "worst_entry_loss": paths["worst_loss_from_start"].min(axis=1),
+        "rolling": rolling,
+    }
+
+
+def crisis_replay(
+    equity: np.ndarray,
+    dates: np.ndarray,
+    windows: Dict[str, Tuple[str, str]] = CRISIS_WINDOWS,
+) -> Dict[str, Dict]:
+    """
+    Each named window the history fully covers, replayed for every allocation
+
+    ``return`` runs from the window's first to its last date.
+    ``max_drawdown`` is the deepest drawdown inside the window.
+    ``days_to_recover`` counts dates after the window until the value at its
+    start is regained, or -1.
+    """
+    equity = np.asarray(equity, dtype=float)
+    dates = np.asarray(dates, dtype="datetime64[D]")
+    replays = {}
+    for name, (first, last) in windows.items():
+        first, last = np.datetime64(first, "D"), np.datetime64(last, "D")
+        if dates[0] > first or dates[-1] < last:
+            continue  # the history does not cover the whole window
+        start = int(np.searchsorted(dates, first))
+        end = int(np.searchsorted(dates, last, side="right")) - 1
+        window = equity[:, start:end + 1]
+        base = equity[:, start]
+        regained = equity[:, end:] >= base[:, None]
+        recovered = regained.any(axis=1)
+        replays[name] = {
+            "start": dates[start],
+            "end": dates[end],
+            "return": equity[:, end] / base - 1,
+            "max_drawdown": (window / np.maximum.accumulate(window, axis=1) - 1).min(axis=1),
+            "days_to_recover": np.where(recovered, regained.argmax(axis=1), -1),
+        }
+    return replays
+
+
+def stress_test(
+    allocations: Union[Dict, Sequence[Dict], np.ndarray],
+    prices,
+    dates: Optional[np.ndarray] = None,
+    columns: Optional[Sequence[str]] = None,
+    horizons: Sequence[float] = DEFAULT_HORIZONS,
+    windows: Dict[str, Tuple[str, str]] = CRISIS_WINDOWS,
+    **options,
+) -> Dict:
+    """
+    Backtest allocations, then run the stress analytics on their equity curves
+
+    ``options`` are passed to ``utils.backtest.backtest`` (``rebalance``,
+    ``drift_threshold``, ``proxies``). Crisis replays need dates.
+    """
+    result = backtest(allocations, prices, dates=dates, columns=columns, **options)
+    dates = result["dates"]
+    return {
+        "backtest": result,
+        "stress": stress_metrics(result["equity"], dates, horizons),
+        "crises": crisis_replay(result["equity"], dates, windows) if dates is not None else {},
+    }
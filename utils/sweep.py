@@ -0,0 +1,262 @@
+"""
+Allocation-surface sweep over age, risk multiplier and base-weight perturbations
+
+Every point on a (perturbations x risk multipliers x ages) grid is turned
+into an allocation the way ``all_weather_portfolio_strategy`` does it,
+including its rounding. The multiplier and the age factor scale every
+weight equally, and normalization cancels that out. They only move an
+allocation through the 0.1% rounding, so a dense grid holds few distinct
+allocations. Those are found first and evaluated once each.
+
+Expected return and volatility come from the covariance model in
+``utils.projections``. Drawdown is the ``drawdown_percentile`` worst max
+drawdown across simulated (or supplied historical) monthly asset return
+paths, rebalanced every period. The simulation is split into chunks across
+a process pool. For price history, pass a published ``PriceSnapshot``
+directory. Every pool worker then maps the same snapshot read-only, rather
+than receiving its own copy of the returns. ``frontier_table`` reads the
+efficient frontier off the result.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from utils.allocation import ASSET_ASSUMPTIONS, ASSETS
+from utils.backtest import calendar_flags
+from utils.batch import BASE_WEIGHTS, round_like_python
+from utils.lazy import lazy_import
+from utils.projections import ASSET_COVARIANCE
+
+price_snapshot = lazy_import("agents.price_snapshot")
+
+DEFAULT_AGES = np.arange(18, 101)
+DEFAULT_RISK_MULTIPLIERS = np.linspace(0.5, 1.5, 101)
+DEFAULT_PERTURBATIONS = 120
+DEFAULT_MONTHS = 120
+DEFAULT_PATHS = 200
+CHUNK_SIZE = 64
+
+# ETFs whose price history stands in for each asset class
+ASSET_TICKERS = {
+    "US Stocks": "VTI",
+    "International Stocks": "VXUS",
+    "Long-Term US Treasuries": "TLT",
+    "Intermediate-Term Treasuries": "IEF",
+    "Treasury Inflation-Protected Securities (TIPS)": "TIP",
+    "Gold": "GLD",
+    "Commodities": "DBC",
+}
+
+_MEANS = np.array([ASSET_ASSUMPTIONS[asset][0] for asset in ASSETS])
+
+_worker_state: Dict = {}
+
+
+def perturb_weights(
+    n: int = DEFAULT_PERTURBATIONS,
+    scale: float = 0.25,
+    seed: Optional[int] = 0,
+    base_allocation: Optional[Dict] = None,
+) -> np.ndarray:
+    """
+    (n x ``ASSETS``) base allocations, in percent, around the base table
+
+    Each weight is multiplied by an independent lognormal factor with
+    log-volatility ``scale``, then the row is renormalized to 100. Row 0 is
+    the unperturbed base.
+    """
+    base = BASE_WEIGHTS if base_allocation is None else np.array(
+        [base_allocation[asset] for asset in ASSETS], dtype=float
+    )
+    rng = np.random.default_rng(seed)
+    weights = base * np.exp(scale * rng.standard_normal((n, len(ASSETS))))
+    weights[0] = base
+    return weights / weights.sum(axis=1, keepdims=True) * 100
+
+
+def simulate_asset_returns(
+    n_paths: int = DEFAULT_PATHS,
+    months: int = DEFAULT_MONTHS,
+    seed: Optional[int] = 0,
+) -> np.ndarray:
+    """(paths x months x ``ASSETS``) monthly returns drawn from the capital-market assumptions"""
+    rng = np.random.default_rng(seed)
+    draws = rng.multivariate_normal(_MEANS / 12, ASSET_COVARIANCE / 12, size=(n_paths, months))
+    return np.maximum(draws, -0.99).astype(np.float32)
+
+
+def snapshot_monthly_returns(snapshot, tickers: Optional[Dict[str, str]] = None) -> np.ndarray:
+    """(months x ``ASSETS``) month-end to month-end returns from a ``PriceSnapshot``"""
+    tickers = tickers or ASSET_TICKERS
+    closes = snapshot.closes_for([tickers[asset] for asset in ASSETS])
+    month_ends = np.append(np.flatnonzero(calendar_flags(snapshot.dates, "monthly")), len(snapshot.dates) - 1)
+    closes = closes[month_ends]
+    return (closes[1:] / closes[:-1] - 1).astype(np.float32)
+
+
+def sweep_allocations(base_weights: np.ndarray, multipliers: np.ndarray, ages: np.ndarray) -> Dict:
+    """
+    Distinct strategy allocations on the grid
+
+    Returns ``allocations`` (distinct x ``ASSETS``, percent) and ``index``
+    (perturbations x multipliers x ages) mapping every point to its row.
+    """
+    age_risk_factor = np.maximum(0.5, (100 - np.asarray(ages, dtype=float)) / 100)
+
+    # Same operation order as the scalar path: (weight * multiplier) * age factor
+    scaled = base_weights[:, None, None, :] * np.asarray(multipliers, dtype=float)[None, :, None, None]
+    adjusted = round_like_python(scaled * age_risk_factor[None, None, :, None], 1)
+    total = np.zeros(adjusted.shape[:3])
+    for column in range(adjusted.shape[3]):
+        total = total + adjusted[..., column]
+    allocations = round_like_python((adjusted / total[..., None]) * 100, 1).reshape(-1, len(ASSETS))
+
+    # Tenths of a percent fit in int16, so a row is a 14-byte key
+    keys = np.ascontiguousarray(np.rint(allocations * 10).astype("<i2")).view(f"V{2 * len(ASSETS)}").ravel()
+    _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    index = inverse.reshape(adjusted.shape[:3])
+    return {"allocations": allocations[first], "index": index.astype(np.int32)}
+
+
+def max_drawdowns(weights: np.ndarray, by_period: np.ndarray) -> np.ndarray:
+    """
+    (paths x allocations) max drawdown of each weight row on each return path
+
+    ``by_period`` is (periods x paths x ``ASSETS``). One month of every
+    path and allocation is advanced per step. This keeps the working set in
+    cache, which is far faster than accumulating along the time axis.
+    """
+    periods, paths, assets = by_period.shape
+    growth = np.log1p(by_period.reshape(-1, assets) @ weights.T.astype(np.float32)).reshape(periods, -1)
+    wealth = np.zeros(growth.shape[1], dtype=np.float32)
+    peak = np.zeros_like(wealth)  # the starting balance is the first peak
+    worst = np.zeros_like(wealth)
+    gap = np.empty_like(wealth)
+    for month in growth:
+        wealth += month
+        np.maximum(peak, wealth, out=peak)
+        np.subtract(wealth, peak, out=gap)
+        np.minimum(worst, gap, out=worst)
+    return np.expm1(worst).reshape(paths, len(weights))
+
+
+def _by_period(asset_returns: np.ndarray) -> np.ndarray:
+    """(periods x paths x ``ASSETS``) layout of (paths x periods x ``ASSETS``) or (periods x ``ASSETS``) returns"""
+    asset_returns = np.asarray(asset_returns, dtype=np.float32)
+    if asset_returns.ndim == 2:
+        asset_returns = asset_returns[None]
+    return np.ascontiguousarray(asset_returns.transpose(1, 0, 2))
+
+
+def _init_worker(by_period: Optional[np.ndarray], percentile: float, snapshot: Optional[tuple] = None):
+    if snapshot is not None:
+        root, version, tickers = snapshot
+        by_period = _by_period(snapshot_monthly_returns(price_snapshot.PriceSnapshot(root, version), tickers))
+    _worker_state["by_period"] = by_period
+    _worker_state["percentile"] = percentile
+
+
+def _drawdown_chunk(weights: np.ndarray) -> np.ndarray:
+    drawdowns = max_drawdowns(weights, _worker_state["by_period"])
+    return np.percentile(drawdowns, _worker_state["percentile"], axis=0)
+
+
+def sweep(
+    ages: Sequence[int] = DEFAULT_AGES,
+    risk_multipliers: Sequence[float] = DEFAULT_RISK_MULTIPLIERS,
+    base_weights: Optional[np.ndarray] = None,
+    asset_returns: Optional[np.ndarray] = None,
+    drawdown_percentile: float = 5.0,
+    workers: Optional[int] = None,
+    chunk_size: int = CHUNK_SIZE,
+    snapshot_root: Optional[str] = None,
+    tickers: Optional[Dict[str, str]] = None,
+) -> Dict:
+    """
+    Expected return, volatility and drawdown over the whole grid
+
+    ``base_weights`` defaults to ``perturb_weights()``. ``asset_returns`` is
+    (paths x periods x ``ASSETS``) or (periods x ``ASSETS``) periodic returns,
+    e.g. historical monthly returns; by default ``simulate_asset_returns()``.
+    ``snapshot_root`` replaces it with the month-end returns of the current
+    ``PriceSnapshot`` there, read through ``tickers`` (``ASSET_TICKERS`` by
+    default). Every worker maps the same version.
+    Metrics are per distinct allocation; index them with ``index`` for the
+    grid's (perturbations x multipliers x ages) shape.
+    """
+    ages = np.asarray(ages)
+    risk_multipliers = np.asarray(risk_multipliers, dtype=float)
+    base_weights = perturb_weights() if base_weights is None else np.atleast_2d(base_weights)
+    snapshot = by_period = None
+    if snapshot_root is not None:
+        snapshot = (snapshot_root, price_snapshot.PriceSnapshot.open(snapshot_root).version, tickers)
+    else:
+        by_period = _by_period(simulate_asset_returns() if asset_returns is None else asset_returns)
+
+    grid = sweep_allocations(base_weights, risk_multipliers, ages)
+    weights = grid["allocations"] / 100
+    expected_return = weights @ _MEANS
+    volatility = np.sqrt(np.einsum("ij,jk,ik->i", weights, ASSET_COVARIANCE, weights))
+
+    chunks = [weights[start:start + chunk_size] for start in range(0, len(weights), chunk_size)]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        _init_worker(by_period, drawdown_percentile, snapshot)
+        drawdown = [_drawdown_chunk(chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(by_period, drawdown_percentile, snapshot)
+        ) as pool:
+            drawdown = list(pool.map(_drawdown_chunk, chunks, chunksize=8))
+
+    return {
+        "assets": list(ASSETS),
+        "ages": ages,
+        "risk_multipliers": risk_multipliers,
+        "base_weights": base_weights,
+        "points": grid["index"].size,
+        **grid,
+        "expected_return": expected_return,
+        "volatility": volatility,
+        "drawdown": np.concatenate(drawdown) if drawdown else np.empty(0),
+    }
+
+
+def efficient_frontier(expected_return: np.ndarray, volatility: np.ndarray) -> np.ndarray:
+    """Indexes of the allocations no other beats on both return and volatility, by volatility"""
+    order = np.lexsort((-expected_return, volatility))
+    returns = expected_return[order]
+    best_before = np.maximum.accumulate(np.concatenate(([-np.inf], returns[:-1])))
+    return order[returns > best_before]
+
+
+def frontier_table(result: Dict, max_rows: Optional[int] = 25) -> List[Dict]:
+    """
+    Efficient-frontier rows, lowest volatility first
+
+    Each row has the metrics, the allocation and one grid point that produces
+    it. ``max_rows`` thins the frontier evenly by volatility.
+    """
+    frontier = efficient_frontier(result["expected_return"], result["volatility"])
+    if max_rows and len(frontier) > max_rows:
+        targets = np.linspace(result["volatility"][frontier[0]], result["volatility"][frontier[-1]], max_rows)
+        picks = np.searchsorted(result["volatility"][frontier], targets).clip(0, len(frontier) - 1)
+        frontier = frontier[np.unique(picks)]
+
+    # Every distinct allocation occurs on the grid, so this is one point per row
+    _, first_point = np.unique(result["index"].ravel(), return_index=True)
+    rows = []
+    for row in frontier:
+        perturbation, multiplier, age = np.unravel_index(first_point[row], result["index"].shape)
+        rows.append({
+            "age": int(result["ages"][age]),
+            "risk_multiplier": float(result["risk_multipliers"][multiplier]),
+            "perturbation": int(perturbation),
+            "expected_return": float(result["expected_return"][row]),
+            "volatility": float(result["volatility"][row]),
+            "drawdown": float(result["drawdown"][row]),
+            "allocation": dict(zip(result["assets"], result["allocations"][row].tolist())),
+        })
+    return rows
@@ -0,0 +1,408 @@
+"""
+Lightweight tracing and metrics for the request path
+
+``tracer.span(name)`` times a stage. Nested spans form a trace per request,
+every span's duration lands in a latency histogram labelled by stage, and
+``tracer.count`` feeds labelled counters such as cache hits and misses.
+Everything can be exported as Prometheus text or JSON. A ``SamplingProfiler``
+can be attached to sample the stacks of threads inside a traced request and
+report them as collapsed stacks, attributed to the innermost span.
+
+Tracing is off unless ``ALL_WEATHER_TRACING=1`` is set or ``tracer.enable()``
+is called. While it is off, ``span`` returns a shared no-op context manager
+and ``count`` returns immediately, so instrumented code pays one attribute
+check per call.
+"""
+import bisect
+import itertools
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+PREFIX = "all_weather"
+
+# Upper bounds in seconds; +Inf is implicit
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict) -> Labels:
+    return tuple(sorted((str(k), str(v)) for k, v in labels.items()))
+
+
+def _format_labels(labels: Labels, extra: str = "") -> str:
+    parts = [f'{k}="{v}"' for k, v in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_bound(bound: float) -> str:
+    return "+Inf" if bound == float("inf") else repr(float(bound))
+
+
+def _finite(value: float) -> Optional[float]:
+    return None if value == float("inf") else value
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Iterable[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[float, int]]:
+        return list(zip(self.buckets + (float("inf"),), itertools.accumulate(self.counts)))
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the ``q`` quantile"""
+        rank = q * self.count
+        for bound, seen in self.cumulative():
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+class MetricsRegistry:
+    """Thread-safe labelled counters and histograms, plus gauges read at export time"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: Dict[Tuple[str, Labels], float] = {}
+        self.histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self.help: Dict[str, str] = {}
+        self._collectors: List[Callable[[], Iterable[Tuple[str, Dict, float]]]] = []
+
+    def describe(self, name: str, text: str):
+        self.help[name] = text
+
+    def inc(self, name: str, value: float = 1.0, **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def register_collector(self, collector: Callable[[], Iterable[Tuple[str, Dict, float]]]):
+        """Add a callable yielding (name, labels, value) gauges at export time"""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def gauges(self) -> List[Tuple[str, Labels, float]]:
+        with self._lock:
+            collectors = list(self._collectors)
+        return [(name, _labels(labels), float(value))
+                for collector in collectors for name, labels, value in collector()]
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def to_prometheus(self) -> str:
+        """Prometheus text exposition format"""
+        with self._lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted(
+                ((key, histogram.cumulative(), histogram.sum, histogram.count)
+                 for key, histogram in self.histograms.items()),
+                key=lambda item: item[0],
+            )
+        lines: List[str] = []
+        declared = set()
+
+        def declare(name: str, kind: str):
+            if name not in declared:
+                declared.add(name)
+                if name in self.help:
+                    lines.append(f"# HELP {name} {self.help[name]}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in counters:
+            declare(name, "counter")
+            lines.append(f"{name}{_format_labels(labels)} {value:g}")
+        for (name, labels), cumulative, total, count in histograms:
+            declare(name, "histogram")
+            for bound, seen in cumulative:
+                le = 'le="%s"' % _format_bound(bound)
+                lines.append(f"{name}_bucket{_format_labels(labels, le)} {seen}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {total!r}")
+            lines.append(f"{name}_count{_format_labels(labels)} {count}")
+        for name, labels, value in sorted(self.gauges()):
+            declare(name, "gauge")
+            lines.append(f"{name}{_format_labels(labels)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            counters = [{"name": name, "labels": dict(labels), "value": value}
+                        for (name, labels), value in sorted(self.counters.items())]
+            histograms = [
+                {
+                    "name": name,
+                    "labels": dict(labels),
+                    "buckets": {_format_bound(bound): seen for bound, seen in histogram.cumulative()},
+                    "sum": histogram.sum,
+                    "count": histogram.count,
+                    # Bucket upper bounds; None when the quantile is past the last bucket
+                    "p50": _finite(histogram.quantile(0.5)),
+                    "p99": _finite(histogram.quantile(0.99)),
+                }
+                for (name, labels), histogram in sorted(self.histograms.items(), key=lambda item: item[0])
+            ]
+        gauges = [{"name": name, "labels": dict(labels), "value": value}
+                  for name, labels, value in self.gauges()]
+        return {"counters": counters, "histograms": histograms, "gauges": gauges}
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict())
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    __slots__ = ("tracer", "name", "attrs", "trace_id", "span_id", "parent_id", "start", "duration", "error")
+
+    def __init__(self, tracer: "Tracer", name: str, attrs: Dict):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.duration = 0.0
+        self.error = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        self.tracer._push(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self.start
+        if exc_type is not None:
+            self.error = exc_type.__name__
+        self.tracer._pop(self)
+        return False
+
+    def to_dict(self) -> Dict:
+        return {
+            "name": self.name, "trace_id": self.trace_id, "span_id": self.span_id,
+            "parent_id": self.parent_id, "duration": self.duration, "error": self.error,
+            "attrs": self.attrs,
+        }
+
+
+class Tracer:
+    """
+    Spans per stage feeding a ``MetricsRegistry``
+
+    The last ``keep_traces`` finished traces are kept for inspection.
+    """
+
+    def __init__(self, enabled: bool = False, metrics: Optional[MetricsRegistry] = None,
+                 keep_traces: int = 256):
+        self.enabled = enabled
+        self.metrics = metrics or MetricsRegistry()
+        self.metrics.describe(f"{PREFIX}_stage_duration_seconds", "Time spent in each traced stage")
+        self.metrics.describe(f"{PREFIX}_stage_errors_total", "Traced stages that raised")
+        self.metrics.describe(f"{PREFIX}_cache_requests_total", "Cache lookups by cache and result")
+        self.traces: deque = deque(maxlen=keep_traces)
+        self.profiler: Optional["SamplingProfiler"] = None
+        self._local = threading.local()
+        self._ids = itertools.count(1)
+        # thread id -> that thread's open span stack, for the profiler
+        self.active: Dict[int, List[Span]] = {}
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def span(self, name: str, **attrs):
+        if not self.enabled:
+            return NOOP_SPAN
+        return Span(self, name, attrs)
+
+    def count(self, name: str, value: float = 1.0, **labels):
+        if self.enabled:
+            self.metrics.inc(f"{PREFIX}_{name}", value, **labels)
+
+    def cache(self, cache: str, hit: bool):
+        """Count one lookup of ``cache``"""
+        if self.enabled:
+            self.metrics.inc(f"{PREFIX}_cache_requests_total", cache=cache, result="hit" if hit else "miss")
+
+    def _stack(self) -> List[Span]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+            self._local.finished = []
+        return stack
+
+    def _push(self, span: Span):
+        stack = self._stack()
+        span.span_id = next(self._ids)
+        if stack:
+            span.trace_id, span.parent_id = stack[0].trace_id, stack[-1].span_id
+        else:
+            span.trace_id, span.parent_id = span.span_id, None
+            self.active[threading.get_ident()] = stack
+            if self.profiler is not None:
+                self.profiler.watch(threading.get_ident())
+        stack.append(span)
+
+    def _observe(self, name: str, duration: float, error: Optional[str]):
+        self.metrics.observe(f"{PREFIX}_stage_duration_seconds", duration, stage=name)
+        if error is not None:
+            self.metrics.inc(f"{PREFIX}_stage_errors_total", stage=name, error=error)
+
+    def _pop(self, span: Span):
+        stack = self._stack()
+        stack.pop()
+        self._observe(span.name, span.duration, span.error)
+        finished = self._local.finished
+        finished.append(span.to_dict())
+        if not stack:
+            self.active.pop(threading.get_ident(), None)
+            if self.profiler is not None:
+                self.profiler.unwatch(threading.get_ident())
+            # Root first (it finishes last), then its descendants in completion order
+            self.traces.append(finished[-1:] + finished[:-1])
+            self._local.finished = []
+
+    def record(self, trace: List[Dict]):
+        """
+        Add a trace finished elsewhere, e.g. in a worker process, as if traced here
+
+        ``trace`` is a list of ``Span.to_dict`` results, as kept in ``traces``.
+        Its span ids are the other tracer's.
+        """
+        if not self.enabled:
+            return
+        for span in trace:
+            self._observe(span["name"], span["duration"], span["error"])
+        self.traces.append(trace)
+
+    def recent_traces(self, limit: Optional[int] = None) -> List[List[Dict]]:
+        traces = list(self.traces)
+        return traces[-limit:] if limit else traces
+
+
+class SamplingProfiler:
+    """
+    Samples the stacks of threads inside a traced request
+
+    Attach with ``SamplingProfiler(tracer).start()``. Only a ``sample_rate``
+    fraction of requests is watched, and the sampler thread sleeps while no
+    watched request is running. ``collapsed()`` returns
+    ``span;module:function;... count`` lines for flame-graph tools.
+    """
+
+    def __init__(self, tracer: Tracer, interval: float = 0.005, sample_rate: float = 1.0,
+                 max_depth: int = 48):
+        self.tracer = tracer
+        self.interval = interval
+        self.sample_rate = sample_rate
+        self.max_depth = max_depth
+        self.samples: Counter = Counter()
+        self._watched: set = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "SamplingProfiler":
+        self.tracer.profiler = self
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self.tracer.profiler is self:
+            self.tracer.profiler = None
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def watch(self, thread_id: int):
+        if self.sample_rate >= 1.0 or random.random() < self.sample_rate:
+            with self._lock:
+                self._watched.add(thread_id)
+            self._wake.set()
+
+    def unwatch(self, thread_id: int):
+        with self._lock:
+            self._watched.discard(thread_id)
+            if not self._watched:
+                self._wake.clear()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.wait()
+            if self._stopped.is_set():
+                break
+            self.sample()
+            time.sleep(self.interval)
+
+    def sample(self):
+        with self._lock:
+            watched = list(self._watched)
+        frames = sys._current_frames()
+        for thread_id in watched:
+            frame = frames.get(thread_id)
+            stack = self.tracer.active.get(thread_id)
+            if frame is None or not stack:
+                continue
+            names = []
+            while frame is not None and len(names) < self.max_depth:
+                code = frame.f_code
+                names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            span = stack[-1].name if stack else "?"
+            self.samples[";".join([span] + names[::-1])] += 1
+
+    def collapsed(self, top: Optional[int] = None) -> str:
+        return "\n".join(f"{stack} {count}" for stack, count in self.samples.most_common(top))
+
+
+tracer = Tracer(enabled=os.environ.get("ALL_WEATHER_TRACING", "") not in ("", "0", "false"))